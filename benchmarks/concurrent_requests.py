@@ -0,0 +1,66 @@
+"""
+Mide el throughput de la API bajo peticiones concurrentes.
+
+Lanza ``--requests`` peticiones GET contra cada ruta manteniendo como máximo
+``--concurrency`` peticiones en vuelo y reporta peticiones por segundo y
+latencias p50/p99. La API debe estar corriendo previamente, por ejemplo:
+
+    cd src && uvicorn main:app --port 8000
+    python benchmarks/concurrent_requests.py --base-url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/api/v1/brands/", "/api/v1/models/", "/api/v1/brands/1/models"]
+
+
+async def run_path(
+    client: httpx.AsyncClient, path: str, total: int, concurrency: int
+) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start, latencies
+
+
+async def main(base_url: str, paths: list[str], total: int, concurrency: int) -> None:
+    # Expira antes que el keep-alive de uvicorn (5s) para no reutilizar sockets cerrados.
+    limits = httpx.Limits(max_connections=concurrency, keepalive_expiry=2)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        for path in paths:
+            # Calentamiento para no medir la apertura de conexiones.
+            await run_path(client, path, concurrency, concurrency)
+            elapsed, latencies = await run_path(client, path, total, concurrency)
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"{path:<28} {total / elapsed:>8.1f} req/s  "
+                f"p50={statistics.median(latencies) * 1000:.1f}ms  "
+                f"p99={p99 * 1000:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.paths, args.requests, args.concurrency))
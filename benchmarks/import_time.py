@@ -0,0 +1,81 @@
+"""
+Mide el tiempo de importación en frío de un módulo de la aplicación.
+
+Importa `--module` (por defecto, `main`) en ``--runs`` procesos nuevos de Python y
+reporta la mediana y el mínimo. Con ``--top`` también muestra los módulos con mayor
+tiempo acumulado según ``python -X importtime``. No se conecta a la base de datos:
+solo mide el costo de importar. Por ejemplo:
+
+    python benchmarks/import_time.py --runs 10 --top 15
+    python benchmarks/import_time.py --module cli
+
+Referencia (1 CPU, mediana de 15 procesos) antes y después de crear el engine y
+la configuración al primer uso y de sacar FastAPI de core/ y shared/:
+
+    main            1068ms -> 779ms
+    cli              962ms -> 684ms
+    core.database    825ms -> 560ms
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+MEASURE = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+
+def import_seconds(module: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(module=module)],
+        cwd=SRC_DIR,
+        env={**os.environ, "PYTHONPATH": str(SRC_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def top_imports(module: str, top: int) -> list[tuple[int, str]]:
+    """Módulos con mayor tiempo acumulado de importación, en microsegundos."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        env={**os.environ, "PYTHONPATH": str(SRC_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=0)
+    args = parser.parse_args()
+
+    times = [import_seconds(args.module) for _ in range(args.runs)]
+    print(
+        f"import {args.module}: mediana={statistics.median(times) * 1000:.0f}ms  "
+        f"mínimo={min(times) * 1000:.0f}ms  ({args.runs} procesos)"
+    )
+    for cumulative, name in top_imports(args.module, args.top):
+        print(f"{cumulative / 1000:>8.1f}ms  {name}")
@@ -0,0 +1,100 @@
+"""
+Mide el CPU por petición de los listados del catálogo según el número de filas.
+
+Llama a la aplicación en el mismo proceso (sin servidor HTTP) contra la base de
+datos configurada y reporta, por tamaño, el tiempo de CPU y el tiempo total por
+petición. El CPU solo incluye a este proceso: la consulta en Postgres no cuenta.
+El cache de lecturas se desactiva para medir siempre la consulta y la
+serialización. Por ejemplo:
+
+    ENVIRONMENT=LOCAL LOCAL_POSTGRES_URI=postgresql://... \\
+        python benchmarks/serialization.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("CACHE_BACKEND", "none")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import httpx  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from core.database import database  # noqa: E402
+from main import app  # noqa: E402
+from models.model import VehicleModelModel  # noqa: E402
+
+
+async def price_bound(rows: int) -> float | None:
+    """Precio `lower` con el que el listado de modelos devuelve unas `rows` filas."""
+    async with database.SessionLocal() as db:
+        price = await db.scalar(
+            select(VehicleModelModel.average_price)
+            .where(VehicleModelModel.average_price.isnot(None))
+            .order_by(VehicleModelModel.average_price, VehicleModelModel.id)
+            .offset(rows - 1)
+            .limit(1)
+        )
+    return None if price is None else float(price) + 0.001
+
+
+async def measure(
+    client: httpx.AsyncClient, path: str, repeat: int
+) -> tuple[int, int, float, float]:
+    response = await client.get(path)
+    response.raise_for_status()
+    cpu, wall = [], []
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        response = await client.get(path)
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+        response.raise_for_status()
+    return (
+        len(response.json()),
+        len(response.content),
+        statistics.median(cpu),
+        statistics.median(wall),
+    )
+
+
+async def main(sizes: list[int], brand_id: int, repeat: int) -> None:
+    paths = []
+    for size in sizes:
+        lower = await price_bound(size)
+        if lower is None:
+            print(f"La base de datos tiene menos de {size} modelos con precio.")
+            continue
+        paths.append(f"/api/v1/models/?lower={lower}")
+    paths += [
+        "/api/v1/brands/",
+        f"/api/v1/brands/{brand_id}/models?limit=1000",
+        f"/api/v1/brands/{brand_id}/models",
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=300
+    ) as client:
+        print(f"{'ruta':<44} {'filas':>7} {'bytes':>10} {'cpu':>10} {'total':>10}")
+        for path in paths:
+            rows, size, cpu, wall = await measure(client, path, repeat)
+            print(
+                f"{path:<44} {rows:>7} {size:>10} "
+                f"{cpu * 1000:>8.1f}ms {wall * 1000:>8.1f}ms"
+            )
+    await database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--brand-id", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.brand_id, args.repeat))
@@ -0,0 +1,47 @@
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import set_read_scope
+from core.config import get_settings
+from core.constants import READ_PRIMARY_COOKIE
+from core.database import database, get_read_db
+from crud.catalog_version import CRUDCatalogVersion
+from shared.etag import etag_matches, make_etag
+
+
+async def catalog_etag(
+    request: Request,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+) -> None:
+    """
+    Agrega el ETag de la versión del catálogo a la respuesta. Si el cliente ya tiene
+    esa versión (If-None-Match) responde 304 sin ejecutar el endpoint.
+    """
+    # La versión se lee antes que los datos: si una escritura se confirma entre ambas
+    # lecturas, el cliente recibe datos nuevos con el ETag anterior y los vuelve a
+    # descargar en la siguiente petición, nunca al revés.
+    version = await CRUDCatalogVersion.get(db)
+    set_read_scope(version, primary=READ_PRIMARY_COOKIE in request.cookies)
+    etag = make_etag(version)
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    response.headers["ETag"] = etag
+
+
+def read_your_writes(response: Response) -> None:
+    """
+    Marca al cliente para que sus lecturas vayan al primario durante
+    REPLICA_READ_YOUR_WRITES_SECONDS, el tiempo que pueden tardar las réplicas en
+    recibir su escritura. Solo aplica si hay réplicas de lectura.
+    """
+    if database.replicas is not None:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            "1",
+            max_age=get_settings().REPLICA_READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
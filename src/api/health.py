@@ -1,21 +1,69 @@
+import typing as t
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from starlette.responses import Response
+from starlette.responses import PlainTextResponse, Response
 
-from core.database import get_db
+from core.cache import response_cache
+from core.database import database, get_db
+from core.metrics import route_metrics
+from core.price_index import price_index
 
 router = APIRouter(prefix="/health-check", tags=["Health"])
 
 
 @router.get("/", status_code=status.HTTP_204_NO_CONTENT)
-async def health(db: Session = Depends(get_db)) -> Response:
+async def health(db: AsyncSession = Depends(get_db)) -> Response:
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Error en la conexión a la base de datos: {e}",
         )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/cache")
+async def cache_stats() -> dict[str, t.Any]:
+    """
+    Estadísticas del cache de lecturas de este proceso: aciertos, fallos y peticiones
+    agrupadas con una carga en curso, por recurso.
+    """
+    return response_cache.stats()
+
+
+@router.get("/pool")
+async def pool_stats() -> dict[str, t.Any]:
+    """
+    Uso del pool de conexiones de este proceso: conexiones en uso y libres, espera
+    para obtener una conexión y conexiones abiertas, cerradas e invalidadas.
+    """
+    return database.pool_stats()
+
+
+@router.get("/replicas")
+async def replica_stats() -> dict[str, t.Any] | None:
+    """
+    Réplicas de lectura de este proceso: si están sanas, sesiones atendidas y errores
+    de conexión, y lecturas que fueron al primario. None si no hay réplicas.
+    """
+    return None if database.replicas is None else database.replicas.stats()
+
+
+@router.get("/price-index")
+async def price_index_stats() -> dict[str, t.Any]:
+    """Estado del índice de precios en memoria de este proceso."""
+    return price_index.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Métricas por ruta de este proceso en el formato de texto de Prometheus: latencia,
+    sentencias SQL y tiempo en la base de datos por petición.
+    """
+    return PlainTextResponse(
+        route_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,53 +1,159 @@
 import typing as t
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from api.dependencies import catalog_etag, read_your_writes
+from core.constants import MAX_BULK_MODELS, MAX_PAGE_SIZE
+from core.database import get_db, get_read_db
 from schemas.brand import (
     VehicleBrandSchema,
     VehicleBrandCreateSchema,
-    VehicleBrandWithAveragePriceSchema,
+    VehicleBrandInclude,
+    VehicleBrandWithModelsSchema,
 )
 from schemas.model import (
+    VehicleModelBulkResultSchema,
     VehicleModelSummarySchema,
     VehicleModelCreateSchema,
     VehicleModelSchema,
 )
 from services.brand_service import BrandService
+from shared.responses import json_response
 
 
 router = APIRouter(prefix="/brands", tags=["Brands"])
 
 
-@router.get("/", response_model=t.List[VehicleBrandWithAveragePriceSchema])
-async def get_brands(db: Session = Depends(get_db)):
-    """Obtiene una lista de todas las marcas de vehículos con el precio promedio de sus modelos."""
-    return BrandService.get_all_brands_with_average_price(db)
+@router.get(
+    "/",
+    response_model=t.List[VehicleBrandWithModelsSchema],
+    dependencies=[Depends(catalog_etag)],
+)
+async def get_brands(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    ids: str | None = Query(None, description="Ids de las marcas separados por comas"),
+    include: VehicleBrandInclude | None = Query(
+        None, description="Incluir los modelos de cada marca"
+    ),
+    fields: str | None = Query(
+        None,
+        description="Campos a devolver separados por comas (por defecto, todos)",
+    ),
+):
+    """
+    Obtiene una lista de todas las marcas de vehículos con el precio promedio de sus modelos.
+    Con `ids` se obtienen esas marcas en el orden pedido, incluidas las que no tienen
+    modelos con precio, y los ids que no existen se devuelven en el header
+    X-Missing-Ids. Con `fields` cada marca solo incluye esos campos.
+    Con `include=models` cada marca incluye sus modelos, cargados con una sola consulta.
+    """
+    if ids is None:
+        payload = await BrandService.get_all_brands_with_average_price(
+            db, fields, include
+        )
+    else:
+        payload = await BrandService.get_brands_by_ids(db, ids, fields, include)
+    return json_response(payload, response)
 
 
 @router.post(
-    "/", response_model=VehicleBrandSchema, status_code=status.HTTP_201_CREATED
+    "/",
+    response_model=VehicleBrandSchema,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(read_your_writes)],
 )
 async def create_brand(
-    brand_in: VehicleBrandCreateSchema, db: Session = Depends(get_db)
+    brand_in: VehicleBrandCreateSchema, db: AsyncSession = Depends(get_db)
 ):
     """Crea una nueva marca de vehículo."""
-    return BrandService.create_brand(db, brand_in=brand_in)
+    return await BrandService.create_brand(db, brand_in=brand_in)
 
 
-@router.get("/{brand_id}/models", response_model=t.List[VehicleModelSummarySchema])
-async def get_brand_models_by_id(brand_id: int, db: Session = Depends(get_db)):
-    """Obtiene todos los modelos de una marca específica."""
-    return BrandService.get_brand_models_by_id(db, brand_id)
+@router.post(
+    "/{brand_id}/archive",
+    response_model=VehicleBrandSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def archive_brand(brand_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Archiva una marca: deja de aparecer en los listados y no acepta modelos nuevos.
+    Sus modelos no se archivan.
+    """
+    return await BrandService.set_brand_active(db, brand_id, is_active=False)
+
+
+@router.post(
+    "/{brand_id}/unarchive",
+    response_model=VehicleBrandSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def unarchive_brand(brand_id: int, db: AsyncSession = Depends(get_db)):
+    """Restaura una marca archivada."""
+    return await BrandService.set_brand_active(db, brand_id, is_active=True)
+
+
+@router.get(
+    "/{brand_id}/models",
+    response_model=t.List[VehicleModelSummarySchema],
+    dependencies=[Depends(catalog_etag)],
+)
+async def get_brand_models_by_id(
+    brand_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    fields: str | None = Query(
+        None,
+        description="Campos a devolver separados por comas (por defecto, todos)",
+    ),
+    after: str | None = Query(
+        None, description="Cursor de la página anterior (header X-Next-Cursor)"
+    ),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Número máximo de modelos por página"
+    ),
+):
+    """
+    Obtiene todos los modelos de una marca específica ordenados por id.
+    Si se indica `limit` y hay más resultados, el cursor de la siguiente página se
+    devuelve en el header X-Next-Cursor. Con `fields` cada modelo solo incluye esos
+    campos.
+    """
+    payload = await BrandService.get_brand_models_by_id(
+        db, brand_id, fields=fields, after=after, limit=limit
+    )
+    return json_response(payload, response)
 
 
 @router.post(
     "/{brand_id}/models",
     response_model=VehicleModelSchema,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(read_your_writes)],
 )
 async def create_brand_model(
-    brand_id: int, model_in: VehicleModelCreateSchema, db: Session = Depends(get_db)
+    brand_id: int,
+    model_in: VehicleModelCreateSchema,
+    db: AsyncSession = Depends(get_db),
 ):
     """Crea un nuevo modelo para una marca específica."""
-    return BrandService.create_brand_model(db, brand_id, model_in)
+    return await BrandService.create_brand_model(db, brand_id, model_in)
+
+
+@router.post(
+    "/{brand_id}/models/bulk",
+    response_model=VehicleModelBulkResultSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def create_brand_models(
+    brand_id: int,
+    models_in: t.List[VehicleModelCreateSchema] = Body(
+        ..., min_length=1, max_length=MAX_BULK_MODELS
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Crea hasta MAX_BULK_MODELS modelos para una marca en una sola petición.
+    Devuelve, en el orden recibido, si cada modelo se creó o ya existía.
+    """
+    return await BrandService.create_brand_models(db, brand_id, models_in)
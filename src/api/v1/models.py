@@ -1,35 +1,163 @@
-from typing import List
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from typing import AsyncContextManager, AsyncIterator, Callable, List
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from api.dependencies import catalog_etag, read_your_writes
+from core.constants import MAX_BULK_MODELS, MAX_PAGE_SIZE
+from core.database import get_db, get_read_db, get_read_session_factory
 from schemas.model import (
+    VehicleModelBulkPriceResultSchema,
+    VehicleModelPriceUpdateSchema,
     VehicleModelSchema,
     VehicleModelUpdateSchema,
 )
 from services.model_service import ModelService
+from shared.export import ExportFormat
+from shared.responses import json_response
 
 
 router = APIRouter(prefix="/models", tags=["Models"])
 
 
-@router.get("/", response_model=List[VehicleModelSchema])
+@router.get(
+    "/", response_model=List[VehicleModelSchema], dependencies=[Depends(catalog_etag)]
+)
 async def get_models(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    ids: str | None = Query(
+        None,
+        description="Ids separados por comas; no se combina con filtros ni paginación",
+    ),
+    fields: str | None = Query(
+        None,
+        description="Campos a devolver separados por comas (por defecto, todos)",
+    ),
     greater: float | None = Query(
         None, description="Filtrar modelos con precio promedio mayor a este valor"
     ),
     lower: float | None = Query(
         None, description="Filtrar modelos con precio promedio menor a este valor"
     ),
+    after: str | None = Query(
+        None, description="Cursor de la página anterior (header X-Next-Cursor)"
+    ),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Número máximo de modelos por página"
+    ),
 ):
-    """Obtiene una lista de todos los modelos, con filtros opcionales por precio."""
-    return ModelService.get_all_models_filtered(db, greater=greater, lower=lower)
+    """
+    Obtiene una lista de todos los modelos, con filtros opcionales por precio.
+    Los modelos se ordenan por precio promedio e id; si se indica `limit` y hay más
+    resultados, el cursor de la siguiente página se devuelve en el header X-Next-Cursor.
+    Con `ids` se obtienen esos modelos en el orden pedido y los ids que no existen se
+    devuelven en el header X-Missing-Ids. Con `fields` cada modelo solo incluye esos
+    campos.
+    """
+    if ids is None:
+        payload = await ModelService.get_all_models_filtered(
+            db, fields=fields, greater=greater, lower=lower, after=after, limit=limit
+        )
+    elif greater is None and lower is None and after is None and limit is None:
+        payload = await ModelService.get_models_by_ids(db, ids, fields=fields)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El parámetro 'ids' no se puede combinar con filtros ni paginación.",
+        )
+    return json_response(payload, response)
 
 
-@router.put("/{model_id}", response_model=VehicleModelSchema)
+@router.get("/export", response_class=StreamingResponse)
+async def export_models(
+    read_session: Callable[[], AsyncContextManager[AsyncSession]] = Depends(
+        get_read_session_factory
+    ),
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON, alias="format", description="Formato de exportación"
+    ),
+    greater: float | None = Query(
+        None, description="Filtrar modelos con precio promedio mayor a este valor"
+    ),
+    lower: float | None = Query(
+        None, description="Filtrar modelos con precio promedio menor a este valor"
+    ),
+):
+    """
+    Exporta el catálogo completo de modelos en NDJSON o CSV.
+    La respuesta se transmite por bloques conforme se leen de la base de datos.
+    """
+
+    async def content() -> AsyncIterator[bytes]:
+        # La sesión vive mientras dura la transmisión, no solo durante la petición.
+        async with read_session() as db:
+            async for chunk in ModelService.export_models(
+                db, export_format, greater=greater, lower=lower
+            ):
+                yield chunk
+
+    return StreamingResponse(content(), media_type=export_format.media_type)
+
+
+@router.put(
+    "/bulk",
+    response_model=VehicleModelBulkPriceResultSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def edit_model_prices(
+    prices_in: List[VehicleModelPriceUpdateSchema] = Body(
+        ..., min_length=1, max_length=MAX_BULK_MODELS
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Actualiza el precio de hasta MAX_BULK_MODELS modelos en una sola transacción.
+    Devuelve cuántos modelos se actualizaron y los ids que no existen.
+    """
+    return await ModelService.update_model_prices(db, prices_in)
+
+
+@router.put(
+    "/{model_id}",
+    response_model=VehicleModelSchema,
+    dependencies=[Depends(read_your_writes)],
+)
 async def edit_model_price(
-    model_id: int, model_schema: VehicleModelUpdateSchema, db: Session = Depends(get_db)
+    model_id: int,
+    model_schema: VehicleModelUpdateSchema,
+    db: AsyncSession = Depends(get_db),
 ):
     """Actualiza el precio de un modelo específico."""
-    return ModelService.update_model_price(db, model_id, model_schema)
+    return await ModelService.update_model_price(db, model_id, model_schema)
+
+
+@router.post(
+    "/{model_id}/archive",
+    response_model=VehicleModelSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def archive_model(model_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Archiva un modelo: deja de aparecer en los listados y en el precio promedio de su
+    marca.
+    """
+    return await ModelService.set_model_active(db, model_id, is_active=False)
+
+
+@router.post(
+    "/{model_id}/unarchive",
+    response_model=VehicleModelSchema,
+    dependencies=[Depends(read_your_writes)],
+)
+async def unarchive_model(model_id: int, db: AsyncSession = Depends(get_db)):
+    """Restaura un modelo archivado."""
+    return await ModelService.set_model_active(db, model_id, is_active=True)
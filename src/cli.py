@@ -0,0 +1,87 @@
+"""
+Comandos de mantenimiento de la base de datos.
+
+Uso:
+    python cli.py migrate               Crea el esquema y las tablas y aplica las migraciones.
+    python cli.py seed                  Pobla las tablas y calcula los agregados de precio.
+    python cli.py brand-stats verify    Reporta las marcas cuyo agregado de precios no coincide.
+    python cli.py brand-stats rebuild   Recalcula los agregados de precio de todas las marcas.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from loguru import logger
+
+from core.database import database
+from core.lifespan import migrate_db, populate_db
+from crud.brand_price_stats import CRUDBrandPriceStats
+
+
+async def migrate() -> int:
+    await migrate_db()
+    return 0
+
+
+async def seed() -> int:
+    await populate_db()
+    return 0
+
+
+async def brand_stats(action: str) -> int:
+    async with database.SessionLocal() as db:
+        if action == "rebuild":
+            count = await CRUDBrandPriceStats.rebuild(db)
+            logger.success(f"Se recalcularon los agregados de {count} marcas.")
+            return 0
+
+        drift = await CRUDBrandPriceStats.verify(db)
+        for row in drift:
+            logger.warning(
+                f"Marca {row.brand_id}: suma={row.price_sum} conteo={row.priced_count}, "
+                f"esperado suma={row.expected_sum} conteo={row.expected_count}"
+            )
+        if drift:
+            logger.error(
+                f"{len(drift)} marcas con agregados desfasados. "
+                "Ejecuta `python cli.py brand-stats rebuild`."
+            )
+            return 1
+        logger.success("Los agregados de precio por marca están al día.")
+        return 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        return await args.handler(args)
+    finally:
+        await database.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser(
+        "migrate", help="Crea el esquema y las tablas y aplica las migraciones."
+    )
+    migrate_parser.set_defaults(handler=lambda args: migrate())
+
+    seed_parser = commands.add_parser(
+        "seed", help="Pobla las tablas y calcula los agregados de precio."
+    )
+    seed_parser.set_defaults(handler=lambda args: seed())
+
+    stats_parser = commands.add_parser(
+        "brand-stats", help="Verifica o recalcula los agregados de precio por marca."
+    )
+    stats_parser.add_argument("action", choices=["verify", "rebuild"])
+    stats_parser.set_defaults(handler=lambda args: brand_stats(args.action))
+
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Mapping
+
+import orjson
+
+from loguru import logger
+
+from core.config import get_settings
+from core.single_flight import SingleFlight
+from shared.responses import JSONBody, dumps
+
+
+class CacheBackend(ABC):
+    """
+    Almacenamiento de entradas del cache. Los valores son bytes para que puedan
+    compartirse entre procesos; cada namespace tiene una generación que se incrementa
+    al invalidarlo, de forma que las entradas anteriores dejan de ser alcanzables.
+    """
+
+    name: str
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    def generation(self, namespace: str) -> int: ...
+
+    @abstractmethod
+    def invalidate(self, namespace: str) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+
+class NullCacheBackend(CacheBackend):
+    """Backend que no guarda nada; desactiva el cache."""
+
+    name = "none"
+
+    def get(self, key: str) -> bytes | None:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        return None
+
+    def generation(self, namespace: str) -> int:
+        return 0
+
+    def invalidate(self, namespace: str) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Cache LRU con TTL en la memoria del proceso."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache LRU con TTL en un archivo SQLite compartido por los workers del mismo host.
+    Por defecto vive en /dev/shm, así que las lecturas y escrituras no tocan disco.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connection().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS generations (
+                namespace TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        # Una conexión heredada con fork (workers de gunicorn) no se debe reutilizar.
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "UPDATE entries SET accessed_at = ? WHERE key = ? AND expires_at > ? "
+            "RETURNING value",
+            (now, key, now),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now),
+        )
+        connection.execute(
+            "DELETE FROM entries WHERE expires_at <= ? OR key IN ("
+            "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (now, self.max_entries),
+        )
+
+    def generation(self, namespace: str) -> int:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT generation FROM generations WHERE namespace = ?", (namespace,)
+            )
+            .fetchone()
+        )
+        return 0 if row is None else row[0]
+
+    def invalidate(self, namespace: str) -> None:
+        self._connection().execute(
+            "INSERT INTO generations (namespace, generation) VALUES (?, 1) "
+            "ON CONFLICT (namespace) DO UPDATE SET generation = generation + 1",
+            (namespace,),
+        )
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM entries").fetchone()[0]
+
+
+# Versión del catálogo que leyó la petición en curso y si lee del primario (ver
+# api.dependencies.catalog_etag).
+_read_scope: ContextVar[tuple[int, bool] | None] = ContextVar(
+    "read_scope", default=None
+)
+
+
+def set_read_scope(version: int, primary: bool = False) -> None:
+    """
+    Registra la versión del catálogo leída por la petición en curso, antes de leer los
+    datos, para que las entradas del cache que carga o consulta queden ligadas a ella.
+    Las peticiones con `primary` (read-your-writes) usan sus propias entradas, que no
+    pueden venir de una réplica atrasada.
+    """
+    _read_scope.set((version, primary))
+
+
+class ResponseCache:
+    """
+    Cache de lectura (read-through) para los resultados de los servicios.
+    Las llaves se forman con el namespace, su generación, la versión del catálogo que
+    leyó la petición, si lee del primario y los parámetros de la consulta.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttl: float | None = None,
+        coalesce: bool | None = None,
+    ):
+        """
+        Los valores que se omiten se leen de la configuración la primera vez que se
+        usan, no al importar este módulo.
+        """
+        if backend is not None:
+            self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+        if coalesce is not None:
+            self.coalesce = coalesce
+        self.single_flight: SingleFlight[JSONBody] = SingleFlight()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+
+    @cached_property
+    def backend(self) -> CacheBackend:
+        return build_backend(get_settings().CACHE_BACKEND)
+
+    @cached_property
+    def ttl(self) -> float:
+        return get_settings().CACHE_TTL_SECONDS
+
+    @cached_property
+    def coalesce(self) -> bool:
+        return get_settings().COALESCE_READS
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, NullCacheBackend)
+
+    async def get_or_load_json(
+        self,
+        namespace: str,
+        params: dict[str, Any],
+        loader: Callable[[], Awaitable[tuple[Any, Mapping[str, str]]]],
+    ) -> JSONBody:
+        """
+        Devuelve el JSON cacheado para (namespace, params) o lo carga con `loader`, que
+        devuelve el contenido y sus headers (p. ej. el cursor de la siguiente página).
+        Las entradas se guardan y se devuelven ya serializadas, sin validarlas.
+        Las cargas concurrentes con la misma llave se agrupan en una sola, aunque el
+        cache esté desactivado. Si el backend falla (p. ej. el archivo de SQLite está
+        bloqueado o dañado), la petición se trata como un fallo del cache y se carga
+        con `loader`.
+        """
+        family = namespace.split(":", 1)[0]
+        try:
+            generation = self.backend.generation(namespace)
+        except sqlite3.Error as e:
+            self._backend_error(family, e)
+            content, loaded_headers = await loader()
+            return JSONBody(dumps(content), loaded_headers)
+        # Con la versión del catálogo en la llave, una escritura confirmada en cualquier
+        # proceso deja fuera las entradas anteriores, aunque la invalidación solo llegue
+        # al proceso que la hizo o se ejecute después de que otra petición ya leyó la
+        # versión nueva y recargó los datos viejos en la llave anterior.
+        # Por la misma razón, quien lee del primario tampoco comparte llave (ni carga
+        # agrupada) con quien puede leer de una réplica.
+        scope = _read_scope.get()
+        version, primary = scope if scope is not None else (None, False)
+        params_key = json.dumps(params, sort_keys=True, default=str)
+        key = f"{namespace}:{generation}:{version}:{params_key}"
+        if primary:
+            key = f"{key}:primary"
+
+        try:
+            cached = self.backend.get(key)
+        except sqlite3.Error as e:
+            self._backend_error(family, e)
+            cached = None
+        if cached is not None:
+            self.hits[family] += 1
+            # La salida de orjson no tiene saltos de línea: el primero separa los headers.
+            headers, _, body = cached.partition(b"\n")
+            return JSONBody(body, orjson.loads(headers))
+
+        async def load() -> JSONBody:
+            content, headers = await loader()
+            value = JSONBody(dumps(content), headers)
+            if self.enabled:
+                self.misses[family] += 1
+                # Si el namespace se invalidó durante la carga, la llave ya usa la
+                # generación anterior y la entrada nunca se volverá a leer.
+                try:
+                    self.backend.set(key, dumps(headers) + b"\n" + value.body, self.ttl)
+                except sqlite3.Error as e:
+                    self._backend_error(family, e)
+            return value
+
+        if not self.coalesce:
+            return await load()
+        return await self.single_flight.run(key, family, load)
+
+    def invalidate(self, *namespaces: str) -> None:
+        # Las escrituras ya se confirmaron y la versión del catálogo en las llaves deja
+        # fuera las entradas anteriores, así que un error aquí solo se registra.
+        for namespace in namespaces:
+            try:
+                self.backend.invalidate(namespace)
+            except sqlite3.Error as e:
+                self._backend_error(namespace.split(":", 1)[0], e)
+
+    def _backend_error(self, family: str, error: sqlite3.Error) -> None:
+        self.errors[family] += 1
+        logger.warning(
+            f"Error del backend de cache '{self.backend.name}' en {family}; "
+            f"se omite el cache: {error}"
+        )
+
+    def stats(self) -> dict[str, Any]:
+        try:
+            entries: int | None = len(self.backend)
+        except sqlite3.Error:
+            entries = None
+        return {
+            "backend": self.backend.name,
+            "entries": entries,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "errors": dict(self.errors),
+            "coalesced": dict(self.single_flight.coalesced),
+            "in_flight": len(self.single_flight),
+        }
+
+
+def build_backend(backend: str) -> CacheBackend:
+    settings = get_settings()
+    backend = backend.lower()
+    if backend == "sqlite":
+        return SQLiteCacheBackend(
+            settings.CACHE_SQLITE_PATH, settings.CACHE_MAX_ENTRIES
+        )
+    if backend == "memory":
+        return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    if backend != "none":
+        logger.warning(
+            f"Backend de cache '{backend}' desconocido, se desactiva el cache."
+        )
+    return NullCacheBackend()
+
+
+response_cache = ResponseCache()
@@ -1,26 +1,111 @@
 import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 from dotenv import load_dotenv
-from pydantic import PostgresDsn, BaseModel
+from pydantic import Field, PostgresDsn, BaseModel, field_validator
 
-load_dotenv()
+_BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 class Settings(BaseModel):
-    BASE_DIR: Path = Path(__file__).resolve().parent.parent
-    ENVIRONMENT: str = os.getenv(
-        "ENVIRONMENT", "local"
-    )  # LOCAL, DEVELOPMENT, STAGING, PRODUCTION
-    PROJECT_NAME: str = os.getenv("PROJECT_NAME", "NEXU Challenge")
+    """
+    Configuración de la aplicación. Cada campo se puede definir con la variable de
+    entorno del mismo nombre; las URIs de la base de datos dependen de ENVIRONMENT
+    (p. ej. LOCAL_POSTGRES_URI). Ver `from_env`.
+    """
 
-    POSTGRES_URI: PostgresDsn = PostgresDsn(
-        os.getenv(
-            f"{ENVIRONMENT}_POSTGRES_URI", "postgresql://user:password@db:5432/db"
-        )
-    )
+    BASE_DIR: Path = _BASE_DIR
+    ENVIRONMENT: str = "local"  # LOCAL, DEVELOPMENT, STAGING, PRODUCTION
+    PROJECT_NAME: str = "NEXU Challenge"
 
-    TIME_ZONE: str = os.getenv("TIME_ZONE", "America/Mexico_City")
-    VERSION: str = os.getenv("VERSION", "1.0.0")
+    # <ENVIRONMENT>_POSTGRES_URI
+    POSTGRES_URI: PostgresDsn = PostgresDsn("postgresql://user:password@db:5432/db")
 
+    # <ENVIRONMENT>_POSTGRES_REPLICA_URIS, separadas por comas; las lecturas van al
+    # primario si no hay.
+    REPLICA_URIS: list[PostgresDsn] = []
+    REPLICA_SELECTION: str = "round_robin"  # ROUND_ROBIN, LEAST_BUSY
+    # Tiempo que se descarta una réplica después de un error de conexión.
+    REPLICA_RETRY_SECONDS: float = 30
+    # Tiempo que un cliente lee del primario después de escribir.
+    REPLICA_READ_YOUR_WRITES_SECONDS: int = 10
 
-settings = Settings()
+    # Por proceso: con varios workers el máximo de conexiones es
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW), que debe caber en max_connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # -1: nunca
+    DB_POOL_PRE_PING: bool = True
+    # LIFO reutiliza las conexiones más recientes y deja que las demás expiren.
+    DB_POOL_USE_LIFO: bool = False
+
+    # Negativo para desactivar el log de consultas lentas.
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0
+    SLOW_QUERY_LOG_FILE: Path | None = None
+
+    # Esquema, semillas y agregados al iniciar cada proceso si la base de datos no está
+    # al día. gunicorn.conf.py lo desactiva en los workers porque ya se ejecutó en el
+    # proceso principal; también se puede desactivar si se usa `cli.py migrate`/`seed`.
+    DB_INIT_ON_STARTUP: bool = True
+
+    BIND: str = "0.0.0.0:8000"
+    WEB_CONCURRENCY: int = Field(default_factory=lambda: os.cpu_count() or 1)
+
+    SEED_FILE: Path = _BASE_DIR / "seeds" / "models.json"
+
+    TIME_ZONE: str = "America/Mexico_City"
+    VERSION: str = "1.0.0"
+
+    CACHE_BACKEND: str = "memory"  # MEMORY, SQLITE, NONE
+    CACHE_TTL_SECONDS: float = 60
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_SQLITE_PATH: Path = Path("/dev/shm/nexu-cache.sqlite3")
+
+    COALESCE_READS: bool = True
+
+    METRICS_ENABLED: bool = True
+
+    PRICE_INDEX_ENABLED: bool = False
+
+    @field_validator("REPLICA_SELECTION", "CACHE_BACKEND")
+    @classmethod
+    def _lower(cls, value: str) -> str:
+        return value.lower()
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Lee la configuración de las variables de entorno, completadas con el archivo
+        .env. Las variables vacías se ignoran.
+        """
+        load_dotenv()
+        values: dict[str, Any] = {
+            name: os.environ[name] for name in cls.model_fields if os.getenv(name)
+        }
+        environment = values.get("ENVIRONMENT", "local")
+        if uri := os.getenv(f"{environment}_POSTGRES_URI"):
+            values["POSTGRES_URI"] = uri
+        values["REPLICA_URIS"] = [
+            uri.strip()
+            for uri in os.getenv(f"{environment}_POSTGRES_REPLICA_URIS", "").split(",")
+            if uri.strip()
+        ]
+        return cls(**values)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Configuración del proceso; se lee la primera vez que se usa."""
+    return Settings.from_env()
+
+
+def __getattr__(name: str) -> Any:
+    # `from core.config import settings` lee el entorno al importarse; solo se usa en
+    # gunicorn.conf.py. Los módulos de la aplicación llaman a get_settings() donde
+    # usan cada valor, para que importarlos no lea el entorno ni el archivo .env.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,17 @@
-from decimal import Decimal
-
-
-MIN_AVERAGE_PRICE = Decimal("100000")
+from decimal import Decimal
+
+
+# Versión de la última migración (ver migrations/); el arranque aplica las migraciones
+# si la base de datos tiene una versión anterior.
+SCHEMA_VERSION = 3
+
+MIN_AVERAGE_PRICE = Decimal("100000")
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MISSING_IDS_HEADER = "X-Missing-Ids"
+READ_PRIMARY_COOKIE = "read_primary"
+EXPORT_CHUNK_SIZE = 1000
+MAX_BULK_MODELS = 10_000
+BULK_INSERT_BATCH_SIZE = 1000
+SEED_CHUNK_SIZE = 10_000
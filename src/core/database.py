@@ -1,46 +1,211 @@
-from typing import Generator
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+import asyncio
+from contextlib import asynccontextmanager
+from functools import cached_property
+from typing import Any, AsyncContextManager, AsyncGenerator, AsyncIterator, Callable
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import declarative_base
 from loguru import logger
+from starlette.requests import Request
 
-from core.config import settings
+from core.config import get_settings
+from core.constants import READ_PRIMARY_COOKIE
+from core.metrics import instrument_engine
+from core.pool import InstrumentedAsyncPool
+from core.replicas import Replica, ReplicaSet
+from core.slow_query import SlowQueryLog
+
+
+Base = declarative_base()
 
 
 class Database:
-    def __init__(self, db_url: str):
+    def __init__(
+        self, db_url: str | None = None, replica_urls: list[str] | None = None
+    ):
         """
-        Inicializa la conexión a la base de datos.
+        Base de datos de la aplicación. Los engines se crean la primera vez que se usan,
+        no al importar este módulo.
         Args:
-            db_url (str): La URL de conexión a la base de datos.
+            db_url (str | None): La URL de conexión a la base de datos. Por defecto,
+                settings.POSTGRES_URI.
+            replica_urls (list[str] | None): URLs de las réplicas de lectura, si las hay.
+                Por defecto, settings.REPLICA_URIS.
         """
+        self._db_url = db_url
+        self._replica_urls = replica_urls
+
+    @cached_property
+    def engine(self) -> AsyncEngine:
         logger.info("Inicializando la conexión a la base de datos...")
         try:
-            self.engine: Engine = create_engine(db_url, pool_pre_ping=True)
-
-            self.SessionLocal = sessionmaker(
-                autocommit=False, autoflush=False, bind=self.engine
-            )
-
-            self.Base = declarative_base()
-            logger.success(
-                "Instancia de Database creada y motor inicializado correctamente."
-            )
+            settings = get_settings()
+            engine = self.create_engine(self._db_url or str(settings.POSTGRES_URI))
         except Exception as e:
             logger.critical(f"Error al inicializar la instancia de Database: {e}")
             raise
+        logger.success("Motor de la base de datos inicializado correctamente.")
+        return engine
 
-    def get_db(self) -> Generator[Session, None, None]:
-        db = self.SessionLocal()
-        logger.trace("Abriendo sesión de base de datos.")
-        try:
+    @cached_property
+    def replicas(self) -> ReplicaSet | None:
+        settings = get_settings()
+        replica_urls = self._replica_urls
+        if replica_urls is None:
+            replica_urls = [str(url) for url in settings.REPLICA_URIS]
+        if not replica_urls:
+            return None
+
+        replicas = ReplicaSet(
+            [
+                Replica(
+                    make_url(url).render_as_string(hide_password=True),
+                    self.create_engine(url),
+                )
+                for url in replica_urls
+            ],
+            settings.REPLICA_SELECTION,
+            settings.REPLICA_RETRY_SECONDS,
+        )
+        logger.info(f"Réplicas de lectura configuradas: {len(replicas)}.")
+        return replicas
+
+    @cached_property
+    def SessionLocal(self) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=self.engine, autoflush=False, expire_on_commit=False
+        )
+
+    @staticmethod
+    def create_engine(db_url: str) -> AsyncEngine:
+        """
+        Crea un engine asíncrono con la configuración del pool, el log de consultas
+        lentas y las métricas por petición.
+        """
+        settings = get_settings()
+        engine = create_async_engine(
+            Database.to_async_url(db_url),
+            poolclass=InstrumentedAsyncPool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        )
+        if settings.SLOW_QUERY_THRESHOLD_MS >= 0:
+            SlowQueryLog(
+                settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+                settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            ).instrument(engine)
+            if settings.SLOW_QUERY_LOG_FILE is not None:
+                SlowQueryLog.add_json_sink(settings.SLOW_QUERY_LOG_FILE)
+        if settings.METRICS_ENABLED:
+            instrument_engine(engine)
+        return engine
+
+    @staticmethod
+    def to_async_url(db_url: str) -> str:
+        """
+        Convierte una URL `postgresql://` en su equivalente con el driver asíncrono asyncpg.
+        """
+        url = make_url(db_url).set(drivername="postgresql+asyncpg")
+        return url.render_as_string(hide_password=False)
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        """Engines ya creados: el del primario seguido de los de las réplicas."""
+        engines = [self.__dict__["engine"]] if "engine" in self.__dict__ else []
+        replicas = self.__dict__.get("replicas")
+        if replicas is not None:
+            engines.extend(replica.engine for replica in replicas.replicas)
+        return engines
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Configuración y uso del pool de conexiones de este proceso."""
+        pool = self.engine.sync_engine.pool
+        assert isinstance(pool, InstrumentedAsyncPool)
+        return pool.stats()
+
+    async def get_db(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.SessionLocal() as db:
+            logger.trace("Abriendo sesión de base de datos.")
+            try:
+                yield db
+            finally:
+                logger.trace("Sesión de la base de datos cerrada.")
+
+    @asynccontextmanager
+    async def read_session(self, primary: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        Sesión para lecturas: en una réplica sana si las hay, o en el primario si se
+        pide `primary`, no hay réplicas o ninguna responde. La conexión se obtiene al
+        abrir la sesión para poder pasar a la siguiente réplica si falla.
+        """
+        if self.replicas is None:
+            async with self.SessionLocal() as db:
+                yield db
+            return
+
+        if primary:
+            self.replicas.read_your_writes += 1
+        else:
+            for replica in self.replicas.candidates():
+                db = self.SessionLocal(bind=replica.engine)
+                try:
+                    await db.connection()
+                except (OSError, asyncio.TimeoutError, exc.DBAPIError) as e:
+                    await db.close()
+                    self.replicas.mark_unhealthy(replica, e)
+                    continue
+                replica.sessions += 1
+                async with db:
+                    yield db
+                return
+            self.replicas.primary_fallbacks += 1
+
+        async with self.SessionLocal() as db:
             yield db
-        finally:
-            db.close()
-            logger.trace("Sesión de la base de datos cerrada.")
+
+    async def get_read_db(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Dependencia para los endpoints de solo lectura. Después de una escritura el
+        cliente lee del primario mientras tenga la cookie READ_PRIMARY_COOKIE, para
+        ver sus propios cambios aunque las réplicas vayan atrasadas.
+        """
+        primary = READ_PRIMARY_COOKIE in request.cookies
+        async with self.read_session(primary=primary) as db:
+            logger.trace("Abriendo sesión de lectura.")
+            try:
+                yield db
+            finally:
+                logger.trace("Sesión de lectura cerrada.")
+
+    def get_read_session_factory(
+        self, request: Request
+    ) -> Callable[[], AsyncContextManager[AsyncSession]]:
+        """
+        Dependencia para los endpoints que transmiten la respuesta: devuelve una función
+        que abre la sesión de lectura, con la misma elección de réplica o primario que
+        get_read_db, para que la sesión dure lo que dura la transmisión y no solo la
+        petición.
+        """
+        primary = READ_PRIMARY_COOKIE in request.cookies
+        return lambda: self.read_session(primary=primary)
 
 
-database = Database(str(settings.POSTGRES_URI))
+database = Database()
 
 get_db = database.get_db
-Base = database.Base
+get_read_db = database.get_read_db
+get_read_session_factory = database.get_read_session_factory
@@ -1,40 +1,64 @@
-import json
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import asyncio
+import time
+import typing as t
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
 from loguru import logger
-from sqlalchemy import text
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
 
-from core.config import settings
-from core.constants import MIN_AVERAGE_PRICE
-from core.database import database
+if t.TYPE_CHECKING:
+    # Solo para las anotaciones: cli.py usa este módulo sin cargar FastAPI.
+    from fastapi import FastAPI
+
+from core.config import get_settings
+from core.constants import MIN_AVERAGE_PRICE, SCHEMA_VERSION, SEED_CHUNK_SIZE
+from core.database import Base, database
+from core.price_index import price_index
 from crud.brand import CRUDBrand
+from crud.brand_price_stats import CRUDBrandPriceStats
 from crud.model import CRUDModel
+from crud.schema_version import CRUDSchemaVersion
+from migrations import BASELINE_VERSION, pending_migrations
 from models.brand import VehicleBrandModel
+from models.brand_price_stats import VehicleBrandPriceStatsModel
+from models.catalog_version import VehicleCatalogVersionModel
 from models.model import VehicleModelModel
+from models.schema_version import VehicleSchemaVersionModel
 from schemas.brand import VehicleBrandCreateSchema
 from schemas.model import VehicleModelCreateMigrationSchema
+from shared.json_stream import iter_json_array
 
 
-def init_db() -> None:
+async def init_db() -> None:
     """
-    Crear esquemas y tablas si no existen.
+    Crear esquemas y tablas si no existen. Las tablas nuevas ya tienen el esquema de
+    los modelos, pero se registran con BASELINE_VERSION y `apply_migrations` aplica
+    después las migraciones, que no hacen nada si sus cambios ya existen.
     """
     logger.info("Iniciando el proceso de inicialización de la base de datos...")
 
     # Necesario para registrar los modelos en los metadatos de SQLAlchemy.
     _ = VehicleBrandModel
     _ = VehicleModelModel
+    _ = VehicleBrandPriceStatsModel
+    _ = VehicleCatalogVersionModel
+    _ = VehicleSchemaVersionModel
 
     try:
-        with database.engine.connect() as connection:
+        async with database.engine.begin() as connection:
             logger.info("Creando el esquema 'vehicle' si no existe...")
-            connection.execute(text("CREATE SCHEMA IF NOT EXISTS vehicle"))
-            connection.commit()
+            await connection.execute(text("CREATE SCHEMA IF NOT EXISTS vehicle"))
             logger.success("Esquema 'vehicle' verificado/creado correctamente.")
 
-        logger.info("Creando las tablas de los modelos si no existen...")
-        database.Base.metadata.create_all(bind=database.engine)
-        logger.success("Tablas verificadas/creadas correctamente.")
+            logger.info("Creando las tablas de los modelos si no existen...")
+            await connection.run_sync(Base.metadata.create_all)
+            logger.success("Tablas verificadas/creadas correctamente.")
+
+            await connection.execute(
+                insert(VehicleCatalogVersionModel).values(id=1).on_conflict_do_nothing()
+            )
+            await CRUDSchemaVersion.set_version(connection, BASELINE_VERSION)
 
     except Exception as e:
         logger.error(
@@ -43,82 +67,216 @@ def init_db() -> None:
         raise
 
 
-def seed_db() -> None:
+# Llave del candado consultivo que serializa las migraciones entre procesos.
+_MIGRATIONS_LOCK = "vehicle.migrations"
+
+
+async def apply_migrations() -> None:
+    """
+    Aplica en orden las migraciones posteriores a la versión registrada y registra cada
+    una al terminarla. Un candado consultivo evita que dos procesos (p. ej. dos
+    despliegues) las apliquen a la vez; el que espera lo hace sin una transacción
+    abierta, que detendría a CREATE INDEX CONCURRENTLY del otro proceso.
+    """
+    async with database.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        lock = {"key": _MIGRATIONS_LOCK}
+        while not await connection.scalar(
+            text("SELECT pg_try_advisory_lock(hashtext(:key))"), lock
+        ):
+            logger.info("Otro proceso está aplicando las migraciones; esperando...")
+            await asyncio.sleep(1)
+        try:
+            version = await CRUDSchemaVersion.get_version(connection)
+            for migration in pending_migrations(version or BASELINE_VERSION):
+                logger.info(
+                    f"Aplicando la migración {migration.VERSION}: "
+                    f"{migration.DESCRIPTION}..."
+                )
+                await migration.upgrade(connection)
+                await CRUDSchemaVersion.set_version(connection, migration.VERSION)
+                logger.success(f"Migración {migration.VERSION} aplicada.")
+        finally:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:key))"), lock
+            )
+
+
+@contextmanager
+def _phase(name: str) -> t.Iterator[None]:
+    """Registra en el log la duración de una fase del arranque."""
+    started = time.perf_counter()
+    yield
+    logger.info(f"Fase '{name}' completada en {time.perf_counter() - started:.2f} s.")
+
+
+def _iter_seed_models(models_file: Path) -> t.Iterator[dict[str, t.Any]]:
+    with open(models_file, "r") as f:
+        yield from iter_json_array(f)
+
+
+async def seed_db() -> None:
     """
     Poblar las tablas con datos de prueba.
+    El archivo de semillas se lee de forma incremental en dos pasadas: la primera
+    inserta todas las marcas en una sola sentencia y la segunda inserta los modelos
+    en bloques de SEED_CHUNK_SIZE.
     """
     logger.info("Poblando las tablas con datos de prueba...")
-    db = database.SessionLocal()
-
-    try:
+    async with database.SessionLocal() as db:
         brand_crud = CRUDBrand(VehicleBrandModel)
         model_crud = CRUDModel(VehicleModelModel)
 
-        if db.query(VehicleBrandModel).first() is not None:
+        if await db.scalar(select(VehicleBrandModel.id).limit(1)) is not None:
             logger.info("La base de datos ya ha sido poblada. Saltando el sembrado.")
             return
 
-        models_file = settings.BASE_DIR / "seeds" / "models.json"
+        models_file = get_settings().SEED_FILE
         if not models_file.exists():
             logger.warning(f"El archivo de semillas no se encontró en {models_file}")
             return
 
-        with open(models_file, "r") as f:
-            models_data = json.load(f)
-
-        new_brands = set()
-        new_models = []
-        for model_item in models_data:
-            brand_name = model_item["brand_name"]
-            average_price = (
-                None
-                if model_item["average_price"] == 0
-                else model_item["average_price"]
+        started = time.perf_counter()
+        with _phase("marcas"):
+            brand_names = dict.fromkeys(
+                model_item["brand_name"]
+                for model_item in _iter_seed_models(models_file)
             )
-            model_name = model_item["name"]
-
-            vehicle_brand_create_schema = VehicleBrandCreateSchema(
-                name=brand_name,
+            brand_ids = await brand_crud.bulk_insert(
+                db,
+                brands_data=[
+                    VehicleBrandCreateSchema(name=name) for name in brand_names
+                ],
             )
 
-            if vehicle_brand_create_schema not in new_brands:
-                brand = brand_crud.create(db, brand=vehicle_brand_create_schema)
-                new_brands.add(vehicle_brand_create_schema)
-            else:
-                brand = brand_crud.get_by_name(db, name=brand_name)
-                if not brand:
-                    logger.warning(
-                        f"La marca '{brand_name}' no se encuentra en la base de datos, no se puede agregar el modelo."
-                    )
-                    continue
-
-            if average_price is not None and average_price < MIN_AVERAGE_PRICE:
-                logger.info(
-                    f"El modelo {model_name} tiene un precio promedio de {average_price}, debido al caso de uso de el average > {MIN_AVERAGE_PRICE}, este se ignora."
+        inserted, skipped = 0, 0
+        with _phase("modelos"):
+            new_models: list[VehicleModelCreateMigrationSchema] = []
+            for model_item in _iter_seed_models(models_file):
+                average_price = (
+                    None
+                    if model_item["average_price"] == 0
+                    else model_item["average_price"]
                 )
-                continue
-            new_models.append(
-                VehicleModelCreateMigrationSchema(
-                    brand_id=brand.id, name=model_name, average_price=average_price
+                model_name = model_item["name"]
+
+                # Por el caso de uso de average > MIN_AVERAGE_PRICE estos modelos se ignoran.
+                if average_price is not None and average_price < MIN_AVERAGE_PRICE:
+                    skipped += 1
+                    continue
+                new_models.append(
+                    VehicleModelCreateMigrationSchema(
+                        brand_id=brand_ids[model_item["brand_name"]],
+                        name=model_name,
+                        average_price=average_price,
+                    )
                 )
+                if len(new_models) >= SEED_CHUNK_SIZE:
+                    inserted += len(
+                        await model_crud.bulk_insert(db, models_data=new_models)
+                    )
+                    new_models = []
+
+            inserted += len(await model_crud.bulk_insert(db, models_data=new_models))
+
+        logger.info(f"Se insertaron {len(brand_ids)} marcas.")
+        logger.info(f"Se insertaron {inserted} modelos.")
+        if skipped:
+            logger.info(
+                f"Se ignoraron {skipped} modelos con precio promedio menor a {MIN_AVERAGE_PRICE}, debido al caso de uso de el average > {MIN_AVERAGE_PRICE}."
             )
+        logger.info(
+            f"¡Población de la base de datos completada en {time.perf_counter() - started:.2f} s!"
+        )
+
 
-        model_crud.bulk_insert(db, models_data=new_models)
+async def init_brand_price_stats() -> None:
+    """
+    Calcula los agregados de precio por marca si la tabla está vacía,
+    por ejemplo en la primera ejecución sobre una base de datos existente.
+    """
+    async with database.SessionLocal() as db:
+        if not await CRUDBrandPriceStats.is_empty(db):
+            return
+        logger.info("Calculando los agregados de precio por marca...")
+        count = await CRUDBrandPriceStats.rebuild(db)
+        logger.success(f"Se calcularon los agregados de {count} marcas.")
+
+
+async def init_price_index() -> None:
+    """
+    Carga el índice de precios en memoria si está habilitado (PRICE_INDEX_ENABLED).
+    """
+    if not get_settings().PRICE_INDEX_ENABLED:
+        return
+    logger.info("Cargando el índice de precios en memoria...")
+    async with database.SessionLocal() as db:
+        count = await price_index.load(db)
+    logger.success(
+        f"Índice de precios cargado con {count} modelos "
+        f"en {price_index.load_seconds:.2f} s."
+    )
 
-        logger.info(f"Se insertaron {len(new_brands)} marcas.")
-        logger.info(f"Se insertaron {len(new_models)} modelos.")
-        logger.info("¡Población de la base de datos completada!")
-    finally:
-        db.close()
+
+async def is_db_current() -> bool:
+    """
+    Indica, con una sola consulta, si la base de datos ya tiene el esquema
+    SCHEMA_VERSION y se pobló, de modo que el arranque puede omitir ambos pasos.
+    """
+    async with database.SessionLocal() as db:
+        state = await CRUDSchemaVersion.get(db)
+    return (
+        state is not None
+        and state.version >= SCHEMA_VERSION
+        and state.seeded_at is not None
+    )
+
+
+async def migrate_db() -> None:
+    """Crea el esquema y las tablas y aplica las migraciones pendientes."""
+    with _phase("esquema"):
+        await init_db()
+    with _phase("migraciones"):
+        await apply_migrations()
+
+
+async def populate_db() -> None:
+    """Pobla las tablas y calcula los agregados de precio; registra que se pobló."""
+    with _phase("semillas"):
+        await seed_db()
+    with _phase("agregados de precio"):
+        await init_brand_price_stats()
+    async with database.SessionLocal() as db:
+        await CRUDSchemaVersion.mark_seeded(db)
+
+
+async def bootstrap_db() -> None:
+    """
+    Prepara la base de datos: esquema, semillas y agregados de precio, salvo que ya
+    esté al día. Con varios workers se ejecuta una sola vez antes de crearlos (ver
+    gunicorn.conf.py); también se puede ejecutar aparte con `python cli.py migrate`
+    y `python cli.py seed`.
+    """
+    if await is_db_current():
+        logger.info(
+            f"La base de datos está al día (versión {SCHEMA_VERSION}). "
+            "Saltando el esquema y las semillas."
+        )
+        return
+    await migrate_db()
+    await populate_db()
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI):
+async def lifespan(app: "FastAPI"):
     """
     Context manager para la aplicación FastAPI.
     """
     logger.info("Iniciando la aplicación...")
-    init_db()
-    seed_db()
+    if get_settings().DB_INIT_ON_STARTUP:
+        await bootstrap_db()
+    with _phase("índice de precios"):
+        await init_price_index()
     yield
     logger.info("Deteniendo la aplicación...")
+    await database.dispose()
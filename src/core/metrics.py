@@ -0,0 +1,198 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    """Sentencias SQL y tiempo en la base de datos de la petición en curso."""
+
+    scope: Scope | None = None
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        cumulative += self.counts[-1]
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class RouteSeries:
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.statuses: dict[int, int] = {}
+
+
+class RouteMetrics:
+    """
+    Métricas por ruta de este proceso: latencia de las peticiones, número de
+    sentencias SQL y tiempo en la base de datos por petición.
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str], RouteSeries] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        stats: RequestStats,
+    ) -> None:
+        series = self._series.get((method, route))
+        if series is None:
+            series = self._series[(method, route)] = RouteSeries()
+        series.latency.observe(seconds)
+        series.queries.observe(stats.queries)
+        series.db_time.observe(stats.db_seconds)
+        series.statuses[status_code] = series.statuses.get(status_code, 0) + 1
+
+    def render(self) -> str:
+        """Métricas en el formato de texto de Prometheus."""
+        lines = [
+            "# HELP http_requests_total Peticiones atendidas por ruta y estado.",
+            "# TYPE http_requests_total counter",
+        ]
+        series = sorted(self._series.items())
+        for (method, route), route_series in series:
+            for status_code, count in sorted(route_series.statuses.items()):
+                labels = _labels(method, route) + f',status="{status_code}"'
+                lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        for name, attribute, help_text in (
+            ("http_request_duration_seconds", "latency", "Latencia por petición."),
+            ("http_request_db_queries", "queries", "Sentencias SQL por petición."),
+            (
+                "http_request_db_duration_seconds",
+                "db_time",
+                "Tiempo en la base de datos por petición.",
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), route_series in series:
+                histogram = getattr(route_series, attribute)
+                lines.extend(histogram.samples(name, _labels(method, route)))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP y la registra en `metrics` con la
+    plantilla de la ruta (p. ej. /api/v1/brands/{brand_id}/models), no la URL.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RouteMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - start
+            _request_stats.reset(token)
+            # El router agrega la ruta encontrada al scope.
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                seconds,
+                stats,
+            )
+
+
+def current_route() -> str | None:
+    """Plantilla de la ruta de la petición en curso, si la hay."""
+    stats = _request_stats.get()
+    route = None if stats is None or stats.scope is None else stats.scope.get("route")
+    return getattr(route, "path", None)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    if context is not None and _request_stats.get() is not None:
+        context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    stats = _request_stats.get()
+    started_at = getattr(context, "_metrics_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started_at
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Registra en la petición en curso cada sentencia que ejecuta `engine` y su
+    duración, incluida la lectura de las filas.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        # Primero que los demás listeners, para no contar el EXPLAIN del log de
+        # consultas lentas.
+        event.listen(
+            sync_engine, "after_cursor_execute", _after_cursor_execute, insert=True
+        )
+
+
+route_metrics = RouteMetrics()
@@ -0,0 +1,76 @@
+import time
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Pool de conexiones de SQLAlchemy para asyncio que además mide cuánto esperan las
+    peticiones por una conexión y cuántas conexiones se abren, cierran e invalidan.
+    Los contadores son de este proceso y se reinician si el pool se recrea.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+        self.opened = 0
+        self.closed = 0
+        self.invalidated = 0
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def connect(self) -> PoolProxiedConnection:
+        # Incluye la espera en la cola, la creación de conexiones nuevas y el pre-ping.
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            logger.warning(f"Tiempo de espera agotado en el pool: {self.stats()}")
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, waited)
+
+    def _on_connect(self, *_: Any) -> None:
+        self.opened += 1
+
+    def _on_close(self, *_: Any) -> None:
+        self.closed += 1
+
+    def _on_invalidate(self, *_: Any) -> None:
+        self.invalidated += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "recycle": self._recycle,
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_seconds": {
+                "total": round(self.checkout_wait_seconds, 6),
+                "average": round(self.checkout_wait_seconds / self.checkouts, 6)
+                if self.checkouts
+                else None,
+                "max": round(self.checkout_wait_max_seconds, 6),
+            },
+            "connections": {
+                "opened": self.opened,
+                "closed": self.closed,
+                "invalidated": self.invalidated,
+            },
+        }
@@ -0,0 +1,268 @@
+import heapq
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import AbstractSet, Any, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.model import CRUDModel
+
+_LOAD_CHUNK_SIZE = 10_000
+_MERGE_THRESHOLD = 64
+_NULL_PRICE = -1
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _cents(value: Decimal | float) -> Decimal:
+    return Decimal(str(value)) * 100
+
+
+def _price_key(value: Decimal | float | None) -> int:
+    return _NULL_PRICE if value is None else int(_cents(value))
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+class PriceIndex:
+    """
+    Índice en memoria de los modelos ordenados por (average_price, id), el mismo orden
+    que CRUDModel.get_all_filtered, para responder los filtros `greater`/`lower` y la
+    paginación por cursor con búsqueda binaria, sin consultar la base de datos.
+
+    Los precios se guardan en centavos y las columnas en arreglos compactos (`array`).
+    El índice vive en el proceso: se carga en el lifespan y se actualiza con las
+    escrituras de modelos que atiende este mismo proceso. Como en SQL, solo responde
+    con los modelos activos.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.load_seconds: float | None = None
+        self._clear()
+
+    def _clear(self) -> None:
+        # Orden de consulta: (centavos, id) en arreglos paralelos. Los modelos sin
+        # precio van al final ordenados por id, como los NULL en Postgres.
+        self._prices = array("q")
+        self._ids = array("q")
+        self._null_ids = array("q")
+        # Columnas de cada modelo; `_slots` relaciona el id con su posición. Un modelo
+        # archivado conserva su posición, pero sale del orden de consulta.
+        self._slots: dict[int, int] = {}
+        self._names: list[str] = []
+        self._row_prices = array("q")
+        self._brand_ids = array("q")
+        self._is_active = array("b")
+        self._created_at = array("q")
+        self._updated_at = array("q")
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._null_ids)
+
+    async def load(self, db: AsyncSession) -> int:
+        """Carga los modelos activos desde la base de datos y construye el índice."""
+        started = time.perf_counter()
+        self.ready = False
+        self._clear()
+        async for rows in CRUDModel.stream_filtered(db, chunk_size=_LOAD_CHUNK_SIZE):
+            for row in rows:
+                self._store(row)
+
+        self._merge_keys(list(zip(self._slots, self._row_prices)))
+        self.load_seconds = time.perf_counter() - started
+        self.ready = True
+        return len(self)
+
+    def upsert(self, models: Iterable[Any]) -> None:
+        """
+        Agrega o actualiza modelos ya confirmados en la base de datos (modelos ORM o filas
+        con las mismas columnas); los archivados se quitan del orden de consulta. No hace
+        nada si el índice no está cargado.
+        """
+        if not self.ready:
+            return
+        unique_models = {model.id: model for model in models}
+        if len(unique_models) <= _MERGE_THRESHOLD:
+            for model_id, model in unique_models.items():
+                slot = self._slots.get(model_id)
+                if slot is not None and self._is_active[slot]:
+                    self._remove_key(self._row_prices[slot], model_id)
+                slot = self._store(model)
+                if model.is_active:
+                    self._insert_key(self._row_prices[slot], model_id)
+            return
+
+        # Con muchos modelos, una sola mezcla lineal es más barata que insertarlos
+        # uno por uno desplazando los arreglos en cada inserción.
+        replaced = unique_models.keys() & self._slots.keys()
+        slots = {
+            model_id: self._store(model) for model_id, model in unique_models.items()
+        }
+        keys = [
+            (model_id, self._row_prices[slot])
+            for model_id, slot in slots.items()
+            if self._is_active[slot]
+        ]
+        self._merge_keys(keys, replaced)
+
+    def can_answer(self, greater: float | None, lower: float | None) -> bool:
+        """Indica si el índice está cargado y los límites son números finitos."""
+        return self.ready and all(
+            math.isfinite(value) for value in (greater, lower) if value is not None
+        )
+
+    def query(
+        self,
+        *,
+        greater: float | None = None,
+        lower: float | None = None,
+        after: tuple[Decimal | None, int] | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Equivalente en memoria de CRUDModel.get_all_filtered; devuelve diccionarios."""
+        start, end = 0, len(self._prices)
+        if greater is not None:
+            start = bisect_right(self._prices, math.floor(_cents(greater)))
+        if lower is not None:
+            end = bisect_left(self._prices, math.ceil(_cents(lower)))
+        # Los filtros por precio excluyen a los modelos sin precio, igual que en SQL.
+        null_start = 0 if greater is None and lower is None else len(self._null_ids)
+
+        if after is not None:
+            average_price, model_id = after
+            if average_price is None:
+                start = end
+                null_start = max(null_start, bisect_right(self._null_ids, model_id))
+            else:
+                start = max(
+                    start, self._position_after(_cents(average_price), model_id)
+                )
+
+        if limit is not None:
+            end = min(end, start + limit)
+        ids = self._ids[start:end]
+        null_end = None if limit is None else null_start + limit - len(ids)
+        ids.extend(self._null_ids[null_start:null_end])
+        return [self._row(model_id) for model_id in ids]
+
+    def get_many(self, model_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        """
+        Equivalente en memoria de CRUDModel.get_by_ids; omite los ids que no existen o
+        están archivados.
+        """
+        return {
+            model_id: self._row(model_id)
+            for model_id in model_ids
+            if (slot := self._slots.get(model_id)) is not None and self._is_active[slot]
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "models": len(self),
+            "load_seconds": self.load_seconds,
+        }
+
+    def _merge_keys(
+        self, keys: list[tuple[int, int]], replaced: AbstractSet[int] = frozenset()
+    ) -> None:
+        """
+        Mezcla los pares (id, centavos) con el orden actual, descartando antes las
+        posiciones de los ids en `replaced`.
+        """
+        priced = sorted(
+            (price, model_id) for model_id, price in keys if price != _NULL_PRICE
+        )
+        kept = (
+            (price, model_id)
+            for price, model_id in zip(self._prices, self._ids)
+            if model_id not in replaced
+        )
+        merged = list(heapq.merge(kept, priced))
+        self._prices = array("q", (price for price, _ in merged))
+        self._ids = array("q", (model_id for _, model_id in merged))
+
+        null_ids = sorted(model_id for model_id, price in keys if price == _NULL_PRICE)
+        kept_null_ids = (
+            model_id for model_id in self._null_ids if model_id not in replaced
+        )
+        self._null_ids = array("q", heapq.merge(kept_null_ids, null_ids))
+
+    def _position_after(self, cents: Decimal, model_id: int) -> int:
+        """Posición del primer modelo posterior a (cents, model_id)."""
+        if cents != cents.to_integral_value():
+            return bisect_right(self._prices, math.floor(cents))
+        lo = bisect_left(self._prices, cents)
+        hi = bisect_right(self._prices, cents, lo)
+        return bisect_right(self._ids, model_id, lo, hi)
+
+    def _remove_key(self, price: int, model_id: int) -> None:
+        if price == _NULL_PRICE:
+            del self._null_ids[bisect_left(self._null_ids, model_id)]
+            return
+        lo = bisect_left(self._prices, price)
+        hi = bisect_right(self._prices, price, lo)
+        position = bisect_left(self._ids, model_id, lo, hi)
+        del self._prices[position]
+        del self._ids[position]
+
+    def _insert_key(self, price: int, model_id: int) -> None:
+        if price == _NULL_PRICE:
+            self._null_ids.insert(bisect_right(self._null_ids, model_id), model_id)
+            return
+        lo = bisect_left(self._prices, price)
+        hi = bisect_right(self._prices, price, lo)
+        position = bisect_right(self._ids, model_id, lo, hi)
+        self._prices.insert(position, price)
+        self._ids.insert(position, model_id)
+
+    def _store(self, model: Any) -> int:
+        values = (
+            _price_key(model.average_price),
+            model.brand_id,
+            model.is_active,
+            _micros(model.created_at),
+            _micros(model.updated_at),
+        )
+        columns = (
+            self._row_prices,
+            self._brand_ids,
+            self._is_active,
+            self._created_at,
+            self._updated_at,
+        )
+        slot = self._slots.get(model.id)
+        if slot is None:
+            slot = self._slots[model.id] = len(self._names)
+            self._names.append(model.name)
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            self._names[slot] = model.name
+            for column, value in zip(columns, values):
+                column[slot] = value
+        return slot
+
+    def _row(self, model_id: int) -> dict[str, Any]:
+        slot = self._slots[model_id]
+        price = self._row_prices[slot]
+        # Mismas llaves y en el mismo orden que VehicleModelSchema.
+        return {
+            "name": self._names[slot],
+            "average_price": None if price == _NULL_PRICE else price / 100,
+            "id": model_id,
+            "brand_id": self._brand_ids[slot],
+            "is_active": bool(self._is_active[slot]),
+            "created_at": _EPOCH + self._created_at[slot] * _MICROSECOND,
+            "updated_at": _EPOCH + self._updated_at[slot] * _MICROSECOND,
+        }
+
+
+price_index = PriceIndex()
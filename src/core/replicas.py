@@ -0,0 +1,84 @@
+import itertools
+import time
+from typing import Any, Sequence, cast
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+ROUND_ROBIN = "round_robin"
+LEAST_BUSY = "least_busy"
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.unhealthy_until = 0.0
+        self.sessions = 0
+        self.failures = 0
+
+    def busy(self) -> int:
+        """Conexiones de la réplica en uso en este proceso."""
+        # Database.create_engine siempre usa InstrumentedAsyncPool, que es un QueuePool.
+        pool = cast(QueuePool, self.engine.sync_engine.pool)
+        return pool.checkedout()
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura de la base de datos. `candidates` devuelve las réplicas sanas
+    en el orden en que deben probarse: rotando entre ellas (round_robin) o empezando
+    por la que tiene menos conexiones en uso (least_busy). Una réplica que falla al
+    conectar se descarta durante `retry_seconds`.
+    """
+
+    def __init__(
+        self, replicas: Sequence[Replica], selection: str, retry_seconds: float
+    ):
+        if selection not in (ROUND_ROBIN, LEAST_BUSY):
+            raise ValueError(f"Selección de réplicas desconocida: '{selection}'.")
+        self.replicas = list(replicas)
+        self.selection = selection
+        self.retry_seconds = retry_seconds
+        self._turn = itertools.count()
+        self.primary_fallbacks = 0
+        self.read_your_writes = 0
+
+    def candidates(self) -> list[Replica]:
+        now = time.monotonic()
+        healthy = [r for r in self.replicas if r.unhealthy_until <= now]
+        if self.selection == LEAST_BUSY:
+            return sorted(healthy, key=Replica.busy)
+        if not healthy:
+            return healthy
+        start = next(self._turn) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_unhealthy(self, replica: Replica, error: BaseException) -> None:
+        replica.failures += 1
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+        logger.warning(
+            f"Réplica {replica.name} descartada por {self.retry_seconds:.0f} s: {error}"
+        )
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "selection": self.selection,
+            "primary_fallbacks": self.primary_fallbacks,
+            "read_your_writes": self.read_your_writes,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.unhealthy_until <= now,
+                    "sessions": replica.sessions,
+                    "failures": replica.failures,
+                    "checked_out": replica.busy(),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    def __len__(self) -> int:
+        return len(self.replicas)
@@ -0,0 +1,51 @@
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Agrupa las cargas concurrentes con la misma llave: la primera petición ejecuta la
+    carga y las que llegan mientras está en curso esperan y reciben el mismo resultado
+    (o la misma excepción). Solo agrupa peticiones de este proceso.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[str, asyncio.Future[T]] = {}
+        self.coalesced: Counter[str] = Counter()
+
+    async def run(self, key: str, family: str, load: Callable[[], Awaitable[T]]) -> T:
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                # shield: si se cancela esta petición, la carga sigue para las demás.
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # Si se canceló la petición que cargaba, otra toma su lugar.
+                if not in_flight.cancelled():
+                    raise
+            finally:
+                if not in_flight.cancelled():
+                    self.coalesced[family] += 1
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita el aviso de excepción no leída cuando nadie más esperaba.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,156 @@
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+import orjson
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.metrics import current_route
+
+_MAX_PARAMETERS_LENGTH = 1000
+
+# SELECT que no se pueden repetir con EXPLAIN ANALYZE sin efectos: los que bloquean
+# filas, crean tablas (SELECT ... INTO) o llaman funciones con efectos secundarios, como
+# los candados de sesión de las migraciones, que se tomarían dos veces.
+_SIDE_EFFECTS = re.compile(
+    r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+    r"|\bINTO\b"
+    r"|\b(pg_\w*advisory\w*|nextval|setval|set_config|pg_notify"
+    r"|pg_cancel_backend|pg_terminate_backend)\s*\(",
+    re.IGNORECASE,
+)
+
+
+class SlowQueryLog:
+    """
+    Registra en el log las sentencias que tardan al menos `threshold_seconds`, con sus
+    parámetros, la ruta de la petición y la duración. En una fracción
+    `explain_sample_rate` de los SELECT lentos también guarda su plan con
+    EXPLAIN (ANALYZE, BUFFERS), que vuelve a ejecutar la consulta en la misma
+    transacción y por lo tanto duplica su costo en esa petición. Solo se muestrean los
+    SELECT sin efectos secundarios ejecutados dentro de una transacción.
+    """
+
+    # Archivos con sink JSON ya registrado en este proceso; todos los engines comparten
+    # el mismo sink.
+    _json_sinks: set[Path] = set()
+
+    def __init__(self, threshold_seconds: float, explain_sample_rate: float = 0.0):
+        self.threshold_seconds = threshold_seconds
+        self.explain_sample_rate = explain_sample_rate
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    @staticmethod
+    def add_json_sink(path: Path) -> None:
+        """
+        Escribe los registros de consultas lentas como JSON, uno por línea. Cada archivo
+        se registra una sola vez aunque se llame para varios engines.
+        """
+        if path in SlowQueryLog._json_sinks:
+            return
+        SlowQueryLog._json_sinks.add(path)
+        logger.add(
+            path,
+            serialize=True,
+            level="WARNING",
+            filter=lambda record: "slow_query" in record["extra"],
+        )
+
+    def _before(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        many: bool,
+    ) -> None:
+        if context is not None:
+            context._slow_query_started_at = time.perf_counter()
+
+    def _after(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        many: bool,
+    ) -> None:
+        started_at = getattr(context, "_slow_query_started_at", None)
+        if started_at is None:
+            return
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        if duration_ms < self.threshold_seconds * 1000:
+            return
+
+        route = current_route()
+        record: dict[str, Any] = {
+            "duration_ms": round(duration_ms, 1),
+            "route": route,
+            "statement": statement,
+            "parameters": repr(parameters)[:_MAX_PARAMETERS_LENGTH],
+            "executemany": many,
+        }
+        if (
+            not many
+            and random.random() < self.explain_sample_rate
+            and self._explainable(conn, statement)
+        ):
+            record["plan"] = self._explain(conn, statement, parameters)
+
+        first_line = statement.strip().split("\n", 1)[0]
+        logger.bind(slow_query=record).warning(
+            f"Consulta lenta de {duration_ms:.1f} ms en {route or '-'}: {first_line}"
+        )
+
+    @staticmethod
+    def _explainable(conn: Connection, statement: str) -> bool:
+        """
+        Indica si la sentencia puede repetirse con EXPLAIN ANALYZE: un SELECT sin
+        efectos secundarios en una transacción abierta del servidor, donde el SAVEPOINT
+        aísla un posible error. Las conexiones en AUTOCOMMIT siguen reportando una
+        transacción de SQLAlchemy, así que también se revisa la conexión del driver.
+        """
+        if not conn.in_transaction():
+            return False
+        if getattr(conn.connection.dbapi_connection, "autocommit", False):
+            return False
+        return statement.lstrip()[:6].upper() == "SELECT" and not _SIDE_EFFECTS.search(
+            statement
+        )
+
+    @staticmethod
+    def _explain(conn: Connection, statement: str, parameters: Any) -> Any:
+        """
+        Obtiene el plan de la sentencia dentro de un SAVEPOINT, para que un error del
+        EXPLAIN no aborte la transacción de la petición. Ningún error sale del evento:
+        se registra y la consulta queda sin plan.
+        """
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                )
+                (plan,) = cursor.fetchone()
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            finally:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el plan de la consulta lenta: {e}")
+            return None
+        finally:
+            cursor.close()
+        return orjson.loads(plan) if isinstance(plan, (str, bytes)) else plan
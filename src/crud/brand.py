@@ -1,7 +1,9 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Sequence
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
+from crud.catalog_version import CRUDCatalogVersion
 from models.brand import VehicleBrandModel
 from schemas.brand import (
     VehicleBrandUpdateSchema,
@@ -13,49 +15,119 @@ class CRUDBrand:
     def __init__(self, model: type[VehicleBrandModel]):
         self.model = model
 
-    def bulk_insert(self, db: Session, *, brands_data: list[VehicleBrandCreateSchema]):
+    async def bulk_insert(
+        self, db: AsyncSession, *, brands_data: list[VehicleBrandCreateSchema]
+    ) -> dict[str, int]:
         """
-        Inserta múltiples marcas en la base de datos.
+        Inserta múltiples marcas en la base de datos, ignorando las que ya existen.
+        Devuelve el id de cada marca solicitada, indexado por nombre.
         """
         if not brands_data:
-            return
+            return {}
 
         brands_dict = [brand.model_dump() for brand in brands_data]
-        stmt = insert(self.model).values(brands_dict)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
-        db.execute(stmt)
-        db.commit()
+        stmt = (
+            insert(self.model)
+            .values(brands_dict)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(self.model.name, self.model.id)
+        )
+        brand_ids = dict((await db.execute(stmt)).tuples().all())
+        inserted = bool(brand_ids)
+
+        existing_names = {brand.name for brand in brands_data} - brand_ids.keys()
+        if existing_names:
+            result = await db.execute(
+                select(self.model.name, self.model.id).where(
+                    self.model.name.in_(existing_names)
+                )
+            )
+            brand_ids.update(result.tuples().all())
+
+        if inserted:
+            await CRUDCatalogVersion.bump(db)
+        await db.commit()
+        return brand_ids
 
     @staticmethod
-    def get_all(db: Session) -> List[VehicleBrandModel]:
-        """Obtiene todas las marcas de vehículos."""
-        return db.query(VehicleBrandModel).all()
+    async def get_all(
+        db: AsyncSession, *, include_archived: bool = False
+    ) -> Sequence[VehicleBrandModel]:
+        """Obtiene todas las marcas de vehículos; por defecto, solo las activas."""
+        query = select(VehicleBrandModel)
+        if not include_archived:
+            query = query.where(VehicleBrandModel.is_active)
+        result = await db.execute(query)
+        return result.scalars().all()
 
     @staticmethod
-    def get_by_id(db: Session, brand_id: int) -> VehicleBrandModel | None:
-        """Obtiene una marca de vehículo por su ID."""
-        return (
-            db.query(VehicleBrandModel).filter(VehicleBrandModel.id == brand_id).first()
-        )
+    async def get_by_id(
+        db: AsyncSession, brand_id: int, *, include_archived: bool = False
+    ) -> VehicleBrandModel | None:
+        """Obtiene una marca de vehículo por su ID; por defecto, solo si está activa."""
+        brand = await db.get(VehicleBrandModel, brand_id)
+        if brand is None or not (include_archived or brand.is_active):
+            return None
+        return brand
 
     @staticmethod
-    def get_by_name(db: Session, name: str) -> VehicleBrandModel | None:
-        return (
-            db.query(VehicleBrandModel).filter(VehicleBrandModel.name == name).first()
+    async def get_by_name(
+        db: AsyncSession, name: str, *, include_archived: bool = False
+    ) -> VehicleBrandModel | None:
+        query = select(VehicleBrandModel).where(VehicleBrandModel.name == name)
+        if not include_archived:
+            query = query.where(VehicleBrandModel.is_active)
+        result = await db.execute(query)
+        return result.scalars().first()
+
+    @staticmethod
+    async def set_active(
+        db: AsyncSession, brand_id: int, is_active: bool
+    ) -> VehicleBrandModel | None:
+        """
+        Archiva (is_active=False) o restaura una marca con un solo UPDATE ... RETURNING.
+        Si ya estaba en ese estado no escribe nada. Devuelve None si la marca no existe.
+        """
+        db_brand = await db.scalar(
+            update(VehicleBrandModel)
+            .where(
+                VehicleBrandModel.id == brand_id,
+                VehicleBrandModel.is_active != is_active,
+            )
+            .values(is_active=is_active)
+            .returning(VehicleBrandModel)
         )
+        if db_brand is None:
+            return await CRUDBrand.get_by_id(db, brand_id, include_archived=True)
+        await CRUDCatalogVersion.bump(db)
+        await db.commit()
+        return db_brand
 
     @staticmethod
-    def create(db: Session, brand: VehicleBrandCreateSchema) -> VehicleBrandModel:
-        """Crea una nueva marca de vehículo."""
-        db_brand = VehicleBrandModel(**brand.model_dump())
-        db.add(db_brand)
-        db.commit()
-        db.refresh(db_brand)
+    async def create(
+        db: AsyncSession, brand: VehicleBrandCreateSchema
+    ) -> VehicleBrandModel | None:
+        """
+        Crea una nueva marca de vehículo con un solo INSERT ... RETURNING.
+        Devuelve None si ya existe una marca con el mismo nombre.
+        """
+        stmt = (
+            insert(VehicleBrandModel)
+            .values(**brand.model_dump())
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(VehicleBrandModel)
+        )
+        db_brand = await db.scalar(stmt)
+        if db_brand is not None:
+            await CRUDCatalogVersion.bump(db)
+            await db.commit()
         return db_brand
 
     @staticmethod
-    def update(
-        db: Session, db_brand: VehicleBrandModel, brand_in: VehicleBrandUpdateSchema
+    async def update(
+        db: AsyncSession,
+        db_brand: VehicleBrandModel,
+        brand_in: VehicleBrandUpdateSchema,
     ) -> VehicleBrandModel:
         """Actualiza una marca de vehículo existente."""
         update_data = brand_in.model_dump(exclude_unset=True)
@@ -63,6 +135,7 @@ class CRUDBrand:
             setattr(db_brand, key, value)
 
         db.add(db_brand)
-        db.commit()
-        db.refresh(db_brand)
+        await CRUDCatalogVersion.bump(db)
+        await db.commit()
+        await db.refresh(db_brand)
         return db_brand
@@ -0,0 +1,212 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Iterable, Sequence, cast
+from sqlalchemy import (
+    CursorResult,
+    Integer,
+    Select,
+    any_,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.brand import VehicleBrandModel
+from models.brand_price_stats import VehicleBrandPriceStatsModel
+from models.model import VehicleModelModel
+
+BrandPrice = tuple[int, Decimal | float | None]
+
+
+class CRUDBrandPriceStats:
+    @staticmethod
+    def collect_deltas(
+        *, added: Iterable[BrandPrice] = (), removed: Iterable[BrandPrice] = ()
+    ) -> dict[int, tuple[Decimal, int]]:
+        """
+        Calcula el cambio (suma, conteo) por marca a partir de los pares
+        (brand_id, average_price) agregados y eliminados. Los precios nulos no cuentan.
+        """
+        deltas: dict[int, list[Any]] = defaultdict(lambda: [Decimal(0), 0])
+        for sign, pairs in ((1, added), (-1, removed)):
+            for brand_id, average_price in pairs:
+                if average_price is None:
+                    continue
+                deltas[brand_id][0] += sign * Decimal(str(average_price))
+                deltas[brand_id][1] += sign
+
+        return {
+            brand_id: (price_sum, priced_count)
+            for brand_id, (price_sum, priced_count) in deltas.items()
+            if price_sum or priced_count
+        }
+
+    @staticmethod
+    async def apply(
+        db: AsyncSession,
+        *,
+        added: Iterable[BrandPrice] = (),
+        removed: Iterable[BrandPrice] = (),
+    ) -> None:
+        """
+        Aplica a los agregados de cada marca los precios agregados y eliminados.
+        No hace commit: debe ejecutarse en la misma transacción que la escritura de modelos.
+        """
+        deltas = CRUDBrandPriceStats.collect_deltas(added=added, removed=removed)
+        if not deltas:
+            return
+
+        # Orden estable por brand_id para no provocar deadlocks entre escrituras concurrentes.
+        rows = [
+            {"brand_id": brand_id, "price_sum": price_sum, "priced_count": count}
+            for brand_id, (price_sum, count) in sorted(deltas.items())
+        ]
+        # Sentencia fija con los valores como parámetros: se compila una sola vez
+        # aunque cambie el número de marcas.
+        stats = VehicleBrandPriceStatsModel.__table__
+        stmt = insert(stats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["brand_id"],
+            set_={
+                "price_sum": stats.c.price_sum + stmt.excluded.price_sum,
+                "priced_count": stats.c.priced_count + stmt.excluded.priced_count,
+            },
+        )
+        await db.execute(stmt, rows)
+
+    @staticmethod
+    async def get_brand_averages(
+        db: AsyncSession, fields: Sequence[str] | None = None
+    ) -> Sequence[Any]:
+        """
+        Obtiene (id, name, average_price) de las marcas activas con al menos un modelo
+        activo con precio. Con `fields` solo se seleccionan esas columnas, más el id.
+        """
+        result = await db.execute(
+            select(*CRUDBrandPriceStats._average_columns(fields))
+            .select_from(VehicleBrandModel)
+            .join(
+                VehicleBrandPriceStatsModel,
+                VehicleBrandModel.id == VehicleBrandPriceStatsModel.brand_id,
+            )
+            .where(
+                VehicleBrandModel.is_active,
+                VehicleBrandPriceStatsModel.priced_count > 0,
+            )
+        )
+        return result.all()
+
+    @staticmethod
+    async def get_brand_averages_by_ids(
+        db: AsyncSession, brand_ids: Sequence[int], fields: Sequence[str] | None = None
+    ) -> Sequence[Any]:
+        """
+        Obtiene (id, name, average_price) de las marcas activas con los ids indicados,
+        con un solo WHERE id = ANY(...). Las marcas sin modelos activos con precio
+        tienen promedio nulo. Con `fields` solo se seleccionan esas columnas, más el id.
+        """
+        result = await db.execute(
+            select(*CRUDBrandPriceStats._average_columns(fields))
+            .select_from(VehicleBrandModel)
+            .outerjoin(
+                VehicleBrandPriceStatsModel,
+                VehicleBrandModel.id == VehicleBrandPriceStatsModel.brand_id,
+            )
+            .where(
+                VehicleBrandModel.id == any_(literal(list(brand_ids), ARRAY(Integer))),
+                VehicleBrandModel.is_active,
+            )
+        )
+        return result.all()
+
+    @staticmethod
+    def _average_columns(fields: Sequence[str] | None) -> list[Any]:
+        """
+        Columnas de VehicleBrandWithAveragePriceSchema (o solo las de `fields`), seguidas
+        del id si no se pidió, para identificar cada fila.
+        """
+        columns = {
+            "id": VehicleBrandModel.id,
+            "name": VehicleBrandModel.name,
+            "average_price": (
+                VehicleBrandPriceStatsModel.price_sum
+                / func.nullif(VehicleBrandPriceStatsModel.priced_count, 0)
+            ).label("average_price"),
+        }
+        names = list(columns if fields is None else fields)
+        if "id" not in names:
+            names.append("id")
+        return [columns[name] for name in names]
+
+    @staticmethod
+    def _computed_stats() -> Select[Any]:
+        return (
+            select(
+                VehicleModelModel.brand_id,
+                func.sum(VehicleModelModel.average_price).label("price_sum"),
+                func.count(VehicleModelModel.average_price).label("priced_count"),
+            )
+            .where(
+                VehicleModelModel.is_active, VehicleModelModel.average_price.isnot(None)
+            )
+            .group_by(VehicleModelModel.brand_id)
+        )
+
+    @staticmethod
+    async def is_empty(db: AsyncSession) -> bool:
+        return (
+            await db.scalar(select(VehicleBrandPriceStatsModel.brand_id).limit(1))
+            is None
+        )
+
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> int:
+        """
+        Recalcula todos los agregados desde los modelos activos.
+        Bloquea las escrituras de modelos mientras dura la transacción para no perder cambios.
+        """
+        await db.execute(text("LOCK TABLE vehicle.models IN SHARE MODE"))
+        await db.execute(delete(VehicleBrandPriceStatsModel))
+        computed = CRUDBrandPriceStats._computed_stats()
+        # Un INSERT sin RETURNING devuelve un CursorResult, que tiene rowcount.
+        result = cast(
+            CursorResult[Any],
+            await db.execute(
+                insert(VehicleBrandPriceStatsModel).from_select(
+                    ["brand_id", "price_sum", "priced_count"], computed
+                )
+            ),
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def verify(db: AsyncSession) -> Sequence[Any]:
+        """
+        Compara los agregados con los valores calculados desde la tabla de modelos.
+        Devuelve (brand_id, price_sum, priced_count, expected_sum, expected_count)
+        por cada marca con diferencias.
+        """
+        computed = CRUDBrandPriceStats._computed_stats().subquery()
+        stats = VehicleBrandPriceStatsModel
+        price_sum = func.coalesce(stats.price_sum, 0)
+        priced_count = func.coalesce(stats.priced_count, 0)
+        expected_sum = func.coalesce(computed.c.price_sum, 0)
+        expected_count = func.coalesce(computed.c.priced_count, 0)
+        result = await db.execute(
+            select(
+                func.coalesce(stats.brand_id, computed.c.brand_id).label("brand_id"),
+                price_sum.label("price_sum"),
+                priced_count.label("priced_count"),
+                expected_sum.label("expected_sum"),
+                expected_count.label("expected_count"),
+            )
+            .select_from(stats)
+            .join(computed, stats.brand_id == computed.c.brand_id, full=True)
+            .where((price_sum != expected_sum) | (priced_count != expected_count))
+        )
+        return result.all()
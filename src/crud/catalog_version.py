@@ -0,0 +1,25 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.catalog_version import VehicleCatalogVersionModel
+
+
+class CRUDCatalogVersion:
+    @staticmethod
+    async def get(db: AsyncSession) -> int:
+        """Obtiene la versión actual del catálogo."""
+        version = await db.scalar(select(VehicleCatalogVersionModel.version))
+        return version or 0
+
+    @staticmethod
+    async def bump(db: AsyncSession) -> None:
+        """
+        Incrementa la versión del catálogo. No hace commit: debe ejecutarse en la misma
+        transacción que la escritura, justo antes del commit, porque bloquea la fila
+        hasta que la transacción termina.
+        """
+        await db.execute(
+            update(VehicleCatalogVersionModel).values(
+                version=VehicleCatalogVersionModel.version + 1
+            )
+        )
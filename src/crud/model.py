@@ -1,9 +1,67 @@
-from typing import Dict, Any, Union, List
-from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
+from decimal import Decimal
+from typing import Any, AsyncIterator, Sequence
+from sqlalchemy import (
+    CTE,
+    Float,
+    Integer,
+    Numeric,
+    Row,
+    Select,
+    String,
+    and_,
+    any_,
+    cast,
+    column,
+    literal,
+    or_,
+    select,
+    tuple_,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 
+from core.constants import BULK_INSERT_BATCH_SIZE
+from crud.brand_price_stats import CRUDBrandPriceStats
+from crud.catalog_version import CRUDCatalogVersion
+from models.brand import VehicleBrandModel
 from models.model import VehicleModelModel
-from schemas.model import VehicleModelCreateMigrationSchema, VehicleModelUpdateSchema
+from schemas.model import VehicleModelCreateMigrationSchema
+
+# Columnas de VehicleModelSchema y VehicleModelSummarySchema, en el orden del esquema.
+_LISTING_COLUMNS: dict[str, ColumnElement[Any]] = {
+    "name": VehicleModelModel.name,
+    "average_price": cast(VehicleModelModel.average_price, Float).label(
+        "average_price"
+    ),
+    "id": VehicleModelModel.id,
+    "brand_id": VehicleModelModel.brand_id,
+    "is_active": VehicleModelModel.is_active,
+    "created_at": VehicleModelModel.created_at,
+    "updated_at": VehicleModelModel.updated_at,
+}
+_SUMMARY_COLUMNS: dict[str, ColumnElement[Any]] = {
+    "id": VehicleModelModel.id,
+    "name": VehicleModelModel.name,
+    "average_price": VehicleModelModel.average_price,
+}
+
+
+def _select_columns(
+    columns: dict[str, ColumnElement[Any]],
+    fields: Sequence[str] | None,
+    sort_keys: Sequence[str],
+) -> list[ColumnElement[Any]]:
+    """
+    Columnas de `fields` (todas si es None) seguidas de las llaves de ordenamiento que
+    no se pidieron, para poder calcular el cursor sin enviarlas al cliente.
+    """
+    names = list(columns if fields is None else fields)
+    names += [key for key in sort_keys if key not in names]
+    return [columns[name] for name in names]
 
 
 class CRUDModel:
@@ -11,68 +69,409 @@ class CRUDModel:
         self.model = model
 
     @staticmethod
-    def get_all_filtered(
-        db: Session,
+    async def get_all_filtered(
+        db: AsyncSession,
         *,
+        fields: Sequence[str] | None = None,
         greater: float | None = None,
         lower: float | None = None,
-    ) -> List[VehicleModelModel]:
-        query = db.query(VehicleModelModel)
+        after: tuple[Decimal | None, int] | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Row[Any]]:
+        """
+        Obtiene las columnas de VehicleModelSchema de los modelos activos ordenados por
+        (average_price, id), con filtros opcionales por precio y paginación por llave
+        (keyset) a partir de `after`. El precio se devuelve como float, igual que en
+        el esquema, para no construir un Decimal por fila.
+        Con `fields` solo se seleccionan esas columnas, seguidas de las de la llave de
+        ordenamiento que falten para calcular el cursor.
+        """
+        columns = _select_columns(_LISTING_COLUMNS, fields, ("average_price", "id"))
+        query = (
+            select(*columns)
+            .where(VehicleModelModel.is_active)
+            .order_by(VehicleModelModel.average_price, VehicleModelModel.id)
+        )
+        query = CRUDModel._filter_by_price(query, greater=greater, lower=lower)
+        if after is not None and after[0] is not None and limit is not None:
+            query = CRUDModel._after_priced(query, after[0], after[1], limit=limit)
+        else:
+            if after is not None:
+                query = query.where(CRUDModel._after_price_id(*after))
+            if limit is not None:
+                query = query.limit(limit)
+        result = await db.execute(query)
+        return result.all()
+
+    @staticmethod
+    async def stream_filtered(
+        db: AsyncSession,
+        *,
+        greater: float | None = None,
+        lower: float | None = None,
+        chunk_size: int,
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        Recorre los modelos activos en orden de id con un cursor del lado del servidor,
+        entregando bloques de a lo más `chunk_size` filas.
+        """
+        query = (
+            select(*_LISTING_COLUMNS.values())
+            .where(VehicleModelModel.is_active)
+            .order_by(VehicleModelModel.id)
+        )
+        query = CRUDModel._filter_by_price(query, greater=greater, lower=lower)
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    def _filter_by_price(
+        query: Select[Any], *, greater: float | None, lower: float | None
+    ) -> Select[Any]:
         if greater is not None:
-            query = query.filter(VehicleModelModel.average_price > greater)
+            query = query.where(VehicleModelModel.average_price > greater)
         if lower is not None:
-            query = query.filter(VehicleModelModel.average_price < lower)
-        return query.all()
+            query = query.where(VehicleModelModel.average_price < lower)
+        return query
 
     @staticmethod
-    def get_by_id(db: Session, model_id: int) -> VehicleModelModel | None:
-        return (
-            db.query(VehicleModelModel).filter(VehicleModelModel.id == model_id).first()
+    def _after_price_id(
+        average_price: Decimal | None, model_id: int
+    ) -> ColumnElement[bool]:
+        """
+        Condición de keyset para continuar después de (average_price, id).
+        Postgres ordena los NULL al final en orden ascendente.
+        """
+        if average_price is None:
+            return and_(
+                VehicleModelModel.average_price.is_(None),
+                VehicleModelModel.id > model_id,
+            )
+        return or_(
+            tuple_(VehicleModelModel.average_price, VehicleModelModel.id)
+            > tuple_(literal(average_price), literal(model_id)),
+            VehicleModelModel.average_price.is_(None),
         )
 
     @staticmethod
-    def get_by_name(db: Session, name: str) -> VehicleModelModel | None:
-        return (
-            db.query(VehicleModelModel).filter(VehicleModelModel.name == name).first()
+    def _after_priced(
+        query: Select[Any], average_price: Decimal, model_id: int, *, limit: int
+    ) -> Select[Any]:
+        """
+        Página de `limit` filas después de (average_price, id) con precio. Equivale a
+        filtrar con `_after_price_id`, pero con el OR de los precios nulos Postgres no
+        usa la llave como condición del índice (average_price, id) y recorre todos los
+        precios menores. Por separado, cada rama lee a lo más `limit` filas del índice.
+        """
+        priced = query.where(
+            tuple_(VehicleModelModel.average_price, VehicleModelModel.id)
+            > tuple_(literal(average_price), literal(model_id))
+        ).limit(limit)
+        unpriced = query.where(VehicleModelModel.average_price.is_(None)).limit(limit)
+        page = union_all(priced, unpriced).subquery()
+        return select(*page.c).order_by(page.c.average_price, page.c.id).limit(limit)
+
+    @staticmethod
+    async def get_by_brand_id(
+        db: AsyncSession,
+        brand_id: int,
+        *,
+        fields: Sequence[str] | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> Sequence[Row[Any]]:
+        """
+        Obtiene (id, name, average_price) de los modelos activos de una marca ordenados
+        por id, con paginación por llave (keyset) a partir de `after`. Con `fields`
+        solo se seleccionan esas columnas, seguidas del id si no está entre ellas.
+        """
+        columns = _select_columns(_SUMMARY_COLUMNS, fields, ("id",))
+        query = (
+            select(*columns)
+            .where(VehicleModelModel.brand_id == brand_id, VehicleModelModel.is_active)
+            .order_by(VehicleModelModel.id)
         )
+        if after is not None:
+            query = query.where(VehicleModelModel.id > after)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return result.all()
 
     @staticmethod
-    def create(
-        db: Session, model: VehicleModelCreateMigrationSchema
-    ) -> VehicleModelModel:
-        db_model = VehicleModelModel(**model.model_dump())
-        db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
-        return db_model
+    async def get_by_brand_ids(
+        db: AsyncSession, brand_ids: Sequence[int]
+    ) -> Sequence[Row[Any]]:
+        """
+        Obtiene (id, name, average_price, brand_id) de los modelos activos de varias
+        marcas con una sola consulta, ordenados por id. Es la misma consulta que emitiría
+        selectinload sobre VehicleBrandModel.models, pero sin construir objetos ORM.
+        El precio se devuelve como texto, con el mismo formato que el Decimal de
+        VehicleModelSummarySchema, para no construir un Decimal por fila.
+        """
+        query = (
+            select(
+                VehicleModelModel.id,
+                VehicleModelModel.name,
+                cast(VehicleModelModel.average_price, String).label("average_price"),
+                VehicleModelModel.brand_id,
+            )
+            .where(
+                VehicleModelModel.brand_id
+                == any_(literal(list(brand_ids), ARRAY(Integer))),
+                VehicleModelModel.is_active,
+            )
+            .order_by(VehicleModelModel.id)
+        )
+        result = await db.execute(query)
+        return result.all()
 
     @staticmethod
-    def update(
-        db: Session,
-        db_model: VehicleModelModel,
-        model_in: Union[VehicleModelUpdateSchema, Dict[str, Any]],
-    ) -> VehicleModelModel:
-        if isinstance(model_in, dict):
-            update_data = model_in
-        else:
-            update_data = model_in.model_dump(exclude_unset=True)
+    async def get_by_ids(
+        db: AsyncSession,
+        model_ids: Sequence[int],
+        *,
+        fields: Sequence[str] | None = None,
+    ) -> Sequence[Row[Any]]:
+        """
+        Obtiene las columnas de VehicleModelSchema (o solo las de `fields`, más el id)
+        de los modelos activos con los ids indicados, con un solo WHERE id = ANY(...).
+        Las filas no siguen el orden de `model_ids` y se omiten los ids que no existen
+        o están archivados.
+        """
+        columns = _select_columns(_LISTING_COLUMNS, fields, ("id",))
+        # Un solo parámetro de tipo arreglo: la sentencia es la misma sin importar
+        # cuántos ids se pidan, a diferencia de IN (...).
+        query = select(*columns).where(
+            VehicleModelModel.id == any_(literal(list(model_ids), ARRAY(Integer))),
+            VehicleModelModel.is_active,
+        )
+        result = await db.execute(query)
+        return result.all()
 
-        for key, value in update_data.items():
-            setattr(db_model, key, value)
+    @staticmethod
+    async def get_by_id(
+        db: AsyncSession, model_id: int, *, include_archived: bool = False
+    ) -> VehicleModelModel | None:
+        model = await db.get(VehicleModelModel, model_id)
+        if model is None or not (include_archived or model.is_active):
+            return None
+        return model
+
+    @staticmethod
+    async def get_by_name(
+        db: AsyncSession, name: str, *, include_archived: bool = False
+    ) -> VehicleModelModel | None:
+        query = select(VehicleModelModel).where(VehicleModelModel.name == name)
+        if not include_archived:
+            query = query.where(VehicleModelModel.is_active)
+        result = await db.execute(query)
+        return result.scalars().first()
 
-        db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+    @staticmethod
+    async def create(
+        db: AsyncSession, model: VehicleModelCreateMigrationSchema
+    ) -> VehicleModelModel | None:
+        """
+        Crea un modelo con un solo INSERT ... SELECT ... RETURNING que solo inserta si
+        la marca existe y está activa y el nombre no está registrado. Devuelve None en
+        otro caso.
+        """
+        source = select(
+            literal(model.name, String),
+            literal(model.average_price, Numeric(10, 2)),
+            VehicleBrandModel.id,
+        ).where(VehicleBrandModel.id == model.brand_id, VehicleBrandModel.is_active)
+        stmt = (
+            insert(VehicleModelModel)
+            .from_select(["name", "average_price", "brand_id"], source)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(VehicleModelModel)
+        )
+        # from_statement hace que el RETURNING se cargue como entidad ORM y no como Row.
+        db_model = await db.scalar(select(VehicleModelModel).from_statement(stmt))
+        if db_model is None:
+            return None
+
+        await CRUDBrandPriceStats.apply(
+            db, added=[(db_model.brand_id, db_model.average_price)]
+        )
+        await CRUDCatalogVersion.bump(db)
+        await db.commit()
         return db_model
 
-    def bulk_insert(
-        self, db: Session, *, models_data: list[VehicleModelCreateMigrationSchema]
-    ):
-        if not models_data:
-            return
-
-        models_dict = [model.model_dump() for model in models_data]
-        stmt = insert(self.model).values(models_dict)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
-        db.execute(stmt)
-        db.commit()
+    async def bulk_insert(
+        self,
+        db: AsyncSession,
+        *,
+        models_data: list[VehicleModelCreateMigrationSchema],
+        batch_size: int = BULK_INSERT_BATCH_SIZE,
+    ) -> list[Row[Any]]:
+        """
+        Inserta los modelos en lotes de `batch_size` filas por sentencia, ignorando los
+        nombres que ya existen, y confirma todo en una sola transacción.
+        Devuelve las filas realmente insertadas.
+        """
+        # La sentencia es la misma para todos los lotes, así que SQLAlchemy la compila
+        # una sola vez y envía cada lote como un INSERT de varios VALUES.
+        table = self.model.__table__
+        stmt = (
+            insert(table)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(*self._model_columns())
+        )
+        inserted: list[Row[Any]] = []
+        for start in range(0, len(models_data), batch_size):
+            batch = models_data[start : start + batch_size]
+            result = await db.execute(stmt, [model.model_dump() for model in batch])
+            rows = result.all()
+            await CRUDBrandPriceStats.apply(
+                db, added=[(row.brand_id, row.average_price) for row in rows]
+            )
+            inserted.extend(rows)
+
+        if inserted:
+            await CRUDCatalogVersion.bump(db)
+        if models_data:
+            await db.commit()
+        return inserted
+
+    async def bulk_update_prices(
+        self,
+        db: AsyncSession,
+        *,
+        prices: list[tuple[int, Decimal | float | None]],
+        batch_size: int = BULK_INSERT_BATCH_SIZE,
+    ) -> list[Row[Any]]:
+        """
+        Actualiza el precio de varios modelos con un UPDATE ... FROM (VALUES ...) por
+        lote y confirma todo en una sola transacción. Devuelve las filas actualizadas,
+        con el precio anterior en `previous_price`; los ids que no existen o están
+        archivados se omiten.
+        """
+        table = self.model.__table__
+        updated: list[Row[Any]] = []
+        for start in range(0, len(prices), batch_size):
+            new_prices = (
+                values(
+                    column("id", Integer),
+                    column("average_price", Numeric(10, 2)),
+                    name="new_prices",
+                )
+                .data(prices[start : start + batch_size])
+                .cte("new_prices")
+            )
+            # Se bloquean las filas y se lee su precio actual para ajustar los agregados.
+            previous = (
+                select(table.c.id, table.c.average_price)
+                .where(table.c.id.in_(select(new_prices.c.id)), table.c.is_active)
+                .order_by(table.c.id)
+                .with_for_update()
+                .cte("previous_prices")
+            )
+            stmt = (
+                update(table)
+                .where(table.c.id == new_prices.c.id, table.c.id == previous.c.id)
+                # Si todo el lote es NULL, Postgres infiere la columna de VALUES como texto.
+                .values(average_price=cast(new_prices.c.average_price, Numeric(10, 2)))
+                .returning(*self._updated_columns(previous))
+            )
+            rows = (await db.execute(stmt)).all()
+            await CRUDBrandPriceStats.apply(
+                db,
+                added=[(row.brand_id, row.average_price) for row in rows],
+                removed=[(row.brand_id, row.previous_price) for row in rows],
+            )
+            updated.extend(rows)
+
+        if updated:
+            await CRUDCatalogVersion.bump(db)
+        if prices:
+            await db.commit()
+        return updated
+
+    async def update_price(
+        self, db: AsyncSession, *, model_id: int, average_price: Decimal | float | None
+    ) -> Row[Any] | None:
+        """
+        Actualiza el precio de un modelo con un solo UPDATE ... RETURNING.
+        Devuelve la fila actualizada, o None si el modelo no existe o está archivado.
+        """
+        table = self.model.__table__
+        # Sin VALUES la sentencia solo usa parámetros y SQLAlchemy la compila una vez.
+        previous = (
+            select(table.c.id, table.c.average_price)
+            .where(table.c.id == model_id, table.c.is_active)
+            .with_for_update()
+            .cte("previous_prices")
+        )
+        stmt = (
+            update(table)
+            .where(table.c.id == previous.c.id)
+            .values(average_price=average_price)
+            .returning(*self._updated_columns(previous))
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            return None
+
+        await CRUDBrandPriceStats.apply(
+            db,
+            added=[(row.brand_id, row.average_price)],
+            removed=[(row.brand_id, row.previous_price)],
+        )
+        await CRUDCatalogVersion.bump(db)
+        await db.commit()
+        return row
+
+    async def set_active(
+        self, db: AsyncSession, *, model_id: int, is_active: bool
+    ) -> Row[Any] | None:
+        """
+        Archiva (is_active=False) o restaura un modelo con un solo UPDATE ... RETURNING
+        y ajusta el agregado de su marca, en el que los modelos archivados no cuentan.
+        Si ya estaba en ese estado no escribe nada. Devuelve la fila, o None si el
+        modelo no existe.
+        """
+        table = self.model.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == model_id, table.c.is_active != is_active)
+            .values(is_active=is_active)
+            .returning(*self._model_columns())
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            result = await db.execute(
+                select(*self._model_columns()).where(table.c.id == model_id)
+            )
+            return result.first()
+
+        prices = [(row.brand_id, row.average_price)]
+        if is_active:
+            await CRUDBrandPriceStats.apply(db, added=prices)
+        else:
+            await CRUDBrandPriceStats.apply(db, removed=prices)
+        await CRUDCatalogVersion.bump(db)
+        await db.commit()
+        return row
+
+    def _model_columns(self) -> tuple[Any, ...]:
+        """Columnas de VehicleModelSchema, en el orden del esquema."""
+        table = self.model.__table__
+        return (
+            table.c.name,
+            table.c.average_price,
+            table.c.id,
+            table.c.brand_id,
+            table.c.is_active,
+            table.c.created_at,
+            table.c.updated_at,
+        )
+
+    def _updated_columns(self, previous: CTE) -> tuple[Any, ...]:
+        return (
+            *self._model_columns(),
+            previous.c.average_price.label("previous_price"),
+        )
@@ -0,0 +1,56 @@
+from typing import Any
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from models.schema_version import VehicleSchemaVersionModel
+
+
+class CRUDSchemaVersion:
+    @staticmethod
+    async def get(db: AsyncSession) -> Row[Any] | None:
+        """
+        Obtiene la versión del esquema y cuándo se pobló la base de datos, con una sola
+        consulta. Devuelve None si la tabla aún no existe.
+        """
+        try:
+            result = await db.execute(
+                select(
+                    VehicleSchemaVersionModel.version,
+                    VehicleSchemaVersionModel.seeded_at,
+                )
+            )
+        except ProgrammingError:
+            await db.rollback()
+            return None
+        return result.first()
+
+    @staticmethod
+    async def get_version(connection: AsyncConnection) -> int | None:
+        """Versión del esquema registrada, o None si aún no hay ninguna."""
+        return await connection.scalar(select(VehicleSchemaVersionModel.version))
+
+    @staticmethod
+    async def set_version(connection: AsyncConnection, version: int) -> None:
+        """
+        Registra la versión del esquema, sin bajarla si la base de datos ya tiene una
+        más reciente. No hace commit.
+        """
+        await connection.execute(
+            insert(VehicleSchemaVersionModel)
+            .values(id=1, version=version)
+            .on_conflict_do_update(
+                index_elements=[VehicleSchemaVersionModel.id],
+                set_={
+                    "version": func.greatest(VehicleSchemaVersionModel.version, version)
+                },
+            )
+        )
+
+    @staticmethod
+    async def mark_seeded(db: AsyncSession) -> None:
+        """Registra que la base de datos ya se pobló."""
+        await db.execute(update(VehicleSchemaVersionModel).values(seeded_at=func.now()))
+        await db.commit()
@@ -0,0 +1,60 @@
+"""
+Configuración de producción: `gunicorn main:app` desde src/ (gunicorn lee este
+archivo automáticamente).
+
+- WEB_CONCURRENCY workers de uvicorn con uvloop y httptools (por defecto, uno por CPU).
+- La aplicación se importa en el proceso principal antes de crear los workers
+  (preload_app), que comparten esa memoria en lugar de importar cada uno.
+- El esquema, las semillas y los agregados de precio se preparan una sola vez en
+  el proceso principal; cada worker solo carga su índice de precios.
+- El número de workers se puede ajustar en caliente con las señales TTIN/TTOU.
+- Con más de un worker, el cache de respuestas usa por defecto el backend SQLite,
+  compartido por los workers, y el índice de precios se desactiva: vive en cada
+  proceso y solo refleja las escrituras que atiende ese proceso.
+"""
+
+import asyncio
+
+from loguru import logger
+from uvicorn_worker import UvicornWorker
+
+from core.config import settings
+
+
+class FastUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+bind = settings.BIND
+workers = settings.WEB_CONCURRENCY
+worker_class = FastUvicornWorker
+preload_app = True
+# El de uvicorn; el valor por defecto de gunicorn es 2 s.
+keepalive = 5
+
+if workers > 1:
+    # Se ajusta antes de importar la aplicación (preload_app), que crea el cache.
+    if "CACHE_BACKEND" not in settings.model_fields_set:
+        settings.CACHE_BACKEND = "sqlite"
+    if settings.PRICE_INDEX_ENABLED:
+        logger.warning(
+            f"El índice de precios se desactiva con {workers} workers: cada worker "
+            "solo vería sus propias escrituras."
+        )
+        settings.PRICE_INDEX_ENABLED = False
+
+
+def on_starting(server) -> None:
+    from core.database import database
+    from core.lifespan import bootstrap_db
+
+    async def bootstrap() -> None:
+        try:
+            await bootstrap_db()
+        finally:
+            # Los workers no deben heredar conexiones abiertas en este proceso.
+            await database.dispose()
+
+    if settings.DB_INIT_ON_STARTUP:
+        asyncio.run(bootstrap())
+        settings.DB_INIT_ON_STARTUP = False
@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from core.config import settings
+from core.config import get_settings
+from core.constants import MISSING_IDS_HEADER, NEXT_CURSOR_HEADER
+from core.metrics import MetricsMiddleware, route_metrics
 from api import router
 from core.lifespan import lifespan
 
 
 def create_application() -> FastAPI:
+    settings = get_settings()
     application = FastAPI(
         title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan
     )
@@ -17,8 +20,13 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, MISSING_IDS_HEADER, "ETag"],
     )
 
+    if settings.METRICS_ENABLED:
+        # Se agrega al final para que sea el middleware externo y mida todo.
+        application.add_middleware(MetricsMiddleware, metrics=route_metrics)
+
     application.include_router(router)
     return application
 
@@ -0,0 +1,25 @@
+"""
+Migraciones versionadas del esquema `vehicle`.
+
+La versión 1 es el esquema que crea `init_db` con `metadata.create_all`. Cada versión
+posterior es un módulo `vNNN_<nombre>.py` con VERSION, DESCRIPTION y
+`async def upgrade(connection)`, agregado a MIGRATIONS. Se ejecutan con la conexión en
+AUTOCOMMIT para poder usar CREATE INDEX CONCURRENTLY, por lo que cada paso debe poder
+repetirse si la migración se interrumpe.
+
+Al agregar una migración también hay que subir SCHEMA_VERSION y reflejar el cambio en
+los modelos, que son el esquema de las bases de datos nuevas.
+"""
+
+from types import ModuleType
+
+from migrations import v002_model_indexes, v003_active_model_indexes
+
+BASELINE_VERSION = 1
+
+MIGRATIONS: tuple[ModuleType, ...] = (v002_model_indexes, v003_active_model_indexes)
+
+
+def pending_migrations(version: int) -> list[ModuleType]:
+    """Migraciones posteriores a `version`, en orden."""
+    return [migration for migration in MIGRATIONS if migration.VERSION > version]
@@ -0,0 +1,39 @@
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def create_index_concurrently(
+    connection: AsyncConnection, name: str, definition: str
+) -> None:
+    """
+    Crea el índice `vehicle.<name>` con CREATE INDEX CONCURRENTLY, que no bloquea las
+    escrituras en la tabla mientras se construye. Si una creación anterior se
+    interrumpió, Postgres deja el índice marcado como inválido: se elimina y se vuelve a
+    crear. La conexión debe estar en AUTOCOMMIT.
+    Args:
+        name (str): Nombre del índice, sin el esquema.
+        definition (str): Lo que sigue a ON, p. ej. "vehicle.models (brand_id)".
+    """
+    valid = await connection.scalar(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": f"vehicle.{name}"},
+    )
+    if valid:
+        logger.info(f"El índice {name} ya existe.")
+        return
+    if valid is not None:
+        logger.warning(f"El índice {name} quedó inválido; se vuelve a crear.")
+        await drop_index_concurrently(connection, name)
+
+    logger.info(f"Creando el índice {name}...")
+    await connection.execute(text(f"CREATE INDEX CONCURRENTLY {name} ON {definition}"))
+    logger.success(f"Índice {name} creado.")
+
+
+async def drop_index_concurrently(connection: AsyncConnection, name: str) -> None:
+    """
+    Elimina el índice `vehicle.<name>`, si existe, sin bloquear las lecturas ni las
+    escrituras de la tabla. La conexión debe estar en AUTOCOMMIT.
+    """
+    await connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS vehicle.{name}"))
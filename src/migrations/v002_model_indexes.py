@@ -0,0 +1,39 @@
+"""
+Índices de vehicle.models para las consultas por marca y el listado por precio.
+
+- (brand_id, id) INCLUDE (name, average_price): los modelos de una marca ordenados por
+  id, con paginación por llave, se leen del índice sin ordenar ni visitar la tabla; la
+  misma columna inicial sirve al join de los agregados por marca y a la llave foránea.
+- (average_price, id): el orden y la llave de paginación del listado. Reemplaza al
+  índice de average_price, que queda como prefijo.
+
+Ambos son parciales (WHERE is_active), con la definición final de la versión 3: así
+una base de datos en la versión 1 no construye índices completos que la versión 3
+eliminaría, y en una base de datos nueva, que ya los tiene por los modelos, no se
+crea nada.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from migrations.operations import create_index_concurrently, drop_index_concurrently
+
+VERSION = 2
+DESCRIPTION = "índices de modelos por marca y por (precio, id)"
+
+# (nombre, definición) de los índices parciales, también usados por la versión 3.
+INDEXES = (
+    (
+        "ix_vehicle_models_active_brand_id_id",
+        "vehicle.models (brand_id, id) INCLUDE (name, average_price) WHERE is_active",
+    ),
+    (
+        "ix_vehicle_models_active_average_price_id",
+        "vehicle.models (average_price, id) WHERE is_active",
+    ),
+)
+
+
+async def upgrade(connection: AsyncConnection) -> None:
+    for name, definition in INDEXES:
+        await create_index_concurrently(connection, name, definition)
+    await drop_index_concurrently(connection, "ix_vehicle_models_average_price")
@@ -0,0 +1,25 @@
+"""
+Índices parciales de vehicle.models con solo los modelos activos.
+
+Todas las lecturas filtran por is_active, así que los índices de la versión 2 se
+reemplazan por los mismos con WHERE is_active: los modelos archivados no ocupan lugar
+en ellos y las consultas recorren solo la parte activa conforme crece la archivada.
+
+La versión 2 ya crea los índices parciales; esta migración solo cambia algo en las
+bases de datos que aplicaron la versión 2 cuando todavía creaba los índices completos.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from migrations.operations import create_index_concurrently, drop_index_concurrently
+from migrations.v002_model_indexes import INDEXES
+
+VERSION = 3
+DESCRIPTION = "índices parciales de los modelos activos"
+
+
+async def upgrade(connection: AsyncConnection) -> None:
+    for name, definition in INDEXES:
+        await create_index_concurrently(connection, name, definition)
+    await drop_index_concurrently(connection, "ix_vehicle_models_brand_id_id")
+    await drop_index_concurrently(connection, "ix_vehicle_models_average_price_id")
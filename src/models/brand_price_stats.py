@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, Numeric, text
+
+from core.database import Base
+
+
+class VehicleBrandPriceStatsModel(Base):
+    """
+    Agregado por marca de los precios promedio de sus modelos activos.
+    Se mantiene en cada escritura de modelos para no agrupar la tabla de modelos en cada lectura.
+    """
+
+    brand_id = Column(Integer, ForeignKey("vehicle.brands.id"), primary_key=True)
+    price_sum = Column(
+        Numeric(20, 2), default=0, server_default=text("0"), nullable=False
+    )
+    priced_count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+
+    __tablename__ = "brand_price_stats"
+    __table_args__ = ({"schema": "vehicle"},)
+
+    def __repr__(self) -> str:
+        return f"<VehicleBrandPriceStatsModel(brand_id={self.brand_id}, price_sum={self.price_sum}, priced_count={self.priced_count})>"
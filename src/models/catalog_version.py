@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, CheckConstraint, Column, SmallInteger, text
+
+from core.database import Base
+
+
+class VehicleCatalogVersionModel(Base):
+    """
+    Contador de cambios del catálogo de marcas y modelos (una sola fila).
+    Las escrituras lo incrementan en su misma transacción y las lecturas lo usan como
+    ETag, sin consultar las tablas del catálogo.
+    """
+
+    id = Column(SmallInteger, primary_key=True, default=1, autoincrement=False)
+    version = Column(BigInteger, default=0, server_default=text("0"), nullable=False)
+
+    __tablename__ = "catalog_version"
+    __table_args__ = (
+        CheckConstraint("id = 1", name="check_catalog_version_single_row"),
+        {"schema": "vehicle"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<VehicleCatalogVersionModel(version={self.version})>"
@@ -6,6 +6,8 @@ from sqlalchemy import (
     CheckConstraint,
     Integer,
     ForeignKey,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 
@@ -21,7 +23,6 @@ class VehicleModelModel(BaseModelMixin, Base):
         CheckConstraint(
             f"average_price > {MIN_AVERAGE_PRICE}", name="check_model_average_price"
         ),
-        index=True,
         nullable=True,
     )
     brand_id = Column(Integer, ForeignKey("vehicle.brands.id"), nullable=False)
@@ -31,6 +32,21 @@ class VehicleModelModel(BaseModelMixin, Base):
     __tablename__ = "models"
     __table_args__ = (
         UniqueConstraint("name", name="uq_vehicle_model_name"),
+        # Solo con los modelos activos, que son los que leen las consultas. Las bases de
+        # datos existentes los reciben de migrations/v003_active_model_indexes.py.
+        Index(
+            "ix_vehicle_models_active_brand_id_id",
+            "brand_id",
+            "id",
+            postgresql_include=["name", "average_price"],
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_vehicle_models_active_average_price_id",
+            "average_price",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
         {"schema": "vehicle"},
     )
 
@@ -0,0 +1,24 @@
+from sqlalchemy import CheckConstraint, Column, DateTime, Integer, SmallInteger
+
+from core.database import Base
+
+
+class VehicleSchemaVersionModel(Base):
+    """
+    Versión del esquema aplicada a la base de datos (una sola fila) y momento en que se
+    terminó de poblar. Al arrancar basta leer esta fila para saber si se puede omitir
+    la creación del esquema y el sembrado.
+    """
+
+    id = Column(SmallInteger, primary_key=True, default=1, autoincrement=False)
+    version = Column(Integer, nullable=False)
+    seeded_at = Column(DateTime(timezone=True), nullable=True)
+
+    __tablename__ = "schema_version"
+    __table_args__ = (
+        CheckConstraint("id = 1", name="check_schema_version_single_row"),
+        {"schema": "vehicle"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<VehicleSchemaVersionModel(version={self.version}, seeded_at={self.seeded_at})>"
@@ -1,7 +1,10 @@
 from decimal import Decimal
+from enum import Enum
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
+from schemas.model import VehicleModelSummarySchema
+
 
 class VehicleBrandBaseSchema(BaseModel):
     name: str
@@ -37,3 +40,11 @@ class VehicleBrandWithAveragePriceSchema(BaseModel):
     average_price: Decimal | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class VehicleBrandWithModelsSchema(VehicleBrandWithAveragePriceSchema):
+    models: list[VehicleModelSummarySchema] | None = None
+
+
+class VehicleBrandInclude(str, Enum):
+    MODELS = "models"
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
 
 from core.constants import MIN_AVERAGE_PRICE
 
@@ -30,6 +31,17 @@ class VehicleModelUpdateSchema(BaseModel):
     )
 
 
+class VehicleModelPriceUpdateSchema(BaseModel):
+    id: int
+    average_price: float | None = Field(
+        ...,
+        gt=MIN_AVERAGE_PRICE,
+        description="El precio debe ser mayor que {MIN_AVERAGE_PRICE}.",
+    )
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class VehicleModelSchema(VehicleModelBaseSchema):
     id: int
     brand_id: int
@@ -46,3 +58,25 @@ class VehicleModelSummarySchema(BaseModel):
     average_price: Decimal | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class VehicleModelBulkStatus(str, Enum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+
+
+class VehicleModelBulkItemSchema(BaseModel):
+    name: str
+    status: VehicleModelBulkStatus
+    id: int | None = None
+
+
+class VehicleModelBulkResultSchema(BaseModel):
+    created: int
+    conflicts: int
+    items: list[VehicleModelBulkItemSchema]
+
+
+class VehicleModelBulkPriceResultSchema(BaseModel):
+    updated: int
+    not_found: list[int]
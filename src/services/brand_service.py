@@ -1,128 +1,340 @@
 import typing as t
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import response_cache
+from core.constants import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from core.price_index import price_index
 from crud.brand import CRUDBrand
+from crud.brand_price_stats import CRUDBrandPriceStats
 from crud.model import CRUDModel
-from schemas.brand import VehicleBrandCreateSchema, VehicleBrandWithAveragePriceSchema
+from schemas.brand import (
+    VehicleBrandCreateSchema,
+    VehicleBrandInclude,
+    VehicleBrandWithAveragePriceSchema,
+)
 from schemas.model import (
-    VehicleModelSummarySchema,
+    VehicleModelBulkItemSchema,
+    VehicleModelBulkResultSchema,
+    VehicleModelBulkStatus,
     VehicleModelCreateSchema,
     VehicleModelCreateMigrationSchema,
+    VehicleModelSummarySchema,
 )
 from models.brand import VehicleBrandModel
 from models.model import VehicleModelModel
+from shared.fields import parse_fields
+from shared.ids import in_request_order, missing_ids_headers, parse_ids
+from shared.pagination import decode_cursor, encode_cursor
+from shared.responses import JSONBody, rows_to_dicts
 from loguru import logger
 
 
 class BrandService:
     @staticmethod
-    def get_all_brands(db: Session) -> t.List[VehicleBrandModel]:
-        """Obtiene una lista de todas las marcas de vehículos."""
-        return CRUDBrand.get_all(db)
+    async def get_all_brands(db: AsyncSession) -> t.Sequence[VehicleBrandModel]:
+        """Obtiene una lista de todas las marcas de vehículos activas."""
+        return await CRUDBrand.get_all(db)
 
     @staticmethod
-    def get_all_brands_with_average_price(
-        db: Session,
-    ) -> t.List[VehicleBrandWithAveragePriceSchema]:
-        """Obtiene una lista de todas las marcas con el precio promedio de sus modelos."""
-        result = (
-            db.query(
-                VehicleBrandModel.id,
-                VehicleBrandModel.name,
-                func.avg(VehicleModelModel.average_price).label("average_price"),
-            )
-            .outerjoin(
-                VehicleModelModel, VehicleBrandModel.id == VehicleModelModel.brand_id
-            )
-            .filter(VehicleModelModel.average_price.isnot(None))
-            .group_by(VehicleBrandModel.id, VehicleBrandModel.name)
-            .all()
+    async def get_all_brands_with_average_price(
+        db: AsyncSession,
+        fields: str | None = None,
+        include: VehicleBrandInclude | None = None,
+    ) -> JSONBody:
+        """
+        Obtiene la lista de todas las marcas con el precio promedio de sus modelos,
+        serializada como JSON con el formato de VehicleBrandWithAveragePriceSchema, o
+        solo con los campos de `fields` (separados por comas).
+        Con `include=models` cada marca incluye sus modelos con el formato de
+        VehicleModelSummarySchema.
+        """
+        selected = BrandService._parse_fields(
+            fields, VehicleBrandWithAveragePriceSchema
+        )
+        return await response_cache.get_or_load_json(
+            "brands",
+            {"fields": selected, "include": include},
+            lambda: BrandService._load_brands_with_average_price(db, selected, include),
         )
 
-        brands_with_avg_price = []
-        for row in result:
-            brands_with_avg_price.append(
-                VehicleBrandWithAveragePriceSchema(
-                    id=row.id, name=row.name, average_price=round(row.average_price)
-                )
-            )
+    @staticmethod
+    async def _load_brands_with_average_price(
+        db: AsyncSession,
+        fields: tuple[str, ...] | None,
+        include: VehicleBrandInclude | None,
+    ) -> tuple[t.List[dict[str, t.Any]], dict[str, str]]:
+        rows = await CRUDBrandPriceStats.get_brand_averages(db, fields)
+        brands = BrandService._brands_to_dicts(rows, fields)
+        if include is VehicleBrandInclude.MODELS:
+            await BrandService._embed_models(db, rows, brands)
+        return brands, {}
+
+    @staticmethod
+    async def get_brands_by_ids(
+        db: AsyncSession,
+        ids: str,
+        fields: str | None = None,
+        include: VehicleBrandInclude | None = None,
+    ) -> JSONBody:
+        """
+        Obtiene las marcas con los ids indicados (separados por comas) en el orden
+        pedido, con el formato de VehicleBrandWithAveragePriceSchema o solo con los
+        campos de `fields`, y sus modelos si se indica `include=models`.
+        Los ids que no existen se devuelven en los headers.
+        """
+        selected = BrandService._parse_fields(
+            fields, VehicleBrandWithAveragePriceSchema
+        )
+        brand_ids = BrandService._parse_ids(ids)
+        return await response_cache.get_or_load_json(
+            "brands",
+            {"ids": brand_ids, "fields": selected, "include": include},
+            lambda: BrandService._load_brands_by_ids(db, brand_ids, selected, include),
+        )
+
+    @staticmethod
+    async def _load_brands_by_ids(
+        db: AsyncSession,
+        brand_ids: tuple[int, ...],
+        fields: tuple[str, ...] | None,
+        include: VehicleBrandInclude | None,
+    ) -> tuple[t.List[dict[str, t.Any]], dict[str, str]]:
+        rows = await CRUDBrandPriceStats.get_brand_averages_by_ids(
+            db, brand_ids, fields
+        )
+        found = dict(
+            zip((row.id for row in rows), BrandService._brands_to_dicts(rows, fields))
+        )
+        if include is VehicleBrandInclude.MODELS:
+            await BrandService._embed_models(db, rows, list(found.values()))
+        brands, missing = in_request_order(brand_ids, found)
+        return brands, missing_ids_headers(missing)
 
-        return brands_with_avg_price
+    @staticmethod
+    def _brands_to_dicts(
+        rows: t.Sequence[t.Any], fields: tuple[str, ...] | None
+    ) -> t.List[dict[str, t.Any]]:
+        brands = rows_to_dicts(rows, fields)
+        if fields is None or "average_price" in fields:
+            # round(x, 0) conserva el Decimal, que se serializa como texto igual que en
+            # VehicleBrandWithAveragePriceSchema.
+            for brand in brands:
+                if brand["average_price"] is not None:
+                    brand["average_price"] = round(brand["average_price"], 0)
+        return brands
+
+    @staticmethod
+    async def _embed_models(
+        db: AsyncSession,
+        rows: t.Sequence[t.Any],
+        brands: t.Sequence[dict[str, t.Any]],
+    ) -> None:
+        """
+        Agrega a cada marca la lista de sus modelos, cargados con una sola consulta
+        para todas las marcas en lugar de una por marca.
+        """
+        models: dict[int, t.List[dict[str, t.Any]]] = {row.id: [] for row in rows}
+        if models:
+            model_rows = await CRUDModel.get_by_brand_ids(db, list(models))
+            fields = list(VehicleModelSummarySchema.model_fields)
+            for model_row in model_rows:
+                models[model_row.brand_id].append(dict(zip(fields, model_row)))
+        for row, brand in zip(rows, brands):
+            brand["models"] = models[row.id]
 
     @staticmethod
-    def get_brand_models_by_id(
-        db: Session, brand_id: int
-    ) -> t.List[VehicleModelSummarySchema]:
-        """Obtiene todos los modelos de una marca específica."""
+    async def get_brand_models_by_id(
+        db: AsyncSession,
+        brand_id: int,
+        *,
+        fields: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> JSONBody:
+        """
+        Obtiene todos los modelos de una marca específica, serializados como JSON con el
+        formato de VehicleModelSummarySchema, o solo con los campos de `fields`.
+        Si se indica `after` la lista continúa después del cursor de la página anterior;
+        el cursor de la siguiente página se devuelve en los headers.
+        """
+        selected = BrandService._parse_fields(fields, VehicleModelSummarySchema)
+        after_id = BrandService._decode_after(after)
+        return await response_cache.get_or_load_json(
+            f"brand_models:{brand_id}",
+            {"fields": selected, "after": after_id, "limit": limit},
+            lambda: BrandService._load_brand_models(
+                db, brand_id, selected, after_id, limit
+            ),
+        )
+
+    @staticmethod
+    async def _load_brand_models(
+        db: AsyncSession,
+        brand_id: int,
+        fields: tuple[str, ...] | None,
+        after_id: int | None,
+        limit: int | None,
+    ) -> tuple[t.List[dict[str, t.Any]], dict[str, str]]:
         # Verificar que la marca existe
-        brand = CRUDBrand.get_by_id(db, brand_id)
+        brand = await CRUDBrand.get_by_id(db, brand_id)
         if not brand:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"La marca con id '{brand_id}' no existe.",
             )
 
-        models = (
-            db.query(
-                VehicleModelModel.id,
-                VehicleModelModel.name,
-                VehicleModelModel.average_price,
-            )
-            .filter(VehicleModelModel.brand_id == brand_id)
-            .all()
+        models = await CRUDModel.get_by_brand_id(
+            db, brand_id, fields=fields, after=after_id, limit=limit
         )
+        headers = {}
+        if limit is not None and len(models) == limit:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(models[-1].id)
+        return rows_to_dicts(models, fields), headers
 
-        model_summaries = []
-        for model in models:
-            model_summaries.append(
-                VehicleModelSummarySchema(
-                    id=model.id, name=model.name, average_price=model.average_price
-                )
-            )
+    @staticmethod
+    def _parse_ids(ids: str) -> tuple[int, ...]:
+        try:
+            return parse_ids(ids, MAX_PAGE_SIZE)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    @staticmethod
+    def _parse_fields(
+        fields: str | None, schema: type[BaseModel]
+    ) -> tuple[str, ...] | None:
+        try:
+            return parse_fields(fields, schema)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        return model_summaries
+    @staticmethod
+    def _decode_after(after: str | None) -> int | None:
+        if after is None:
+            return None
+        try:
+            (model_id,) = decode_cursor(after, size=1)
+            return int(model_id)
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El cursor '{after}' no es válido.",
+            )
 
     @staticmethod
-    def create_brand_model(
-        db: Session, brand_id: int, model_schema: VehicleModelCreateSchema
+    async def create_brand_model(
+        db: AsyncSession, brand_id: int, model_schema: VehicleModelCreateSchema
     ) -> VehicleModelModel:
         """Crea un nuevo modelo para una marca específica."""
-        brand = CRUDBrand.get_by_id(db, brand_id)
+        model_data = model_schema.model_dump()
+        model_data["brand_id"] = brand_id
+        logger.info(f"Model data: {model_data}")
+
+        db_model = await CRUDModel.create(
+            db, model=VehicleModelCreateMigrationSchema(**model_data)
+        )
+        if not db_model:
+            # Solo si no se insertó se consulta la marca para distinguir el error.
+            brand = await CRUDBrand.get_by_id(db, brand_id)
+            if not brand:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"La marca con id '{brand_id}' no existe.",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"El modelo '{model_schema.name}' ya existe.",
+            )
+
+        price_index.upsert([db_model])
+        response_cache.invalidate("brands", f"brand_models:{brand_id}", "models")
+        return db_model
+
+    @staticmethod
+    async def create_brand_models(
+        db: AsyncSession,
+        brand_id: int,
+        models_in: t.Sequence[VehicleModelCreateSchema],
+    ) -> VehicleModelBulkResultSchema:
+        """
+        Crea varios modelos para una marca con inserciones por lotes.
+        Los nombres que ya existen (o que se repiten en la petición) se reportan
+        como conflicto en lugar de fallar toda la operación.
+        """
+        brand = await CRUDBrand.get_by_id(db, brand_id)
         if not brand:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"La marca con id '{brand_id}' no existe.",
             )
 
-        existing_model = CRUDModel.get_by_name(db, name=model_schema.name)
-        if existing_model:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"El modelo '{model_schema.name}' ya existe.",
+        unique_models: dict[str, VehicleModelCreateSchema] = {}
+        for model in models_in:
+            unique_models.setdefault(model.name, model)
+        models_data = [
+            VehicleModelCreateMigrationSchema(
+                brand_id=brand_id, name=model.name, average_price=model.average_price
             )
+            for model in unique_models.values()
+        ]
+        model_crud = CRUDModel(VehicleModelModel)
+        rows = await model_crud.bulk_insert(db, models_data=models_data)
+        if rows:
+            price_index.upsert(rows)
+            response_cache.invalidate("brands", f"brand_models:{brand_id}", "models")
 
-        model_data = model_schema.model_dump()
-        model_data["brand_id"] = brand_id
-        logger.info(f"Model data: {model_data}")
-
-        return CRUDModel.create(
-            db, model=VehicleModelCreateMigrationSchema(**model_data)
+        created_ids = {row.name: row.id for row in rows}
+        items = []
+        for model in models_in:
+            model_id = created_ids.pop(model.name, None)
+            items.append(
+                VehicleModelBulkItemSchema(
+                    name=model.name,
+                    status=VehicleModelBulkStatus.CONFLICT
+                    if model_id is None
+                    else VehicleModelBulkStatus.CREATED,
+                    id=model_id,
+                )
+            )
+        logger.info(
+            f"Carga masiva de la marca {brand_id}: {len(rows)} modelos creados "
+            f"de {len(models_in)}."
+        )
+        return VehicleModelBulkResultSchema(
+            created=len(rows), conflicts=len(models_in) - len(rows), items=items
         )
 
     @staticmethod
-    def create_brand(
-        db: Session, brand_in: VehicleBrandCreateSchema
+    async def create_brand(
+        db: AsyncSession, brand_in: VehicleBrandCreateSchema
     ) -> VehicleBrandModel:
         """
         Crea una nueva marca de vehículo.
         Valida que el nombre de la marca no exista.
         """
-        existing_brand = CRUDBrand.get_by_name(db, name=brand_in.name)
-        if existing_brand:
+        db_brand = await CRUDBrand.create(db, brand=brand_in)
+        if not db_brand:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"La marca '{brand_in.name}' ya existe.",
             )
-        return CRUDBrand.create(db, brand=brand_in)
+        response_cache.invalidate("brands")
+        return db_brand
+
+    @staticmethod
+    async def set_brand_active(
+        db: AsyncSession, brand_id: int, is_active: bool
+    ) -> VehicleBrandModel:
+        """
+        Archiva o restaura una marca. Una marca archivada no aparece en los listados ni
+        acepta modelos nuevos; sus modelos no se archivan.
+        """
+        db_brand = await CRUDBrand.set_active(db, brand_id, is_active)
+        if not db_brand:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"La marca con id '{brand_id}' no existe.",
+            )
+        response_cache.invalidate("brands", f"brand_models:{brand_id}")
+        return db_brand
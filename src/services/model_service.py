@@ -1,34 +1,266 @@
-from typing import List
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Sequence
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import response_cache
+from core.constants import EXPORT_CHUNK_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from core.price_index import price_index
 from crud.model import CRUDModel
-from schemas.model import VehicleModelUpdateSchema
+from schemas.model import (
+    VehicleModelBulkPriceResultSchema,
+    VehicleModelPriceUpdateSchema,
+    VehicleModelSchema,
+    VehicleModelUpdateSchema,
+)
 from models.model import VehicleModelModel
+from shared.export import ExportFormat, to_csv, to_ndjson
+from shared.fields import parse_fields
+from shared.ids import in_request_order, missing_ids_headers, parse_ids
+from shared.pagination import decode_cursor, encode_cursor
+from shared.responses import JSONBody, dumps, rows_to_dicts
 
 
 class ModelService:
     @staticmethod
-    def get_all_models_filtered(
-        db: Session,
+    async def get_all_models_filtered(
+        db: AsyncSession,
         *,
+        fields: str | None = None,
         greater: float | None = None,
         lower: float | None = None,
-    ) -> List[VehicleModelModel]:
-        """Obtiene una lista de todos los modelos, con filtros opcionales por precio."""
-        return CRUDModel.get_all_filtered(db, greater=greater, lower=lower)
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> JSONBody:
+        """
+        Obtiene una lista de todos los modelos, con filtros opcionales por precio,
+        serializada como JSON con el formato de VehicleModelSchema, o solo con los
+        campos de `fields` (separados por comas).
+        Si se indica `after` la lista continúa después del cursor de la página anterior;
+        el cursor de la siguiente página se devuelve en los headers.
+        Con el índice de precios cargado la consulta se resuelve en memoria.
+        """
+        selected = ModelService._parse_fields(fields)
+        after_key = ModelService._decode_after(after)
+        if price_index.can_answer(greater, lower):
+            models = price_index.query(
+                greater=greater, lower=lower, after=after_key, limit=limit
+            )
+            last_key = (
+                (models[-1]["average_price"], models[-1]["id"]) if models else None
+            )
+            headers = ModelService._page_headers(last_key, len(models), limit)
+            if selected is not None:
+                models = [{name: model[name] for name in selected} for model in models]
+            return JSONBody(dumps(models), headers)
+
+        return await response_cache.get_or_load_json(
+            "models",
+            {
+                "fields": selected,
+                "greater": greater,
+                "lower": lower,
+                "after": after_key,
+                "limit": limit,
+            },
+            lambda: ModelService._load_models(
+                db, selected, greater, lower, after_key, limit
+            ),
+        )
+
+    @staticmethod
+    async def _load_models(
+        db: AsyncSession,
+        fields: tuple[str, ...] | None,
+        greater: float | None,
+        lower: float | None,
+        after_key: tuple[Decimal | None, int] | None,
+        limit: int | None,
+    ) -> tuple[List[dict[str, Any]], dict[str, str]]:
+        models = await CRUDModel.get_all_filtered(
+            db,
+            fields=fields,
+            greater=greater,
+            lower=lower,
+            after=after_key,
+            limit=limit,
+        )
+        last_key = (models[-1].average_price, models[-1].id) if models else None
+        headers = ModelService._page_headers(last_key, len(models), limit)
+        return rows_to_dicts(models, fields), headers
+
+    @staticmethod
+    async def get_models_by_ids(
+        db: AsyncSession, ids: str, *, fields: str | None = None
+    ) -> JSONBody:
+        """
+        Obtiene los modelos con los ids indicados (separados por comas) en el orden
+        pedido, serializados como JSON con el formato de VehicleModelSchema o solo con
+        los campos de `fields`. Los ids que no existen se devuelven en los headers.
+        """
+        selected = ModelService._parse_fields(fields)
+        model_ids = ModelService._parse_ids(ids)
+        if price_index.ready:
+            models, missing = in_request_order(
+                model_ids, price_index.get_many(model_ids)
+            )
+            if selected is not None:
+                models = [{name: model[name] for name in selected} for model in models]
+            return JSONBody(dumps(models), missing_ids_headers(missing))
+
+        return await response_cache.get_or_load_json(
+            "models",
+            {"ids": model_ids, "fields": selected},
+            lambda: ModelService._load_models_by_ids(db, model_ids, selected),
+        )
+
+    @staticmethod
+    async def _load_models_by_ids(
+        db: AsyncSession, model_ids: tuple[int, ...], fields: tuple[str, ...] | None
+    ) -> tuple[List[dict[str, Any]], dict[str, str]]:
+        rows = await CRUDModel.get_by_ids(db, model_ids, fields=fields)
+        found = {row.id: model for row, model in zip(rows, rows_to_dicts(rows, fields))}
+        models, missing = in_request_order(model_ids, found)
+        return models, missing_ids_headers(missing)
+
+    @staticmethod
+    async def export_models(
+        db: AsyncSession,
+        export_format: ExportFormat,
+        *,
+        greater: float | None = None,
+        lower: float | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Exporta el catálogo de modelos en NDJSON o CSV, leyendo de la base de datos
+        en bloques de EXPORT_CHUNK_SIZE filas y entregando cada bloque ya serializado.
+        """
+        fields = list(VehicleModelSchema.model_fields)
+        if export_format is ExportFormat.CSV:
+            yield to_csv([fields])
+
+        async for rows in CRUDModel.stream_filtered(
+            db, greater=greater, lower=lower, chunk_size=EXPORT_CHUNK_SIZE
+        ):
+            if export_format is ExportFormat.CSV:
+                yield to_csv(rows)
+            else:
+                yield to_ndjson(fields, rows)
+
+    @staticmethod
+    def _page_headers(
+        last_key: tuple[Decimal | None, int] | None, count: int, limit: int | None
+    ) -> dict[str, str]:
+        """
+        Header con el cursor de la siguiente página a partir de (average_price, id) del
+        último modelo, si la página está completa.
+        """
+        if last_key is None or limit is None or count < limit:
+            return {}
+        return {NEXT_CURSOR_HEADER: encode_cursor(*last_key)}
+
+    @staticmethod
+    def _parse_ids(ids: str) -> tuple[int, ...]:
+        try:
+            return parse_ids(ids, MAX_PAGE_SIZE)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     @staticmethod
-    def update_model_price(
-        db: Session, model_id: int, model_schema: VehicleModelUpdateSchema
-    ) -> VehicleModelModel:
+    def _parse_fields(fields: str | None) -> tuple[str, ...] | None:
+        try:
+            return parse_fields(fields, VehicleModelSchema)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    @staticmethod
+    def _decode_after(after: str | None) -> tuple[Decimal | None, int] | None:
+        if after is None:
+            return None
+        try:
+            average_price, model_id = decode_cursor(after, size=2)
+            return (
+                None if average_price is None else Decimal(str(average_price)),
+                int(model_id),
+            )
+        except (ValueError, TypeError, ArithmeticError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El cursor '{after}' no es válido.",
+            )
+
+    @staticmethod
+    async def update_model_price(
+        db: AsyncSession, model_id: int, model_schema: VehicleModelUpdateSchema
+    ) -> VehicleModelModel | Row[Any]:
         """Actualiza el precio de un modelo específico."""
-        db_model = CRUDModel.get_by_id(db, model_id=model_id)
+        update_data = model_schema.model_dump(exclude_unset=True)
+        if "average_price" not in update_data:
+            db_model = await CRUDModel.get_by_id(db, model_id=model_id)
+        else:
+            model_crud = CRUDModel(VehicleModelModel)
+            db_model = await model_crud.update_price(
+                db, model_id=model_id, average_price=update_data["average_price"]
+            )
         if not db_model:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"El modelo con id '{model_id}' no existe.",
             )
 
-        update_data = model_schema.model_dump(exclude_unset=True)
-        return CRUDModel.update(db, db_model=db_model, model_in=update_data)
+        if update_data:
+            price_index.upsert([db_model])
+            response_cache.invalidate(
+                "brands", f"brand_models:{db_model.brand_id}", "models"
+            )
+        return db_model
+
+    @staticmethod
+    async def update_model_prices(
+        db: AsyncSession, prices_in: Sequence[VehicleModelPriceUpdateSchema]
+    ) -> VehicleModelBulkPriceResultSchema:
+        """
+        Actualiza el precio de varios modelos en una sola transacción.
+        Si un id se repite se aplica su último precio; los ids que no existen se reportan.
+        """
+        new_prices = {price_in.id: price_in.average_price for price_in in prices_in}
+        model_crud = CRUDModel(VehicleModelModel)
+        # Orden por id para que las actualizaciones concurrentes bloqueen en el mismo orden.
+        rows = await model_crud.bulk_update_prices(
+            db, prices=sorted(new_prices.items())
+        )
+        if rows:
+            price_index.upsert(rows)
+            response_cache.invalidate(
+                "brands",
+                "models",
+                *{f"brand_models:{row.brand_id}" for row in rows},
+            )
+
+        updated_ids = {row.id for row in rows}
+        return VehicleModelBulkPriceResultSchema(
+            updated=len(rows),
+            not_found=[
+                model_id for model_id in new_prices if model_id not in updated_ids
+            ],
+        )
+
+    @staticmethod
+    async def set_model_active(
+        db: AsyncSession, model_id: int, is_active: bool
+    ) -> Row[Any]:
+        """
+        Archiva o restaura un modelo. Un modelo archivado no aparece en los listados ni
+        cuenta en el precio promedio de su marca, y su precio ya no se puede editar.
+        """
+        model_crud = CRUDModel(VehicleModelModel)
+        row = await model_crud.set_active(db, model_id=model_id, is_active=is_active)
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"El modelo con id '{model_id}' no existe.",
+            )
+        price_index.upsert([row])
+        response_cache.invalidate("brands", f"brand_models:{row.brand_id}", "models")
+        return row
@@ -1,10 +1,10 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from core.config import settings
+from core.config import get_settings
 
 
 def now() -> datetime:
     """
     Devuelve la fecha y hora actual con la zona horaria definida en la configuración.
     """
-    return datetime.now(ZoneInfo(settings.TIME_ZONE))
+    return datetime.now(ZoneInfo(get_settings().TIME_ZONE))
@@ -0,0 +1,14 @@
+def make_etag(version: int) -> str:
+    """ETag fuerte para una versión del catálogo."""
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Indica si el header If-None-Match coincide con `etag`. Usa la comparación débil
+    que exige If-None-Match: se ignora el prefijo W/ de las etiquetas recibidas.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in tags)
@@ -0,0 +1,32 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, Iterable, Sequence
+
+from shared.responses import dumps
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        if self is ExportFormat.CSV:
+            return "text/csv"
+        return "application/x-ndjson"
+
+
+def to_ndjson(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Serializa las filas como JSON delimitado por saltos de línea (un objeto por fila),
+    con el mismo formato que las respuestas JSON de la API.
+    """
+    return b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def to_csv(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Serializa las filas como CSV, sin encabezado."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> tuple[str, ...] | None:
+    """
+    Interpreta el parámetro `fields` (nombres separados por comas) contra los campos de
+    `schema`. Devuelve los campos en el orden del esquema, o None si no se indicó.
+    Lanza ValueError si algún campo no existe o la lista está vacía.
+    """
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - schema.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(unknown))}.")
+    if not requested:
+        raise ValueError("Se debe indicar al menos un campo.")
+    return tuple(name for name in schema.model_fields if name in requested)
@@ -0,0 +1,47 @@
+from typing import Mapping, Sequence, TypeVar
+
+from core.constants import MISSING_IDS_HEADER
+
+T = TypeVar("T")
+
+
+def parse_ids(ids: str, max_ids: int) -> tuple[int, ...]:
+    """
+    Interpreta una lista de ids separados por comas. Devuelve los ids sin repetir, en el
+    orden en que se pidieron. Lanza ValueError si algún id no es un entero, si la lista
+    está vacía o si tiene más de `max_ids` ids.
+    """
+    parsed: dict[int, None] = {}
+    for token in ids.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        try:
+            parsed[int(token)] = None
+        except ValueError:
+            raise ValueError(f"El id '{token}' no es un entero.")
+
+    if not parsed:
+        raise ValueError("Se debe indicar al menos un id.")
+    if len(parsed) > max_ids:
+        raise ValueError(f"Se pueden consultar a lo más {max_ids} ids por petición.")
+    return tuple(parsed)
+
+
+def in_request_order(
+    ids: Sequence[int], found: Mapping[int, T]
+) -> tuple[list[T], list[int]]:
+    """
+    Ordena los elementos encontrados según `ids` y devuelve también los ids que no
+    se encontraron, en el mismo orden.
+    """
+    items = [found[item_id] for item_id in ids if item_id in found]
+    missing = [item_id for item_id in ids if item_id not in found]
+    return items, missing
+
+
+def missing_ids_headers(missing: Sequence[int]) -> dict[str, str]:
+    """Header con los ids que no se encontraron, si los hay."""
+    if not missing:
+        return {}
+    return {MISSING_IDS_HEADER: ",".join(map(str, missing))}
@@ -0,0 +1,54 @@
+import json
+from typing import Any, Iterator, TextIO
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(file: TextIO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Recorre los elementos de un arreglo JSON leyendo el archivo por bloques,
+    sin cargar el documento completo en memoria.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip(characters: str) -> None:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    skip(_WHITESPACE)
+    if buffer[position : position + 1] != "[":
+        raise ValueError("El archivo no contiene un arreglo JSON.")
+    position += 1
+
+    while True:
+        skip(_WHITESPACE + ",")
+        if position >= len(buffer):
+            raise ValueError("El arreglo JSON está incompleto.")
+        if buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if fill():
+                continue
+            raise
+        # Un valor que termina justo al final del bloque puede estar cortado (p. ej. un número).
+        if end == len(buffer) and not eof and fill():
+            continue
+        position = end
+        yield item
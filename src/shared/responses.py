@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Any, Mapping, NamedTuple, Sequence
+
+import orjson
+from sqlalchemy import Row
+from starlette.responses import JSONResponse, Response
+
+
+def _default(value: Any) -> Any:
+    # Mismo formato que Pydantic en los campos Decimal.
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+class JSONBody(NamedTuple):
+    """Cuerpo JSON ya serializado y los headers que deben acompañarlo."""
+
+    body: bytes
+    headers: Mapping[str, str]
+
+
+def rows_to_dicts(
+    rows: Sequence[Row[Any]], fields: Sequence[str] | None = None
+) -> list[dict[str, Any]]:
+    """
+    Convierte filas de SQLAlchemy en diccionarios para serializarlas. Lee los nombres
+    de las columnas una sola vez, a diferencia de Row._asdict en cada fila.
+    Con `fields` solo se conservan las primeras columnas, con esos nombres.
+    """
+    if not rows:
+        return []
+    if fields is None:
+        fields = rows[0]._fields
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializa a JSON con orjson con el mismo formato que Pydantic: Decimal como texto
+    y fechas en ISO 8601 terminadas en Z cuando están en UTC.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class RawJSONResponse(JSONResponse):
+    """Respuesta JSON serializada con orjson que acepta el cuerpo ya serializado."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def json_response(payload: JSONBody, response: Response) -> RawJSONResponse:
+    """
+    Respuesta con el JSON ya serializado. FastAPI no valida ni vuelve a serializar las
+    respuestas que devuelve el endpoint, así que se copian los headers que el endpoint
+    y sus dependencias agregaron a `response`.
+    """
+    response.headers.update(payload.headers)
+    return RawJSONResponse(payload.body, headers=response.headers)
@@ -1,25 +1,31 @@
 import pytest
-from unittest.mock import Mock
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.testclient import TestClient
-from decimal import Decimal
 
 from main import app
-from core.database import get_db
+from core.cache import NullCacheBackend, response_cache
+from core.database import get_db, get_read_db, get_read_session_factory
+
+
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Las pruebas de servicios no usan el cache de lecturas."""
+    monkeypatch.setattr(response_cache, "backend", NullCacheBackend())
 
 
 @pytest.fixture
 def mock_db_session():
     """Mock de la sesión de base de datos."""
-    session = Mock(spec=Session)
-    session.query = Mock()
+    session = Mock(spec=AsyncSession)
+    session.execute = AsyncMock(return_value=Mock())
+    session.scalar = AsyncMock()
+    session.get = AsyncMock()
     session.add = Mock()
-    session.commit = Mock()
-    session.refresh = Mock()
-    session.delete = Mock()
-    session.filter = Mock()
-    session.first = Mock()
-    session.all = Mock()
+    session.commit = AsyncMock()
+    session.refresh = AsyncMock()
+    session.delete = AsyncMock()
     return session
 
 
@@ -27,10 +33,14 @@ def mock_db_session():
 def client(mock_db_session):
     """Cliente de prueba con base de datos mockeada."""
 
-    def override_get_db():
+    async def override_get_db():
         yield mock_db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_session_factory] = lambda: asynccontextmanager(
+        override_get_db
+    )
     test_client = TestClient(app)
     yield test_client
     app.dependency_overrides.clear()
@@ -50,11 +60,11 @@ def sample_brand_data():
 
 @pytest.fixture
 def sample_model_data():
-    """Datos de ejemplo para un modelo."""
+    """Datos de ejemplo para un modelo, con el precio como float igual que las consultas."""
     return {
         "id": 1,
         "name": "Corolla",
-        "average_price": Decimal("250000.50"),
+        "average_price": 250000.5,
         "brand_id": 1,
         "is_active": True,
         "created_at": "2024-01-01T00:00:00",
@@ -90,7 +100,7 @@ def sample_models_list():
         {
             "id": 1,
             "name": "Corolla",
-            "average_price": Decimal("250000.50"),
+            "average_price": 250000.5,
             "brand_id": 1,
             "is_active": True,
             "created_at": "2024-01-01T00:00:00",
@@ -99,7 +109,7 @@ def sample_models_list():
         {
             "id": 2,
             "name": "Camry",
-            "average_price": Decimal("350000.75"),
+            "average_price": 350000.75,
             "brand_id": 1,
             "is_active": True,
             "created_at": "2024-01-01T00:00:00",
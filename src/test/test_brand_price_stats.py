@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from crud.brand_price_stats import CRUDBrandPriceStats
+
+
+class TestBrandPriceStats:
+    def test_collect_deltas_added_models(self):
+        """Prueba que los modelos agregados suman precio y conteo a su marca."""
+        deltas = CRUDBrandPriceStats.collect_deltas(
+            added=[(1, Decimal("250000.50")), (1, 350000.0), (2, Decimal("400000"))]
+        )
+
+        assert deltas == {
+            1: (Decimal("600000.50"), 2),
+            2: (Decimal("400000"), 1),
+        }
+
+    def test_collect_deltas_ignores_null_prices(self):
+        """Prueba que los modelos sin precio no afectan el agregado."""
+        deltas = CRUDBrandPriceStats.collect_deltas(
+            added=[(1, None)], removed=[(2, None)]
+        )
+
+        assert deltas == {}
+
+    def test_collect_deltas_price_update(self):
+        """Prueba que un cambio de precio solo mueve la suma de la marca."""
+        deltas = CRUDBrandPriceStats.collect_deltas(
+            added=[(1, 300000.0)], removed=[(1, Decimal("250000.00"))]
+        )
+
+        assert deltas == {1: (Decimal("50000.00"), 0)}
+
+    def test_collect_deltas_price_removed(self):
+        """Prueba que quitar el precio de un modelo lo descuenta de su marca."""
+        deltas = CRUDBrandPriceStats.collect_deltas(
+            added=[(1, None)], removed=[(1, Decimal("250000.00"))]
+        )
+
+        assert deltas == {1: (Decimal("-250000.00"), -1)}
+
+    def test_collect_deltas_unchanged_price(self):
+        """Prueba que reescribir el mismo precio no genera cambios."""
+        deltas = CRUDBrandPriceStats.collect_deltas(
+            added=[(1, 250000.0)], removed=[(1, Decimal("250000.00"))]
+        )
+
+        assert deltas == {}
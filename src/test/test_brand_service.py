@@ -0,0 +1,301 @@
+import orjson
+import pytest
+from collections import namedtuple
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+
+from core.constants import MISSING_IDS_HEADER, NEXT_CURSOR_HEADER
+from services.brand_service import BrandService
+from schemas.brand import (
+    VehicleBrandCreateSchema,
+    VehicleBrandInclude,
+    VehicleBrandWithModelsSchema,
+)
+from schemas.model import VehicleModelBulkStatus, VehicleModelCreateSchema
+
+
+class TestBrandService:
+    async def test_get_all_brands_with_average_price(self, mock_db_session):
+        """Prueba que el promedio se redondea y se serializa como en el esquema."""
+        # Arrange
+        BrandRow = namedtuple("BrandRow", ["id", "name", "average_price"])
+        mock_db_session.execute.return_value.all.return_value = [
+            BrandRow(1, "Acura", Decimal("254854.5")),
+            BrandRow(2, "Audi", Decimal("254691.51")),
+        ]
+
+        # Act
+        result = await BrandService.get_all_brands_with_average_price(mock_db_session)
+
+        # Assert
+        assert orjson.loads(result.body) == [
+            {"id": 1, "name": "Acura", "average_price": "254854"},
+            {"id": 2, "name": "Audi", "average_price": "254692"},
+        ]
+
+    async def test_get_brand_models_next_cursor(self, mock_db_session):
+        """Prueba que una página completa devuelve el cursor del último modelo."""
+        # Arrange
+        mock_db_session.get.return_value = Mock(id=1)
+        ModelRow = namedtuple("ModelRow", ["id", "name", "average_price"])
+        mock_db_session.execute.return_value.all.return_value = [
+            ModelRow(1, "ILX", Decimal("250000.50")),
+            ModelRow(2, "MDX", None),
+        ]
+
+        # Act
+        result = await BrandService.get_brand_models_by_id(mock_db_session, 1, limit=2)
+
+        # Assert
+        assert orjson.loads(result.body) == [
+            {"id": 1, "name": "ILX", "average_price": "250000.50"},
+            {"id": 2, "name": "MDX", "average_price": None},
+        ]
+        cursor = result.headers[NEXT_CURSOR_HEADER]
+        assert BrandService._decode_after(cursor) == 2
+
+    async def test_get_all_brands_with_fields(self, mock_db_session):
+        """Prueba que `fields` reduce el SELECT y omite el redondeo del promedio."""
+        # Arrange
+        BrandRow = namedtuple("BrandRow", ["name", "id"])
+        mock_db_session.execute.return_value.all.return_value = [BrandRow("Acura", 1)]
+
+        # Act
+        result = await BrandService.get_all_brands_with_average_price(
+            mock_db_session, "name"
+        )
+
+        # Assert
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert [column.name for column in stmt.selected_columns] == ["name", "id"]
+        assert orjson.loads(result.body) == [{"name": "Acura"}]
+
+    async def test_get_all_brands_include_models(self, mock_db_session):
+        """
+        Prueba que `include=models` carga los modelos de todas las marcas con una sola
+        consulta adicional y los anida en cada marca.
+        """
+        # Arrange
+        BrandRow = namedtuple("BrandRow", ["id", "name", "average_price"])
+        ModelRow = namedtuple("ModelRow", ["id", "name", "average_price", "brand_id"])
+        brands = Mock()
+        brands.all.return_value = [
+            BrandRow(1, "Acura", Decimal("254854.5")),
+            BrandRow(2, "Audi", Decimal("254691.51")),
+        ]
+        models = Mock()
+        models.all.return_value = [
+            ModelRow(10, "ILX", Decimal("254854.50"), 1),
+            ModelRow(11, "A3", Decimal("254691.51"), 2),
+            ModelRow(12, "A4", None, 2),
+        ]
+        mock_db_session.execute.side_effect = [brands, models]
+
+        # Act
+        result = await BrandService.get_all_brands_with_average_price(
+            mock_db_session, include=VehicleBrandInclude.MODELS
+        )
+
+        # Assert
+        assert mock_db_session.execute.await_count == 2
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert "vehicle.models.brand_id = ANY" in str(stmt.whereclause)
+        body = orjson.loads(result.body)
+        assert body[0]["models"] == [
+            {"id": 10, "name": "ILX", "average_price": "254854.50"}
+        ]
+        assert [model["id"] for model in body[1]["models"]] == [11, 12]
+        TypeAdapter(list[VehicleBrandWithModelsSchema]).validate_python(body)
+
+    async def test_get_brands_by_ids(self, mock_db_session):
+        """
+        Prueba que la búsqueda por ids incluye marcas sin precio, respeta el orden
+        pedido y reporta los ids que no existen.
+        """
+        # Arrange
+        BrandRow = namedtuple("BrandRow", ["id", "name", "average_price"])
+        mock_db_session.execute.return_value.all.return_value = [
+            BrandRow(1, "Acura", Decimal("254854.5")),
+            BrandRow(3, "Nueva", None),
+        ]
+
+        # Act
+        result = await BrandService.get_brands_by_ids(mock_db_session, "3,9,1")
+
+        # Assert
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert "LEFT OUTER JOIN" in str(stmt)
+        assert "vehicle.brands.id = ANY" in str(stmt.whereclause)
+        assert orjson.loads(result.body) == [
+            {"id": 3, "name": "Nueva", "average_price": None},
+            {"id": 1, "name": "Acura", "average_price": "254854"},
+        ]
+        assert result.headers == {MISSING_IDS_HEADER: "9"}
+
+    async def test_get_brand_models_with_fields(self, mock_db_session):
+        """Prueba que el id se selecciona para el cursor aunque no se pida."""
+        # Arrange
+        mock_db_session.get.return_value = Mock(id=1)
+        ModelRow = namedtuple("ModelRow", ["average_price", "id"])
+        mock_db_session.execute.return_value.all.return_value = [
+            ModelRow(Decimal("250000.50"), 1),
+            ModelRow(None, 2),
+        ]
+
+        # Act
+        result = await BrandService.get_brand_models_by_id(
+            mock_db_session, 1, fields="average_price", limit=3
+        )
+
+        # Assert
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert [column.name for column in stmt.selected_columns] == [
+            "average_price",
+            "id",
+        ]
+        assert orjson.loads(result.body) == [
+            {"average_price": "250000.50"},
+            {"average_price": None},
+        ]
+        assert result.headers == {}
+
+    async def test_create_brand_conflict(self, mock_db_session):
+        """Prueba que una marca repetida responde 409 sin consultas adicionales."""
+        # Arrange
+        mock_db_session.scalar.return_value = None
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await BrandService.create_brand(
+                mock_db_session, VehicleBrandCreateSchema(name="Toyota")
+            )
+
+        assert exc_info.value.status_code == 409
+        stmt = mock_db_session.scalar.await_args.args[0]
+        assert "ON CONFLICT (name) DO NOTHING RETURNING" in str(stmt)
+        mock_db_session.commit.assert_not_awaited()
+
+    async def test_create_brand_model_single_statement(self, mock_db_session):
+        """Prueba que crear un modelo usa un solo INSERT sin consultas previas."""
+        # Arrange
+        mock_model = SimpleNamespace(
+            id=1, name="Corolla", brand_id=1, average_price=None
+        )
+        mock_db_session.scalar.return_value = mock_model
+
+        # Act
+        result = await BrandService.create_brand_model(
+            mock_db_session, 1, VehicleModelCreateSchema(name="Corolla")
+        )
+
+        # Assert
+        assert result == mock_model
+        stmt = mock_db_session.scalar.await_args.args[0]
+        assert "INSERT INTO vehicle.models" in str(stmt)
+        assert "FROM vehicle.brands" in str(stmt)
+        mock_db_session.get.assert_not_awaited()
+        mock_db_session.commit.assert_awaited_once()
+
+    @pytest.mark.parametrize("brand,status_code", [(None, 404), (Mock(id=1), 409)])
+    async def test_create_brand_model_not_inserted(
+        self, mock_db_session, brand, status_code
+    ):
+        """Prueba que si no se insertó el modelo se distingue marca inexistente de duplicado."""
+        # Arrange
+        mock_db_session.scalar.return_value = None
+        mock_db_session.get.return_value = brand
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await BrandService.create_brand_model(
+                mock_db_session, 1, VehicleModelCreateSchema(name="Corolla")
+            )
+
+        assert exc_info.value.status_code == status_code
+        mock_db_session.commit.assert_not_awaited()
+
+    async def test_create_brand_models_reports_conflicts(self, mock_db_session):
+        """Prueba que la carga masiva reporta creados y conflictos en el orden recibido."""
+        # Arrange
+        mock_db_session.get.return_value = Mock(id=1)
+        mock_db_session.execute.return_value.all.return_value = [
+            SimpleNamespace(id=10, name="Corolla", brand_id=1, average_price=250000.5),
+        ]
+        models_in = [
+            VehicleModelCreateSchema(name="Corolla", average_price=250000.5),
+            VehicleModelCreateSchema(name="Camry"),
+            VehicleModelCreateSchema(name="Corolla", average_price=300000),
+        ]
+
+        # Act
+        result = await BrandService.create_brand_models(mock_db_session, 1, models_in)
+
+        # Assert
+        assert result.created == 1
+        assert result.conflicts == 2
+        assert [(item.name, item.status, item.id) for item in result.items] == [
+            ("Corolla", VehicleModelBulkStatus.CREATED, 10),
+            ("Camry", VehicleModelBulkStatus.CONFLICT, None),
+            ("Corolla", VehicleModelBulkStatus.CONFLICT, None),
+        ]
+        insert_params = mock_db_session.execute.await_args_list[0].args[1]
+        assert [params["name"] for params in insert_params] == ["Corolla", "Camry"]
+        bump_stmt = mock_db_session.execute.await_args_list[-1].args[0]
+        assert "UPDATE vehicle.catalog_version" in str(bump_stmt)
+        mock_db_session.commit.assert_awaited_once()
+
+    async def test_create_brand_models_in_batches(self, mock_db_session):
+        """Prueba que los modelos se insertan en lotes de BULK_INSERT_BATCH_SIZE."""
+        # Arrange
+        mock_db_session.get.return_value = Mock(id=1)
+        mock_db_session.execute.return_value.all.return_value = []
+        models_in = [VehicleModelCreateSchema(name=f"M{i}") for i in range(2500)]
+
+        # Act
+        result = await BrandService.create_brand_models(mock_db_session, 1, models_in)
+
+        # Assert
+        assert result.conflicts == 2500
+        batch_sizes = [
+            len(call.args[1]) for call in mock_db_session.execute.await_args_list
+        ]
+        assert batch_sizes == [1000, 1000, 500]
+        mock_db_session.commit.assert_awaited_once()
+
+    async def test_create_brand_models_brand_not_found(self, mock_db_session):
+        """Prueba la carga masiva en una marca que no existe."""
+        # Arrange
+        mock_db_session.get.return_value = None
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await BrandService.create_brand_models(
+                mock_db_session, 999, [VehicleModelCreateSchema(name="Corolla")]
+            )
+
+        assert exc_info.value.status_code == 404
+        mock_db_session.execute.assert_not_awaited()
+
+    async def test_archived_brand_models_not_found(self, mock_db_session):
+        """Prueba que los modelos de una marca archivada responden 404."""
+        mock_db_session.get.return_value = Mock(id=1, is_active=False)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await BrandService.get_brand_models_by_id(mock_db_session, 1)
+
+        assert exc_info.value.status_code == 404
+        mock_db_session.execute.assert_not_awaited()
+
+    async def test_set_brand_active_not_found(self, mock_db_session):
+        """Prueba archivar una marca que no existe."""
+        mock_db_session.scalar.return_value = None
+        mock_db_session.get.return_value = None
+
+        with pytest.raises(HTTPException) as exc_info:
+            await BrandService.set_brand_active(mock_db_session, 999, False)
+
+        assert exc_info.value.status_code == 404
+        mock_db_session.commit.assert_not_awaited()
@@ -0,0 +1,254 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.cache import (
+    MemoryCacheBackend,
+    NullCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    set_read_scope,
+)
+from shared.responses import JSONBody
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Backends de cache con capacidad para dos entradas."""
+    if request.param == "sqlite":
+        return SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_entries=2)
+    return MemoryCacheBackend(max_entries=2)
+
+
+class TestCacheBackends:
+    def test_get_set(self, backend):
+        """Prueba guardar y leer una entrada."""
+        backend.set("a", b"1", ttl=60)
+
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+
+    def test_expired_entry(self, backend):
+        """Prueba que una entrada expirada no se devuelve."""
+        with patch("core.cache.time.monotonic", return_value=0), patch(
+            "core.cache.time.time", return_value=0
+        ):
+            backend.set("a", b"1", ttl=10)
+        with patch("core.cache.time.monotonic", return_value=11), patch(
+            "core.cache.time.time", return_value=11
+        ):
+            assert backend.get("a") is None
+
+    def test_lru_eviction(self, backend):
+        """Prueba que al exceder la capacidad se descarta la entrada menos usada."""
+        now = time.time()
+        with patch("core.cache.time.time", side_effect=[now + i for i in range(4)]):
+            backend.set("a", b"1", ttl=60)
+            backend.set("b", b"2", ttl=60)
+            assert backend.get("a") == b"1"
+            backend.set("c", b"3", ttl=60)
+
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
+
+    def test_invalidate_bumps_generation(self, backend):
+        """Prueba que invalidar un namespace incrementa su generación."""
+        assert backend.generation("brands") == 0
+
+        backend.invalidate("brands")
+
+        assert backend.generation("brands") == 1
+        assert backend.generation("models") == 0
+
+
+class TestResponseCache:
+    async def test_get_or_load_json_hit_and_miss(self):
+        """Prueba que la segunda lectura con los mismos parámetros no llama al loader."""
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        loader = AsyncMock(return_value=([1, 2], {"X-Next-Cursor": "abc"}))
+
+        first = await cache.get_or_load_json("models", {"greater": 1}, loader)
+        second = await cache.get_or_load_json("models", {"greater": 1}, loader)
+
+        assert first == second == JSONBody(b"[1,2]", {"X-Next-Cursor": "abc"})
+        loader.assert_awaited_once()
+        assert cache.stats()["hits"] == {"models": 1}
+        assert cache.stats()["misses"] == {"models": 1}
+
+    async def test_get_or_load_json_keyed_by_params(self):
+        """Prueba que parámetros distintos usan entradas distintas."""
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        loader = AsyncMock(side_effect=[([1], {}), ([2], {})])
+
+        assert await cache.get_or_load_json(
+            "models", {"greater": 1}, loader
+        ) == JSONBody(b"[1]", {})
+        assert await cache.get_or_load_json(
+            "models", {"greater": 2}, loader
+        ) == JSONBody(b"[2]", {})
+
+    async def test_get_or_load_json_keyed_by_catalog_version(self):
+        """
+        Prueba que una petición que leyó una versión nueva del catálogo no recibe las
+        entradas cargadas con la anterior, aunque el namespace no se haya invalidado en
+        este proceso.
+        """
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        loader = AsyncMock(side_effect=[([1], {}), ([2], {})])
+
+        async def read(version: int) -> JSONBody:
+            # Cada petición corre en su propia tarea, con su propio contexto.
+            set_read_scope(version)
+            return await cache.get_or_load_json("models", {}, loader)
+
+        assert await asyncio.create_task(read(1)) == JSONBody(b"[1]", {})
+        assert await asyncio.create_task(read(1)) == JSONBody(b"[1]", {})
+        assert await asyncio.create_task(read(2)) == JSONBody(b"[2]", {})
+        assert loader.await_count == 2
+
+    async def test_get_or_load_json_keyed_by_primary(self):
+        """
+        Prueba que quien lee del primario no recibe entradas cargadas desde una réplica
+        ni se une a una carga en curso contra ella.
+        """
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        release = asyncio.Event()
+
+        async def load_from_replica():
+            await release.wait()
+            return [1], {}
+
+        async def read(primary: bool, loader) -> JSONBody:
+            set_read_scope(1, primary=primary)
+            return await cache.get_or_load_json("models", {}, loader)
+
+        replica_read = asyncio.create_task(read(False, load_from_replica))
+        await asyncio.sleep(0)
+        primary_loader = AsyncMock(return_value=([2], {}))
+
+        assert await asyncio.create_task(read(True, primary_loader)) == JSONBody(
+            b"[2]", {}
+        )
+        release.set()
+        assert await replica_read == JSONBody(b"[1]", {})
+        assert await asyncio.create_task(read(True, primary_loader)) == JSONBody(
+            b"[2]", {}
+        )
+        primary_loader.assert_awaited_once()
+
+    @pytest.mark.parametrize("method", ["generation", "get", "set"])
+    async def test_backend_errors_fall_back_to_loader(self, tmp_path, method):
+        """
+        Prueba que un error de SQLite (archivo bloqueado o dañado) se trata como un
+        fallo del cache y la respuesta se carga con el loader.
+        """
+        backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_entries=10)
+        cache = ResponseCache(backend, ttl=60)
+        loader = AsyncMock(return_value=([1], {}))
+
+        with patch.object(
+            backend, method, side_effect=sqlite3.OperationalError("database is locked")
+        ):
+            result = await cache.get_or_load_json("models", {}, loader)
+            cache.invalidate("models")
+
+        assert result == JSONBody(b"[1]", {})
+        loader.assert_awaited_once()
+        assert cache.stats()["errors"]["models"] >= 1
+
+    async def test_invalidate(self):
+        """Prueba que invalidar un namespace obliga a recargar solo ese namespace."""
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        models_loader = AsyncMock(side_effect=[([1], {}), ([2], {})])
+        brands_loader = AsyncMock(return_value=([3], {}))
+        await cache.get_or_load_json("models", {}, models_loader)
+        await cache.get_or_load_json("brands", {}, brands_loader)
+
+        cache.invalidate("models")
+
+        assert await cache.get_or_load_json("models", {}, models_loader) == JSONBody(
+            b"[2]", {}
+        )
+        assert await cache.get_or_load_json("brands", {}, brands_loader) == JSONBody(
+            b"[3]", {}
+        )
+        brands_loader.assert_awaited_once()
+
+    async def test_disabled(self):
+        """Prueba que sin backend siempre se llama al loader."""
+        cache = ResponseCache(NullCacheBackend(), ttl=60)
+        loader = AsyncMock(return_value=([1], {}))
+
+        await cache.get_or_load_json("models", {}, loader)
+        await cache.get_or_load_json("models", {}, loader)
+
+        assert loader.await_count == 2
+
+    async def test_coalesces_concurrent_loads(self):
+        """Prueba que las lecturas concurrentes iguales comparten una sola carga."""
+        cache = ResponseCache(NullCacheBackend(), ttl=60)
+        release = asyncio.Event()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return [1], {}
+
+        tasks = [
+            asyncio.create_task(cache.get_or_load_json("brands", {}, loader))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        assert cache.stats()["in_flight"] == 1
+        release.set()
+
+        assert await asyncio.gather(*tasks) == [JSONBody(b"[1]", {})] * 5
+        assert calls == 1
+        assert cache.stats()["coalesced"] == {"brands": 4}
+        assert cache.stats()["in_flight"] == 0
+
+    async def test_coalesced_loads_share_errors(self):
+        """Prueba que el error de la carga llega a todas las peticiones agrupadas."""
+        cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            raise ValueError("sin conexión")
+
+        tasks = [
+            asyncio.create_task(cache.get_or_load_json("brands", {}, loader))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(cache.backend) == 0
+
+    async def test_cancelled_leader_hands_over_load(self):
+        """Prueba que si se cancela la petición que carga, otra repite la carga."""
+        cache = ResponseCache(NullCacheBackend(), ttl=60)
+        release = asyncio.Event()
+        loader = AsyncMock(return_value=([2], {}))
+
+        async def first_loader():
+            await release.wait()
+            return [1], {}
+
+        leader = asyncio.create_task(cache.get_or_load_json("brands", {}, first_loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load_json("brands", {}, loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == JSONBody(b"[2]", {})
+        assert leader.cancelled()
+        assert cache.stats()["coalesced"] == {}
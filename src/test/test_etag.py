@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.cache import MemoryCacheBackend, response_cache
+from shared.etag import etag_matches, make_etag
+from shared.responses import JSONBody
+
+
+class TestEtagMatches:
+    @pytest.mark.parametrize(
+        "if_none_match,expected",
+        [
+            (None, False),
+            ("", False),
+            ('"7"', True),
+            ('W/"7"', True),
+            ('"6", "7"', True),
+            ('"6"', False),
+            ("*", True),
+        ],
+    )
+    def test_etag_matches(self, if_none_match, expected):
+        """Prueba la comparación de If-None-Match con el ETag actual."""
+        assert etag_matches(if_none_match, make_etag(7)) is expected
+
+
+class TestCatalogEtag:
+    def test_returns_etag(self, client, mock_db_session):
+        """Prueba que la lista de marcas incluye el ETag de la versión del catálogo."""
+        # Arrange
+        mock_db_session.scalar.return_value = 7
+
+        # Act
+        with patch(
+            "api.v1.brands.BrandService.get_all_brands_with_average_price",
+            return_value=JSONBody(b"[]", {}),
+        ) as get_brands:
+            response = client.get("/api/v1/brands/")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"7"'
+        get_brands.assert_awaited_once()
+
+    @pytest.mark.parametrize(
+        "path,service",
+        [
+            (
+                "/api/v1/brands/",
+                "api.v1.brands.BrandService.get_all_brands_with_average_price",
+            ),
+            ("/api/v1/models/", "api.v1.models.ModelService.get_all_models_filtered"),
+        ],
+    )
+    def test_not_modified(self, client, mock_db_session, path, service):
+        """Prueba que con el ETag vigente se responde 304 sin consultar el catálogo."""
+        # Arrange
+        mock_db_session.scalar.return_value = 7
+
+        # Act
+        with patch(service) as load:
+            response = client.get(path, headers={"If-None-Match": '"7"'})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == '"7"'
+        load.assert_not_awaited()
+        mock_db_session.scalar.assert_awaited_once()
+
+    def test_cache_keyed_by_etag_version(self, client, mock_db_session, monkeypatch):
+        """
+        Prueba que los datos cacheados con una versión del catálogo no se sirven con el
+        ETag de una versión posterior.
+        """
+        # Arrange
+        monkeypatch.setattr(response_cache, "backend", MemoryCacheBackend(10))
+        load = AsyncMock(side_effect=[([{"id": 1}], {}), ([{"id": 2}], {})])
+
+        # Act
+        with patch("api.v1.brands.BrandService._load_brands_with_average_price", load):
+            responses = []
+            for version in (7, 7, 8):
+                mock_db_session.scalar.return_value = version
+                responses.append(client.get("/api/v1/brands/"))
+
+        # Assert
+        assert [(r.headers["ETag"], r.json()) for r in responses] == [
+            ('"7"', [{"id": 1}]),
+            ('"7"', [{"id": 1}]),
+            ('"8"', [{"id": 2}]),
+        ]
+        assert load.await_count == 2
@@ -0,0 +1,38 @@
+import io
+
+import pytest
+
+from shared.json_stream import iter_json_array
+
+ITEMS = [
+    {"id": 1, "name": "ILX", "average_price": 303176, "brand_name": "Acura"},
+    {"id": 2, "name": "Série 3", "average_price": 0, "brand_name": "BMW"},
+    {"id": 3, "name": 'A4, "]"', "average_price": 12.5, "brand_name": "Audi"},
+]
+DOCUMENT = '[{"id": 1, "name": "ILX", "average_price": 303176, "brand_name": "Acura"},\n{"id": 2, "name": "Série 3", "average_price": 0, "brand_name": "BMW"} ,\n  {"id": 3, "name": "A4, \\"]\\"", "average_price": 12.5, "brand_name": "Audi"}\n]\n'
+
+
+class TestIterJsonArray:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1024])
+    def test_items_across_chunks(self, chunk_size):
+        """Prueba que los elementos se leen igual sin importar el tamaño del bloque."""
+        items = list(iter_json_array(io.StringIO(DOCUMENT), chunk_size=chunk_size))
+
+        assert items == ITEMS
+
+    @pytest.mark.parametrize("chunk_size", [1, 3])
+    def test_numbers_cut_between_chunks(self, chunk_size):
+        """Prueba que un número cortado entre bloques no se lee a medias."""
+        document = "[12345, 678]"
+
+        assert list(iter_json_array(io.StringIO(document), chunk_size)) == [12345, 678]
+
+    def test_empty_array(self):
+        """Prueba un arreglo vacío."""
+        assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+    @pytest.mark.parametrize("document", ["", '{"id": 1}', '[{"id": 1}, {"id"'])
+    def test_invalid_document(self, document):
+        """Prueba que un documento que no es un arreglo completo falla."""
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(document), chunk_size=4))
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.metrics import (
+    Histogram,
+    MetricsMiddleware,
+    RouteMetrics,
+    _after_cursor_execute,
+    _before_cursor_execute,
+)
+
+
+def execute_statement():
+    """Simula los eventos del engine al ejecutar una sentencia."""
+    context = SimpleNamespace()
+    _before_cursor_execute(None, None, "SELECT 1", None, context, False)
+    _after_cursor_execute(None, None, "SELECT 1", None, context, False)
+
+
+class TestHistogram:
+    def test_samples_are_cumulative(self):
+        """Prueba que los buckets son acumulados y el último es +Inf."""
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+
+        assert list(histogram.samples("queries", 'route="/"')) == [
+            'queries_bucket{route="/",le="1"} 2',
+            'queries_bucket{route="/",le="5"} 3',
+            'queries_bucket{route="/",le="+Inf"} 4',
+            'queries_sum{route="/"} 11.0',
+            'queries_count{route="/"} 4',
+        ]
+
+
+class TestMetricsMiddleware:
+    def test_records_route_template_and_queries(self):
+        """
+        Prueba que cada petición se registra con la plantilla de la ruta, su estado y
+        las sentencias ejecutadas durante la petición.
+        """
+        metrics = RouteMetrics()
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            execute_statement()
+            execute_statement()
+            return {"id": item_id}
+
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+        # Fuera de una petición las sentencias no se cuentan.
+        execute_statement()
+
+        text = metrics.render()
+        assert (
+            'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2'
+            in text
+        )
+        assert (
+            'http_requests_total{method="GET",route="<unmatched>",status="404"} 1'
+            in text
+        )
+        assert (
+            'http_request_db_queries_sum{method="GET",route="/items/{item_id}"} 4'
+            in text
+        )
+        assert (
+            'http_request_db_queries_bucket{method="GET",route="<unmatched>",le="0"} 1'
+            in text
+        )
@@ -0,0 +1,107 @@
+import re
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.constants import SCHEMA_VERSION
+from migrations import MIGRATIONS, pending_migrations
+from migrations.operations import create_index_concurrently
+from models.model import VehicleModelModel
+
+
+@pytest.fixture
+def mock_connection():
+    connection = Mock(spec=AsyncConnection)
+    connection.scalar = AsyncMock()
+    connection.execute = AsyncMock()
+    return connection
+
+
+def _statements(connection: Mock) -> list[str]:
+    return [str(call.args[0]) for call in connection.execute.await_args_list]
+
+
+class TestMigrations:
+    def test_schema_version_is_latest_migration(self):
+        """Prueba que SCHEMA_VERSION corresponde a la última migración."""
+        versions = [migration.VERSION for migration in MIGRATIONS]
+        assert versions == sorted(set(versions))
+        assert SCHEMA_VERSION == versions[-1]
+
+    def test_pending_migrations(self):
+        """Prueba que solo quedan pendientes las migraciones posteriores a la versión."""
+        assert pending_migrations(1) == list(MIGRATIONS)
+        assert pending_migrations(SCHEMA_VERSION) == []
+
+    async def test_models_declare_migrated_indexes(self, mock_connection):
+        """
+        Prueba que los índices que quedan después de todas las migraciones son los
+        declarados en el modelo, para que las bases de datos nuevas los tengan sin
+        migrar.
+        """
+        mock_connection.scalar.return_value = None
+        for migration in MIGRATIONS:
+            await migration.upgrade(mock_connection)
+
+        indexes: set[str] = set()
+        for statement in _statements(mock_connection):
+            words = statement.split()
+            if statement.startswith("CREATE INDEX"):
+                indexes.add(words[3])
+            elif statement.startswith("DROP INDEX"):
+                indexes.discard(words[-1].removeprefix("vehicle."))
+        declared = {
+            index.name
+            for index in VehicleModelModel.__table__.indexes
+            if index.name not in ("ix_vehicle_models_id", "ix_vehicle_models_name")
+        }
+        assert indexes == declared
+
+    async def test_no_index_built_to_be_dropped(self, mock_connection):
+        """
+        Prueba que migrar desde la versión 1 no construye índices que una migración
+        posterior elimina.
+        """
+        mock_connection.scalar.return_value = None
+        for migration in pending_migrations(1):
+            await migration.upgrade(mock_connection)
+
+        created, dropped = set(), set()
+        for statement in _statements(mock_connection):
+            words = statement.split()
+            if statement.startswith("CREATE INDEX"):
+                created.add(words[3])
+            elif statement.startswith("DROP INDEX"):
+                dropped.add(words[-1].removeprefix("vehicle."))
+        assert created
+        assert not created & dropped
+
+
+class TestCreateIndexConcurrently:
+    @pytest.mark.parametrize(
+        "valid, expected",
+        [
+            (None, ["CREATE INDEX CONCURRENTLY"]),
+            (
+                False,
+                ["DROP INDEX CONCURRENTLY IF EXISTS", "CREATE INDEX CONCURRENTLY"],
+            ),
+            (True, []),
+        ],
+    )
+    async def test_create_index(self, mock_connection, valid, expected):
+        """
+        Prueba que el índice se crea si no existe, se vuelve a crear si quedó inválido
+        y se deja como está si ya es válido.
+        """
+        mock_connection.scalar.return_value = valid
+
+        await create_index_concurrently(
+            mock_connection, "ix_prueba", "vehicle.models (brand_id)"
+        )
+
+        assert [
+            re.sub(r" (vehicle\.)?ix_prueba.*", "", statement)
+            for statement in _statements(mock_connection)
+        ] == expected
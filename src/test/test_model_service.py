@@ -1,85 +1,124 @@
+import orjson
 import pytest
-from unittest.mock import Mock, patch
+from collections import namedtuple
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
 from fastapi import HTTPException
+from pydantic import ValidationError
 
 from services.model_service import ModelService
-from schemas.model import VehicleModelUpdateSchema
+from core.constants import (
+    MAX_PAGE_SIZE,
+    MIN_AVERAGE_PRICE,
+    MISSING_IDS_HEADER,
+    NEXT_CURSOR_HEADER,
+)
+from schemas.model import (
+    VehicleModelPriceUpdateSchema,
+    VehicleModelSchema,
+    VehicleModelUpdateSchema,
+)
+
+ModelRow = namedtuple("ModelRow", list(VehicleModelSchema.model_fields))
+
+
+def make_rows(models):
+    """Filas con las columnas de VehicleModelSchema, como las devuelve SQLAlchemy."""
+    return [ModelRow(**model) for model in models]
 
 
 class TestModelService:
-    def test_get_all_models_filtered_success(self, mock_db_session, sample_models_list):
+    async def test_get_all_models_filtered_success(
+        self, mock_db_session, sample_models_list
+    ):
         """Prueba obtener todos los modelos con filtros exitosamente."""
         # Arrange
-        mock_models = [Mock(**model) for model in sample_models_list]
-        mock_db_session.query.return_value.all.return_value = mock_models
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            sample_models_list
+        )
 
         # Act
-        result = ModelService.get_all_models_filtered(mock_db_session)
+        result = await ModelService.get_all_models_filtered(mock_db_session)
 
         # Assert
-        assert result == mock_models
-        mock_db_session.query.assert_called_once()
+        models = orjson.loads(result.body)
+        assert [model["name"] for model in models] == ["Corolla", "Camry"]
+        assert models[0]["average_price"] == 250000.5
+        mock_db_session.execute.assert_awaited_once()
+        stmt = mock_db_session.execute.await_args.args[0]
+        # Sin filtros solo se excluyen los modelos archivados.
+        assert str(stmt.whereclause) == "vehicle.models.is_active"
+        assert [column.name for column in stmt.selected_columns] == list(
+            VehicleModelSchema.model_fields
+        )
 
-    def test_get_all_models_filtered_with_greater_filter(self, mock_db_session):
+    async def test_get_all_models_filtered_with_greater_filter(
+        self, mock_db_session, sample_model_data
+    ):
         """Prueba obtener modelos con filtro de precio mayor."""
         # Arrange
         greater_price = 200000.0
-        mock_models = [Mock(id=1, name="Corolla", average_price=250000.50)]
-        # Encadena el mock para .filter().all()
-        mock_filter = Mock()
-        mock_filter.all.return_value = mock_models
-        mock_db_session.query.return_value.filter.return_value = mock_filter
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            [sample_model_data]
+        )
 
         # Act
-        result = ModelService.get_all_models_filtered(
+        result = await ModelService.get_all_models_filtered(
             mock_db_session, greater=greater_price
         )
 
         # Assert
-        assert result == mock_models
-        mock_db_session.query.assert_called_once()
+        assert [model["id"] for model in orjson.loads(result.body)] == [1]
+        mock_db_session.execute.assert_awaited_once()
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert "average_price >" in str(stmt.whereclause)
 
-    def test_get_all_models_filtered_with_lower_filter(self, mock_db_session):
+    async def test_get_all_models_filtered_with_lower_filter(
+        self, mock_db_session, sample_model_data
+    ):
         """Prueba obtener modelos con filtro de precio menor."""
         # Arrange
         lower_price = 300000.0
-        mock_models = [Mock(id=1, name="Corolla", average_price=250000.50)]
-        mock_filter = Mock()
-        mock_filter.all.return_value = mock_models
-        mock_db_session.query.return_value.filter.return_value = mock_filter
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            [sample_model_data]
+        )
 
         # Act
-        result = ModelService.get_all_models_filtered(
+        result = await ModelService.get_all_models_filtered(
             mock_db_session, lower=lower_price
         )
 
         # Assert
-        assert result == mock_models
-        mock_db_session.query.assert_called_once()
+        assert [model["id"] for model in orjson.loads(result.body)] == [1]
+        mock_db_session.execute.assert_awaited_once()
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert "average_price <" in str(stmt.whereclause)
 
-    def test_get_all_models_filtered_with_both_filters(self, mock_db_session):
+    async def test_get_all_models_filtered_with_both_filters(
+        self, mock_db_session, sample_model_data
+    ):
         """Prueba obtener modelos con ambos filtros de precio."""
         # Arrange
         greater_price = 200000.0
         lower_price = 300000.0
-        mock_models = [Mock(id=1, name="Corolla", average_price=250000.50)]
-        # Encadena dos filtros
-        mock_filter_1 = Mock()
-        mock_filter_2 = Mock()
-        mock_filter_2.all.return_value = mock_models
-        mock_filter_1.filter.return_value = mock_filter_2
-        mock_db_session.query.return_value.filter.return_value = mock_filter_1
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            [sample_model_data]
+        )
 
         # Act
-        result = ModelService.get_all_models_filtered(
+        result = await ModelService.get_all_models_filtered(
             mock_db_session, greater=greater_price, lower=lower_price
         )
 
         # Assert
-        assert result == mock_models
-        mock_db_session.query.assert_called_once()
+        assert [model["id"] for model in orjson.loads(result.body)] == [1]
+        mock_db_session.execute.assert_awaited_once()
+        where = str(mock_db_session.execute.await_args.args[0].whereclause)
+        assert "average_price >" in where
+        assert "average_price <" in where
 
-    def test_update_model_price_success(self, mock_db_session):
+    async def test_update_model_price_success(self, mock_db_session):
         """Prueba actualizar el precio de un modelo exitosamente."""
         # Arrange
         model_id = 1
@@ -88,34 +127,36 @@ class TestModelService:
         mock_model = Mock(id=model_id, name="Corolla", average_price=300000.50)
 
         with patch(
-            "services.model_service.CRUDModel.get_by_id", return_value=mock_model
-        ), patch("services.model_service.CRUDModel.update", return_value=mock_model):
+            "services.model_service.CRUDModel.update_price", return_value=mock_model
+        ):
             # Act
-            result = ModelService.update_model_price(
+            result = await ModelService.update_model_price(
                 mock_db_session, model_id, model_schema
             )
 
             # Assert
             assert result == mock_model
 
-    def test_update_model_price_model_not_found(self, mock_db_session):
+    async def test_update_model_price_model_not_found(self, mock_db_session):
         """Prueba actualizar el precio de un modelo que no existe."""
         # Arrange
         model_id = 999
         update_data = {"average_price": 300000.50}
         model_schema = VehicleModelUpdateSchema(**update_data)
 
-        with patch("services.model_service.CRUDModel.get_by_id", return_value=None):
+        with patch("services.model_service.CRUDModel.update_price", return_value=None):
             # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
-                ModelService.update_model_price(mock_db_session, model_id, model_schema)
+                await ModelService.update_model_price(
+                    mock_db_session, model_id, model_schema
+                )
 
             assert exc_info.value.status_code == 404
             assert f"El modelo con id '{model_id}' no existe." in str(
                 exc_info.value.detail
             )
 
-    def test_update_model_price_partial_update(self, mock_db_session):
+    async def test_update_model_price_partial_update(self, mock_db_session):
         """Prueba actualización parcial del modelo."""
         # Arrange
         model_id = 1
@@ -124,17 +165,17 @@ class TestModelService:
         mock_model = Mock(id=model_id, name="Corolla", average_price=300000.50)
 
         with patch(
-            "services.model_service.CRUDModel.get_by_id", return_value=mock_model
-        ), patch("services.model_service.CRUDModel.update", return_value=mock_model):
+            "services.model_service.CRUDModel.update_price", return_value=mock_model
+        ):
             # Act
-            result = ModelService.update_model_price(
+            result = await ModelService.update_model_price(
                 mock_db_session, model_id, model_schema
             )
 
             # Assert
             assert result == mock_model
 
-    def test_update_model_price_empty_update(self, mock_db_session):
+    async def test_update_model_price_empty_update(self, mock_db_session):
         """Prueba actualización con datos vacíos."""
         # Arrange
         model_id = 1
@@ -144,11 +185,288 @@ class TestModelService:
 
         with patch(
             "services.model_service.CRUDModel.get_by_id", return_value=mock_model
-        ), patch("services.model_service.CRUDModel.update", return_value=mock_model):
+        ), patch("services.model_service.CRUDModel.update_price") as update_price:
             # Act
-            result = ModelService.update_model_price(
+            result = await ModelService.update_model_price(
                 mock_db_session, model_id, model_schema
             )
 
             # Assert
             assert result == mock_model
+            update_price.assert_not_awaited()
+
+    async def test_get_all_models_filtered_with_cursor(
+        self, mock_db_session, sample_models_list
+    ):
+        """Prueba que el cursor de una página completa continúa la paginación."""
+        # Arrange
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            sample_models_list
+        )
+        page = await ModelService.get_all_models_filtered(mock_db_session, limit=2)
+        cursor = page.headers[NEXT_CURSOR_HEADER]
+        mock_db_session.execute.return_value.all.return_value = []
+
+        # Act
+        result = await ModelService.get_all_models_filtered(
+            mock_db_session, after=cursor, limit=2
+        )
+
+        # Assert
+        # Los modelos con precio y sin precio se leen en ramas separadas para que la
+        # llave se use como condición del índice (average_price, id).
+        stmt = mock_db_session.execute.await_args.args[0]
+        sql = str(stmt)
+        assert "(vehicle.models.average_price, vehicle.models.id) >" in sql
+        assert "UNION ALL" in sql
+        assert "vehicle.models.average_price IS NULL" in sql
+        assert Decimal("350000.75") in stmt.compile().params.values()
+        assert result.headers == {}
+
+    async def test_get_all_models_filtered_last_page(
+        self, mock_db_session, sample_models_list
+    ):
+        """Prueba que no se genera cursor cuando la página no está completa."""
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            sample_models_list
+        )
+
+        result = await ModelService.get_all_models_filtered(mock_db_session, limit=3)
+
+        assert result.headers == {}
+
+    async def test_get_all_models_filtered_with_fields(
+        self, mock_db_session, sample_models_list
+    ):
+        """
+        Prueba que `fields` reduce las columnas del SELECT y las llaves de la respuesta,
+        y que el cursor se calcula aunque no se pidan las llaves de ordenamiento.
+        """
+        # Arrange
+        ShortRow = namedtuple("ShortRow", ["name", "average_price", "id"])
+        mock_db_session.execute.return_value.all.return_value = [
+            ShortRow(model["name"], model["average_price"], model["id"])
+            for model in sample_models_list
+        ]
+
+        # Act
+        result = await ModelService.get_all_models_filtered(
+            mock_db_session, fields="name", limit=2
+        )
+
+        # Assert
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert [column.name for column in stmt.selected_columns] == [
+            "name",
+            "average_price",
+            "id",
+        ]
+        assert orjson.loads(result.body) == [{"name": "Corolla"}, {"name": "Camry"}]
+        cursor = result.headers[NEXT_CURSOR_HEADER]
+        assert ModelService._decode_after(cursor)[1] == sample_models_list[-1]["id"]
+
+    @pytest.mark.parametrize("fields", ["price", "id,price", "", " , "])
+    async def test_get_all_models_filtered_invalid_fields(
+        self, mock_db_session, fields
+    ):
+        """Prueba que campos desconocidos o vacíos responden 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            await ModelService.get_all_models_filtered(mock_db_session, fields=fields)
+
+        assert exc_info.value.status_code == 400
+        mock_db_session.execute.assert_not_awaited()
+
+    async def test_get_models_by_ids(self, mock_db_session, sample_models_list):
+        """
+        Prueba que la búsqueda por ids usa una sola consulta con ANY y devuelve los
+        modelos en el orden pedido, reportando los ids que no existen.
+        """
+        # Arrange
+        mock_db_session.execute.return_value.all.return_value = make_rows(
+            sample_models_list
+        )
+
+        # Act
+        result = await ModelService.get_models_by_ids(mock_db_session, "2, 7,1,2")
+
+        # Assert
+        mock_db_session.execute.assert_awaited_once()
+        stmt = mock_db_session.execute.await_args.args[0]
+        assert "vehicle.models.id = ANY" in str(stmt.whereclause)
+        assert [model["id"] for model in orjson.loads(result.body)] == [2, 1]
+        assert result.headers == {MISSING_IDS_HEADER: "7"}
+
+    @pytest.mark.parametrize(
+        "ids", ["", " , ", "1,a", ",".join(map(str, range(MAX_PAGE_SIZE + 1)))]
+    )
+    async def test_get_models_by_ids_invalid(self, mock_db_session, ids):
+        """Prueba que una lista de ids vacía, inválida o demasiado larga responde 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            await ModelService.get_models_by_ids(mock_db_session, ids)
+
+        assert exc_info.value.status_code == 400
+        mock_db_session.execute.assert_not_awaited()
+
+    async def test_get_all_models_filtered_invalid_cursor(self, mock_db_session):
+        """Prueba que un cursor malformado responde 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            await ModelService.get_all_models_filtered(mock_db_session, after="abc")
+
+        assert exc_info.value.status_code == 400
+        mock_db_session.execute.assert_not_awaited()
+
+    async def test_update_model_prices_reports_not_found(self, mock_db_session):
+        """Prueba que la actualización masiva reporta los ids que no existen."""
+        # Arrange
+        mock_db_session.execute.return_value.all.return_value = [
+            Mock(id=1, brand_id=1, average_price=300000, previous_price=250000),
+        ]
+        prices_in = [
+            VehicleModelPriceUpdateSchema(id=3, average_price=200000),
+            VehicleModelPriceUpdateSchema(id=1, average_price=280000),
+            VehicleModelPriceUpdateSchema(id=1, average_price=300000),
+        ]
+
+        # Act
+        result = await ModelService.update_model_prices(mock_db_session, prices_in)
+
+        # Assert
+        assert result.updated == 1
+        assert result.not_found == [3]
+        update_stmt = mock_db_session.execute.await_args_list[0].args[0]
+        params = update_stmt.compile().params
+        assert [params[f"param_{i}"] for i in range(1, 5)] == [1, 300000, 3, 200000]
+        mock_db_session.commit.assert_awaited_once()
+
+    def test_update_model_prices_validation(self):
+        """Prueba que los precios se validan contra MIN_AVERAGE_PRICE."""
+        with pytest.raises(ValidationError):
+            VehicleModelPriceUpdateSchema(id=1, average_price=MIN_AVERAGE_PRICE)
+
+    @pytest.mark.parametrize(
+        "payload",
+        [[{"id": 1, "average_prce": 500000}], [{"id": 1}]],
+    )
+    def test_update_model_prices_requires_price(self, client, mock_db_session, payload):
+        """
+        Prueba que un elemento sin precio explícito o con campos desconocidos se
+        rechaza en lugar de dejar el precio en NULL.
+        """
+        response = client.put("/api/v1/models/bulk", json=payload)
+
+        assert response.status_code == 422
+        mock_db_session.execute.assert_not_awaited()
+
+    @pytest.mark.parametrize("is_active, sign", [(False, -1), (True, 1)])
+    async def test_set_model_active_updates_brand_stats(
+        self, mock_db_session, is_active, sign
+    ):
+        """
+        Prueba que archivar un modelo descuenta su precio del agregado de la marca y
+        restaurarlo lo vuelve a sumar.
+        """
+        # Arrange
+        row = Mock(id=1, brand_id=2, average_price=Decimal("300000"))
+        mock_db_session.execute.return_value.first.return_value = row
+
+        # Act
+        result = await ModelService.set_model_active(mock_db_session, 1, is_active)
+
+        # Assert
+        assert result == row
+        update_stmt, stats_call = mock_db_session.execute.await_args_list[:2]
+        assert "vehicle.models.is_active !=" in str(update_stmt.args[0])
+        assert stats_call.args[1] == [
+            {
+                "brand_id": 2,
+                "price_sum": sign * Decimal("300000"),
+                "priced_count": sign,
+            }
+        ]
+        mock_db_session.commit.assert_awaited_once()
+
+    @pytest.mark.parametrize("row", [None, Mock(id=1, brand_id=2)])
+    async def test_set_model_active_unchanged(self, mock_db_session, row):
+        """
+        Prueba que si el modelo ya estaba en ese estado no se escribe nada, y que si no
+        existe se devuelve 404.
+        """
+        # Arrange
+        mock_db_session.execute.return_value.first.side_effect = [None, row]
+
+        # Act & Assert
+        if row is None:
+            with pytest.raises(HTTPException) as exc_info:
+                await ModelService.set_model_active(mock_db_session, 1, False)
+            assert exc_info.value.status_code == 404
+        else:
+            assert await ModelService.set_model_active(mock_db_session, 1, False) == row
+        assert mock_db_session.execute.await_count == 2
+        mock_db_session.commit.assert_not_awaited()
+
+
+class TestExportModels:
+    @pytest.fixture
+    def export_rows(self, mock_db_session):
+        """Dos bloques de filas leídas con un cursor del lado del servidor."""
+        created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = make_rows(
+            [
+                {
+                    "name": name,
+                    "average_price": price,
+                    "id": model_id,
+                    "brand_id": 1,
+                    "is_active": True,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                for model_id, name, price in [
+                    (1, "Corolla", 250000.5),
+                    (2, "Camry", None),
+                ]
+            ]
+        )
+
+        async def partitions():
+            yield rows[:1]
+            yield rows[1:]
+
+        result = Mock()
+        result.partitions = partitions
+        mock_db_session.stream = AsyncMock(return_value=result)
+        return rows
+
+    def test_export_ndjson(self, client, mock_db_session, export_rows):
+        """Prueba exportar en NDJSON con el mismo formato que la API."""
+        response = client.get("/api/v1/models/export", params={"greater": 1000})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.content.splitlines()
+        assert [orjson.loads(line)["name"] for line in lines] == ["Corolla", "Camry"]
+        first = orjson.loads(lines[0])
+        assert first["average_price"] == 250000.5
+        assert first["created_at"] == "2024-01-01T00:00:00Z"
+        assert orjson.loads(lines[1])["average_price"] is None
+        stmt = mock_db_session.stream.await_args.args[0]
+        assert "average_price >" in str(stmt.whereclause)
+
+    def test_export_csv(self, client, export_rows):
+        """Prueba exportar en CSV con encabezado."""
+        response = client.get("/api/v1/models/export", params={"format": "csv"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines() == [
+            ",".join(VehicleModelSchema.model_fields),
+            "Corolla,250000.5,1,1,True,2024-01-01 00:00:00+00:00,"
+            "2024-01-01 00:00:00+00:00",
+            "Camry,,2,1,True,2024-01-01 00:00:00+00:00,2024-01-01 00:00:00+00:00",
+        ]
+
+    def test_export_invalid_format(self, client):
+        """Prueba que un formato desconocido se rechaza."""
+        response = client.get("/api/v1/models/export", params={"format": "xml"})
+
+        assert response.status_code == 422
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from core.pool import InstrumentedAsyncPool
+
+
+def make_pool(**kwargs):
+    """Pool con conexiones falsas y sin pre-ping."""
+    return InstrumentedAsyncPool(Mock, pre_ping=False, **kwargs)
+
+
+class TestInstrumentedAsyncPool:
+    async def test_counts_checkouts_and_churn(self):
+        """Prueba que se cuentan las conexiones en uso, abiertas, cerradas e invalidadas."""
+        pool = make_pool(pool_size=1, max_overflow=1)
+
+        def checkouts():
+            first, second = pool.connect(), pool.connect()
+            stats = pool.stats()
+            assert (stats["checked_out"], stats["overflow"]) == (2, 1)
+
+            # La conexión de overflow se cierra al devolverse.
+            first.close()
+            second.close()
+            pool.connect().invalidate()
+
+        await greenlet_spawn(checkouts)
+
+        stats = pool.stats()
+        assert stats["checkouts"] == 3
+        assert (stats["checked_out"], stats["idle"]) == (0, 1)
+        assert stats["connections"] == {"opened": 2, "closed": 2, "invalidated": 1}
+        assert stats["checkout_wait_seconds"]["max"] >= 0
+
+    async def test_counts_timeouts(self):
+        """Prueba que una espera agotada se cuenta y se mide."""
+        pool = make_pool(pool_size=1, max_overflow=0, timeout=0.05)
+        connection = await greenlet_spawn(pool.connect)
+
+        with pytest.raises(exc.TimeoutError):
+            await greenlet_spawn(pool.connect)
+
+        stats = pool.stats()
+        assert stats["checkout_timeouts"] == 1
+        assert stats["checkout_wait_seconds"]["max"] >= 0.05
+        connection.close()
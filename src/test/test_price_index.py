@@ -0,0 +1,194 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from core.price_index import PriceIndex
+
+CREATED_AT = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+PRICES = {
+    1: Decimal("250000.50"),
+    2: Decimal("350000.75"),
+    3: None,
+    4: Decimal("250000.50"),
+    5: Decimal("150000.00"),
+    6: None,
+    7: Decimal("999999.99"),
+}
+
+
+def make_model(model_id, average_price):
+    return SimpleNamespace(
+        id=model_id,
+        name=f"Modelo {model_id}",
+        average_price=average_price,
+        brand_id=model_id % 2 + 1,
+        is_active=True,
+        created_at=CREATED_AT,
+        updated_at=CREATED_AT,
+    )
+
+
+def expected_ids(prices, *, greater=None, lower=None, after=None):
+    """Resultado esperado con el mismo orden que la consulta SQL (NULL al final)."""
+    rows = [
+        (price is None, price or 0, model_id)
+        for model_id, price in prices.items()
+        if (greater is None or (price is not None and price > Decimal(str(greater))))
+        and (lower is None or (price is not None and price < Decimal(str(lower))))
+    ]
+    rows.sort()
+    if after is not None:
+        after_price, after_id = after
+        key = (after_price is None, after_price or 0, after_id)
+        rows = [row for row in rows if row > key]
+    return [model_id for _, _, model_id in rows]
+
+
+@pytest.fixture
+async def index(mock_db_session):
+    async def stream_filtered(db, *, chunk_size):
+        yield [make_model(model_id, price) for model_id, price in PRICES.items()]
+
+    price_index = PriceIndex()
+    with patch("core.price_index.CRUDModel.stream_filtered", stream_filtered):
+        assert await price_index.load(mock_db_session) == len(PRICES)
+    return price_index
+
+
+class TestPriceIndex:
+    @pytest.mark.parametrize(
+        "greater,lower",
+        [
+            (None, None),
+            (200000, None),
+            (None, 350000.75),
+            (250000.5, 999999.99),
+            (150000, 350000.76),
+            (1000000, None),
+        ],
+    )
+    def test_query_matches_sql_order(self, index, greater, lower):
+        """Prueba que los filtros y el orden coinciden con la consulta SQL."""
+        models = index.query(greater=greater, lower=lower)
+
+        assert [model["id"] for model in models] == expected_ids(
+            PRICES, greater=greater, lower=lower
+        )
+
+    def test_query_pages_with_cursor(self, index):
+        """Prueba que recorrer las páginas con el cursor devuelve todos los modelos."""
+        seen, after = [], None
+        while True:
+            page = index.query(after=after, limit=2)
+            seen.extend(model["id"] for model in page)
+            if len(page) < 2:
+                break
+            last = page[-1]
+            price = last["average_price"]
+            after = (None if price is None else Decimal(str(price)), last["id"])
+
+        assert seen == expected_ids(PRICES)
+
+    def test_query_model_fields(self, index):
+        """Prueba que los modelos se reconstruyen con sus valores originales."""
+        model = index.query(greater=999999)[0]
+
+        assert model["id"] == 7
+        assert model["name"] == "Modelo 7"
+        assert model["average_price"] == 999999.99
+        assert model["brand_id"] == 2
+        assert model["is_active"] is True
+        assert model["created_at"] == CREATED_AT
+
+    def test_upsert_moves_model(self, index):
+        """Prueba que actualizar el precio mueve al modelo dentro del orden."""
+        prices = {**PRICES, 1: None, 3: Decimal("120000.00"), 8: Decimal("500000")}
+
+        index.upsert(
+            [make_model(1, None), make_model(3, prices[3]), make_model(8, prices[8])]
+        )
+
+        assert [model["id"] for model in index.query()] == expected_ids(prices)
+        assert len(index) == 8
+
+    def test_upsert_many_merges(self, index):
+        """Prueba que una carga grande de modelos mantiene el mismo orden."""
+        new_prices = {
+            model_id: None if model_id % 7 == 0 else Decimal(200000 + model_id % 13)
+            for model_id in range(2, 200)
+        }
+        prices = {**PRICES, **new_prices}
+
+        index.upsert(
+            make_model(model_id, price) for model_id, price in new_prices.items()
+        )
+
+        assert [model["id"] for model in index.query()] == expected_ids(prices)
+        assert [model["id"] for model in index.query(greater=200005)] == expected_ids(
+            prices, greater=200005
+        )
+        assert len(index) == len(prices)
+
+    @pytest.mark.parametrize("extra", [0, 100])
+    def test_upsert_archived_model(self, index, extra):
+        """
+        Prueba que un modelo archivado sale de las consultas y de get_many, y que
+        vuelve a su lugar al restaurarlo.
+        """
+        new_prices = {
+            model_id: Decimal(300000 + model_id) for model_id in range(8, 8 + extra)
+        }
+        archived = [make_model(1, PRICES[1]), make_model(3, None)]
+        for model in archived:
+            model.is_active = False
+        prices = {**PRICES, **new_prices}
+
+        index.upsert(
+            [
+                *archived,
+                *(
+                    make_model(model_id, price)
+                    for model_id, price in new_prices.items()
+                ),
+            ]
+        )
+
+        active = {
+            model_id: price
+            for model_id, price in prices.items()
+            if model_id not in (1, 3)
+        }
+        assert [model["id"] for model in index.query()] == expected_ids(active)
+        assert list(index.get_many([1, 3, 7])) == [7]
+        assert len(index) == len(active)
+
+        for model in archived:
+            model.is_active = True
+        index.upsert(archived)
+
+        assert [model["id"] for model in index.query()] == expected_ids(prices)
+        assert len(index) == len(prices)
+
+    def test_get_many(self, index):
+        """Prueba que get_many omite los ids que no están en el índice."""
+        models = index.get_many([7, 99, 1])
+
+        assert list(models) == [7, 1]
+        assert models[7] == index.query(greater=999999)[0]
+
+    def test_not_ready(self):
+        """Prueba que un índice sin cargar no responde consultas ni acepta cambios."""
+        price_index = PriceIndex()
+        price_index.upsert([make_model(1, Decimal("250000"))])
+
+        assert not price_index.can_answer(None, None)
+        assert len(price_index) == 0
+
+    def test_can_answer_infinite_bounds(self, index):
+        """Prueba que los límites no finitos se dejan a la base de datos."""
+        assert index.can_answer(200000, None)
+        assert not index.can_answer(float("inf"), None)
+        assert not index.can_answer(None, float("nan"))
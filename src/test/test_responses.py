@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from schemas.brand import VehicleBrandWithAveragePriceSchema
+from schemas.model import VehicleModelSchema, VehicleModelSummarySchema
+from shared.responses import RawJSONResponse, dumps
+
+CREATED_AT = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+UPDATED_AT = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+class TestDumps:
+    @pytest.mark.parametrize(
+        "schema,rows",
+        [
+            (
+                VehicleModelSchema,
+                [
+                    {
+                        "name": "Corolla ñ",
+                        "average_price": 250000.5,
+                        "id": 1,
+                        "brand_id": 1,
+                        "is_active": True,
+                        "created_at": CREATED_AT,
+                        "updated_at": UPDATED_AT,
+                    },
+                    {
+                        "name": "Camry",
+                        "average_price": None,
+                        "id": 2,
+                        "brand_id": 1,
+                        "is_active": False,
+                        "created_at": CREATED_AT,
+                        "updated_at": CREATED_AT,
+                    },
+                ],
+            ),
+            (
+                VehicleModelSummarySchema,
+                [
+                    {"id": 1, "name": "ILX", "average_price": Decimal("777777.00")},
+                    {"id": 2, "name": "MDX", "average_price": None},
+                ],
+            ),
+            (
+                VehicleBrandWithAveragePriceSchema,
+                [{"id": 1, "name": "Acura", "average_price": Decimal("254854")}],
+            ),
+        ],
+    )
+    def test_same_output_as_pydantic(self, schema, rows):
+        """Prueba que las filas se serializan igual que con el esquema de Pydantic."""
+        adapter = TypeAdapter(List[schema])
+
+        assert dumps(rows) == adapter.dump_json(adapter.validate_python(rows))
+
+    def test_unsupported_type(self):
+        """Prueba que un tipo desconocido no se serializa en silencio."""
+        with pytest.raises(TypeError):
+            dumps([object()])
+
+
+class TestRawJSONResponse:
+    def test_bytes_are_sent_as_is(self):
+        """Prueba que el contenido ya serializado no se vuelve a serializar."""
+        response = RawJSONResponse(b'[{"id":1}]')
+
+        assert response.body == b'[{"id":1}]'
+        assert response.media_type == "application/json"
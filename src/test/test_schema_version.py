@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.exc import ProgrammingError
+
+from core import lifespan
+from core.constants import SCHEMA_VERSION
+from crud.schema_version import CRUDSchemaVersion
+
+
+class TestCRUDSchemaVersion:
+    async def test_missing_table(self, mock_db_session):
+        """Prueba que sin la tabla de versión se devuelve None y se revierte."""
+        mock_db_session.execute.side_effect = ProgrammingError("SELECT", {}, None)
+        mock_db_session.rollback = AsyncMock()
+
+        assert await CRUDSchemaVersion.get(mock_db_session) is None
+        mock_db_session.rollback.assert_awaited_once()
+
+
+class TestBootstrapDb:
+    @pytest.fixture
+    def steps(self, monkeypatch, mock_db_session):
+        session_factory = Mock()
+        session_factory.return_value.__aenter__ = AsyncMock(
+            return_value=mock_db_session
+        )
+        session_factory.return_value.__aexit__ = AsyncMock(return_value=None)
+        monkeypatch.setattr(lifespan.database, "SessionLocal", session_factory)
+        steps = Mock(migrate_db=AsyncMock(), populate_db=AsyncMock())
+        monkeypatch.setattr(lifespan, "migrate_db", steps.migrate_db)
+        monkeypatch.setattr(lifespan, "populate_db", steps.populate_db)
+        return steps
+
+    @pytest.mark.parametrize(
+        "state, current",
+        [
+            (None, False),
+            (Mock(version=SCHEMA_VERSION, seeded_at=None), False),
+            (
+                Mock(version=SCHEMA_VERSION - 1, seeded_at=datetime.now(timezone.utc)),
+                False,
+            ),
+            (Mock(version=SCHEMA_VERSION, seeded_at=datetime.now(timezone.utc)), True),
+        ],
+    )
+    async def test_skips_current_database(
+        self, monkeypatch, steps, mock_db_session, state, current
+    ):
+        """
+        Prueba que el esquema y las semillas solo se omiten si la base de datos tiene
+        la versión actual y ya se pobló.
+        """
+        monkeypatch.setattr(CRUDSchemaVersion, "get", AsyncMock(return_value=state))
+
+        await lifespan.bootstrap_db()
+
+        assert steps.migrate_db.await_count == (0 if current else 1)
+        assert steps.populate_db.await_count == (0 if current else 1)
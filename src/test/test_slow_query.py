@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from loguru import logger
+
+from core.config import get_settings
+from core.database import Database
+from core.slow_query import SlowQueryLog
+
+
+class FakeCursor:
+    def __init__(self, executed: list[str], fail: str | None = None):
+        self.executed = executed
+        self.fail = fail
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+        if self.fail is not None and statement.startswith(self.fail):
+            raise RuntimeError("error de prueba")
+
+    def fetchone(self):
+        return ('[{"Plan": {"Node Type": "Seq Scan"}}]',)
+
+    def close(self):
+        pass
+
+
+def fake_connection(
+    executed: list[str],
+    fail: str | None = None,
+    in_transaction: bool = True,
+    autocommit: bool = False,
+):
+    cursor = FakeCursor(executed, fail)
+    return SimpleNamespace(
+        in_transaction=lambda: in_transaction,
+        connection=SimpleNamespace(
+            cursor=lambda: cursor,
+            dbapi_connection=SimpleNamespace(autocommit=autocommit),
+        ),
+    )
+
+
+@pytest.fixture
+def slow_queries():
+    records = []
+    sink_id = logger.add(
+        lambda message: records.append(message.record["extra"]["slow_query"]),
+        filter=lambda record: "slow_query" in record["extra"],
+    )
+    yield records
+    logger.remove(sink_id)
+
+
+def execute(log: SlowQueryLog, conn, statement: str, elapsed: float):
+    """Simula los eventos del engine para una sentencia que tarda `elapsed` segundos."""
+    context = SimpleNamespace()
+    log._before(conn, None, statement, (1,), context, False)
+    context._slow_query_started_at -= elapsed
+    log._after(conn, None, statement, (1,), context, False)
+
+
+class TestSlowQueryLog:
+    def test_logs_only_statements_over_threshold(self, slow_queries):
+        """Prueba que solo se registran las sentencias que superan el umbral."""
+        log = SlowQueryLog(threshold_seconds=0.5)
+        execute(log, fake_connection([]), "SELECT 1", elapsed=0.1)
+        execute(log, fake_connection([]), "SELECT 2", elapsed=0.6)
+
+        assert len(slow_queries) == 1
+        assert slow_queries[0]["statement"] == "SELECT 2"
+        assert slow_queries[0]["parameters"] == "(1,)"
+        assert slow_queries[0]["duration_ms"] >= 600
+        assert "plan" not in slow_queries[0]
+
+    def test_explains_sampled_selects(self, slow_queries):
+        """
+        Prueba que el plan se obtiene en un SAVEPOINT y solo para sentencias SELECT.
+        """
+        log = SlowQueryLog(threshold_seconds=0, explain_sample_rate=1)
+        executed = []
+        execute(log, fake_connection(executed), "SELECT 1", elapsed=0)
+        execute(log, fake_connection(executed), "UPDATE t SET a = 1", elapsed=0)
+
+        assert slow_queries[0]["plan"] == [{"Plan": {"Node Type": "Seq Scan"}}]
+        assert "plan" not in slow_queries[1]
+        assert executed == [
+            "SAVEPOINT slow_query_explain",
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT 1",
+            "RELEASE SAVEPOINT slow_query_explain",
+        ]
+
+    def test_failed_explain_rolls_back_to_savepoint(self, slow_queries):
+        """
+        Prueba que un error del EXPLAIN se registra sin plan y no deja la transacción
+        abortada.
+        """
+        log = SlowQueryLog(threshold_seconds=0, explain_sample_rate=1)
+        executed = []
+        execute(log, fake_connection(executed, fail="EXPLAIN"), "SELECT 1", 0)
+
+        assert slow_queries[0]["plan"] is None
+        assert executed[-2:] == [
+            "ROLLBACK TO SAVEPOINT slow_query_explain",
+            "RELEASE SAVEPOINT slow_query_explain",
+        ]
+
+    @pytest.mark.parametrize(
+        "statement,connection",
+        [
+            ("SELECT * FROM t FOR UPDATE", {}),
+            ("SELECT * FROM t FOR NO KEY UPDATE OF t", {}),
+            ("SELECT pg_try_advisory_lock(hashtext($1))", {}),
+            ("SELECT nextval('t_id_seq')", {}),
+            ("SELECT * INTO copia FROM t", {}),
+            ("SELECT 1", {"autocommit": True}),
+            ("SELECT 1", {"in_transaction": False}),
+        ],
+    )
+    def test_skips_unsafe_explains(self, slow_queries, statement, connection):
+        """
+        Prueba que no se repiten con EXPLAIN ANALYZE los SELECT con efectos ni los que
+        se ejecutan fuera de una transacción.
+        """
+        log = SlowQueryLog(threshold_seconds=0, explain_sample_rate=1)
+        executed = []
+        execute(log, fake_connection(executed, **connection), statement, elapsed=0)
+
+        assert "plan" not in slow_queries[0]
+        assert executed == []
+
+    def test_failed_savepoint_is_logged(self, slow_queries):
+        """Prueba que un error al crear el SAVEPOINT no sale del evento del engine."""
+        log = SlowQueryLog(threshold_seconds=0, explain_sample_rate=1)
+        executed = []
+        execute(log, fake_connection(executed, fail="SAVEPOINT"), "SELECT 1", 0)
+
+        assert slow_queries[0]["plan"] is None
+        assert executed == ["SAVEPOINT slow_query_explain"]
+
+    def test_json_sink_registered_once_for_all_engines(self, monkeypatch, tmp_path):
+        """
+        Prueba que el sink JSON se registra al crear cualquier engine, incluidos los de
+        las réplicas, y solo una vez por archivo.
+        """
+        path = tmp_path / "slow.jsonl"
+        settings = get_settings().model_copy(
+            update={"SLOW_QUERY_THRESHOLD_MS": 0, "SLOW_QUERY_LOG_FILE": path}
+        )
+        monkeypatch.setattr("core.database.get_settings", lambda: settings)
+        monkeypatch.setattr(SlowQueryLog, "_json_sinks", set())
+
+        with patch("core.slow_query.logger.add") as add:
+            replica = Database.create_engine("postgresql://u:p@replica/db")
+            primary = Database.create_engine("postgresql://u:p@primary/db")
+
+        add.assert_called_once()
+        assert add.call_args.args == (path,)
+        assert SlowQueryLog._json_sinks == {path}
+        replica.sync_engine.dispose()
+        primary.sync_engine.dispose()